@@ -1,6 +1,62 @@
 import csv
+import math
 from datetime import date
-from typing import Dict, Any, Optional
+from functools import lru_cache
+from typing import Dict, Any, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+from .phase_model import get_phases
+
+# symptom markers that force a light day
+STRONG_PAIN_MARKERS = ("strong_cramps", "migraine")
+
+# desired intensities covered by the precomputed decision table
+INTENSITIES = ("light", "moderate", "heavy")
+
+# distinct (cycle_length, bleed_days) pairs whose rescaled templates are kept
+RESCALED_TEMPLATE_CACHE_SIZE = 64
+
+
+def _parse_int(value: Optional[str], default: int) -> int:
+    if value is None or value.strip() == "":
+        return default
+    return int(value)
+
+
+class CycleDayRecord:
+    """
+    One template row with the fields the decision path needs parsed once
+    at load time: ints for the 1-5 scores, a tuple of symptoms and the
+    has_strong_pain flag.
+    """
+
+    __slots__ = (
+        "cycle_day",
+        "template_day",
+        "phase",
+        "energy",
+        "rest_need",
+        "symptoms",
+        "has_strong_pain",
+    )
+
+    def __init__(self, row: Dict[str, Any]):
+        self.cycle_day = int(row["Cycle_Day"])
+        # day of the original template this row was interpolated around;
+        # the day-range rules in _decide are written against it
+        self.template_day = _parse_int(row.get("Template_Day"), self.cycle_day)
+        # Adjust these keys to match your CSV column names exactly
+        self.phase: str = row.get("Cycle_Phase", "") or ""
+        self.energy = _parse_int(row.get("Energy_Level_1to5"), 3)
+        self.rest_need = _parse_int(row.get("Rest_Need_1to5"), 3)
+        symptoms_raw = row.get("Expected_Symptoms", "") or ""
+        self.symptoms: Tuple[str, ...] = (
+            tuple(s.strip() for s in symptoms_raw.split(",")) if symptoms_raw else ()
+        )
+        self.has_strong_pain = any(
+            marker in s for s in self.symptoms for marker in STRONG_PAIN_MARKERS
+        )
 
 
 class CycleDecisionEngine:
@@ -8,9 +64,37 @@ class CycleDecisionEngine:
         """
         Initialize the decision engine and load the cycle template CSV into memory.
         """
+        self._init_state(cycle_length)
+        self._load_cycle_template(csv_path)
+
+    @classmethod
+    def from_rows(
+        cls, rows: List[Dict[str, Any]], cycle_length: int
+    ) -> "CycleDecisionEngine":
+        """
+        Build an engine from template rows instead of a CSV file
+        (used for rescaled templates).
+        """
+        engine = cls.__new__(cls)
+        engine._init_state(cycle_length)
+        for row in rows:
+            engine.template_by_day[int(row["Cycle_Day"])] = row
+        engine._compile_template()
+        return engine
+
+    def _init_state(self, cycle_length: int) -> None:
         self.cycle_length = cycle_length
         self.template_by_day: Dict[int, Dict[str, Any]] = {}
-        self._load_cycle_template(csv_path)
+        # compiled rows, indexed by cycle day (index 0 unused)
+        self.records: List[Optional[CycleDayRecord]] = []
+        self.bleed_days = 0
+        self._matches_phase_engine = True
+        # desired intensity -> decision per cycle day (index 0 unused)
+        self.decision_table: Dict[str, List[Optional[Dict[str, Any]]]] = {}
+        # (cycle_length, bleed_days) -> engine on the rescaled template
+        self._rescaled = lru_cache(maxsize=RESCALED_TEMPLATE_CACHE_SIZE)(
+            self._rescale
+        )
 
     def _load_cycle_template(self, csv_path: str) -> None:
         """
@@ -27,6 +111,76 @@ class CycleDecisionEngine:
         if not self.template_by_day:
             raise ValueError("No rows loaded from CSV. Check file and column names.")
 
+        self._compile_template()
+
+    def _compile_template(self) -> None:
+        # parse everything the decision path needs once, here
+        records: List[Optional[CycleDayRecord]] = [None] * (
+            max(self.template_by_day) + 1
+        )
+        for cycle_day, row in self.template_by_day.items():
+            records[cycle_day] = CycleDayRecord(row)
+        self.records = records
+        segments = _phase_segments(records)
+        # length of the template's leading (menstrual) phase
+        self.bleed_days = segments[0][2]
+        lengths = [length for _, _, length in segments]
+        # whether the template's own phases are phase_engine's for its
+        # (cycle_length, bleed_days); otherwise even that pair is rescaled
+        self._matches_phase_engine = lengths == _target_lengths(
+            lengths, self.cycle_length, self.bleed_days
+        )
+        self._build_decision_table()
+
+    def _build_decision_table(self) -> None:
+        """
+        Precompute the decision for every cycle day x desired intensity.
+        Days without a template row stay None.
+        """
+        table: Dict[str, List[Optional[Dict[str, Any]]]] = {}
+        for intensity in INTENSITIES:
+            column: List[Optional[Dict[str, Any]]] = [None]
+            for cycle_day in range(1, self.cycle_length + 1):
+                try:
+                    column.append(self._decide(cycle_day, intensity))
+                except KeyError:
+                    column.append(None)
+            table[intensity] = column
+        self.decision_table = table
+
+    def for_cycle(
+        self, cycle_length: int, bleed_days: Optional[int] = None
+    ) -> "CycleDecisionEngine":
+        """
+        Engine whose template is rescaled to cycle_length days with
+        bleed_days menstrual days (default: the template's). Rescaled
+        engines are cached per (cycle_length, bleed_days). The template
+        itself is used only if its phases already match phase_engine's.
+        """
+        bleed_days = bleed_days or self.bleed_days
+        if (
+            cycle_length == self.cycle_length
+            and bleed_days == self.bleed_days
+            and self._matches_phase_engine
+        ):
+            return self
+        return self._rescaled(cycle_length, bleed_days)
+
+    def _rescale(self, cycle_length: int, bleed_days: int) -> "CycleDecisionEngine":
+        rows = rescale_template_rows(
+            self.records, self.template_by_day, cycle_length, bleed_days
+        )
+        return CycleDecisionEngine.from_rows(rows, cycle_length)
+
+    def rescale_cache_info(self) -> Dict[str, int]:
+        info = self._rescaled.cache_info()
+        return {
+            "hits": info.hits,
+            "misses": info.misses,
+            "size": info.currsize,
+            "max_size": info.maxsize,
+        }
+
     def _normalize_cycle_day(self, cycle_day: int) -> int:
         """
         Ensure cycle_day is mapped into 1..cycle_length (e.g. 1..28).
@@ -43,6 +197,18 @@ class CycleDecisionEngine:
         except KeyError:
             raise KeyError(f"No template data for cycle_day={normalized_day}")
 
+    def get_cycle_record(self, cycle_day: int) -> CycleDayRecord:
+        """
+        Return the compiled template row for a given cycle day.
+        """
+        normalized_day = self._normalize_cycle_day(cycle_day)
+        record = (
+            self.records[normalized_day] if normalized_day < len(self.records) else None
+        )
+        if record is None:
+            raise KeyError(f"No template data for cycle_day={normalized_day}")
+        return record
+
     @staticmethod
     def compute_cycle_day_from_dates(
         last_period_start: date,
@@ -66,42 +232,51 @@ class CycleDecisionEngine:
           - cycle_day: integer (1..28)
           - desired_intensity: 'light' | 'moderate' | 'heavy'
         Returns a dict with recommended_intensity, ok_to_do_heavy, explanation, etc.
+        The three standard intensities are answered from the decision table.
         """
-        row = self.get_cycle_row(cycle_day)
+        cycle_day = self._normalize_cycle_day(cycle_day)
+        column = self.decision_table.get(desired_intensity)
+        if column is None:
+            return self._decide(cycle_day, desired_intensity)
 
-        # Adjust these keys to match your CSV column names exactly
-        phase: str = row.get("Cycle_Phase", "")
-        # Convert string to int safely
-        energy = int(row.get("Energy_Level_1to5", 3))
-        rest_need = int(row.get("Rest_Need_1to5", 3))
-        symptoms_raw = row.get("Expected_Symptoms", "") or ""
-        symptoms = [s.strip() for s in symptoms_raw.split(",")] if symptoms_raw else []
+        decision = column[cycle_day]
+        if decision is None:
+            raise KeyError(f"No template data for cycle_day={cycle_day}")
+        return _copy_decision(decision)
+
+    def _decide(self, cycle_day: int, desired_intensity: str) -> Dict[str, Any]:
+        """
+        Evaluate the decision rules for a normalized cycle day.
+        """
+        record = self.get_cycle_record(cycle_day)
+
+        phase = record.phase
+        energy = record.energy
+        rest_need = record.rest_need
+        # the day ranges below refer to the original (28-day) template
+        template_day = record.template_day
 
         # 1) Base intensity by phase + cycle day
         if phase == "Menstrual":
-            if cycle_day <= 2:
+            if template_day <= 2:
                 base = "rest_or_very_light"
             else:
                 base = "light"
         elif phase == "Follicular":
-            if 6 <= cycle_day <= 10:
+            if 6 <= template_day <= 10:
                 base = "moderate_to_heavy"
             else:  # 11-13
                 base = "heavy"
         elif phase == "Ovulatory":
             base = "heavy"
         else:  # Luteal
-            if 16 <= cycle_day <= 21:
+            if 16 <= template_day <= 21:
                 base = "moderate"
             else:
                 base = "light_or_moderate"
 
         # 2) Modify based on energy / rest / symptoms
-        has_strong_pain = any(
-            "strong_cramps" in s or "migraine" in s for s in symptoms
-        )
-
-        if energy <= 2 or rest_need >= 4 or has_strong_pain:
+        if energy <= 2 or rest_need >= 4 or record.has_strong_pain:
             # Override to light/rest
             recommended_intensity = "light"
             ok_heavy = False
@@ -156,7 +331,7 @@ class CycleDecisionEngine:
                     )
 
         return {
-            "cycle_day": self._normalize_cycle_day(cycle_day),
+            "cycle_day": cycle_day,
             "cycle_phase": phase,
             "desired_intensity": desired_intensity,
             "base_intensity_pattern": base,
@@ -164,7 +339,7 @@ class CycleDecisionEngine:
             "ok_to_do_heavy": ok_heavy,
             "energy_level": energy,
             "rest_need": rest_need,
-            "symptoms": symptoms,
+            "symptoms": list(record.symptoms),
             "reason": reason,
         }
 
@@ -174,12 +349,188 @@ class CycleDecisionEngine:
         target_date: date,
         desired_intensity: str,
         cycle_length: Optional[int] = None,
+        bleed_days: Optional[int] = None,
     ) -> Dict[str, Any]:
         """
         Convenience method: you pass dates instead of cycle_day.
+        A cycle_length/bleed_days different from the template's uses the
+        rescaled template (see for_cycle).
         """
-        effective_len = cycle_length if cycle_length is not None else self.cycle_length
+        engine = self.for_cycle(cycle_length or self.cycle_length, bleed_days)
         cycle_day = self.compute_cycle_day_from_dates(
-            last_period_start, target_date, effective_len
+            last_period_start, target_date, engine.cycle_length
+        )
+        return engine.decide_workout_intensity(cycle_day, desired_intensity)
+
+    def decide_many(
+        self,
+        last_period_start: date,
+        dates: Sequence[date],
+        intensities: Union[str, Sequence[str]],
+        cycle_length: Optional[int] = None,
+        bleed_days: Optional[int] = None,
+    ) -> List[Dict[str, Any]]:
+        """
+        Batch decide_workout_from_date for a whole training block: one
+        decision per date. intensities is either one desired intensity for
+        every date or a sequence parallel to dates.
+        """
+        if isinstance(intensities, str):
+            intensities = [intensities] * len(dates)
+        elif len(intensities) != len(dates):
+            raise ValueError("dates and intensities must have the same length")
+
+        engine = self.for_cycle(cycle_length or self.cycle_length, bleed_days)
+        effective_len = engine.cycle_length
+        start = last_period_start.toordinal()
+        table = engine.decision_table
+        decisions: List[Dict[str, Any]] = []
+        for target_date, intensity in zip(dates, intensities):
+            cycle_day = (target_date.toordinal() - start) % effective_len + 1
+            column = table.get(intensity)
+            decision = column[cycle_day] if column is not None else None
+            if decision is None:
+                # unknown intensity or missing template row
+                decisions.append(engine.decide_workout_intensity(cycle_day, intensity))
+            else:
+                decisions.append(_copy_decision(decision))
+        return decisions
+
+
+def _copy_decision(decision: Dict[str, Any]) -> Dict[str, Any]:
+    # table entries are shared; hand out copies callers may modify
+    copy = dict(decision)
+    copy["symptoms"] = list(decision["symptoms"])
+    return copy
+
+
+def _phase_segments(
+    records: Sequence[Optional[CycleDayRecord]],
+) -> List[Tuple[str, int, int]]:
+    """
+    Runs of consecutive days with the same phase: (phase, first_day, length).
+    A missing day ends the run it interrupts.
+    """
+    segments: List[Tuple[str, int, int]] = []
+    previous_day = 0
+    for record in records[1:]:
+        if record is None:
+            continue
+        contiguous = record.cycle_day == previous_day + 1
+        previous_day = record.cycle_day
+        if segments and contiguous and segments[-1][0] == record.phase:
+            phase, first_day, length = segments[-1]
+            segments[-1] = (phase, first_day, length + 1)
+        else:
+            segments.append((record.phase, record.cycle_day, 1))
+    return segments
+
+
+def _scale_lengths(lengths: List[int], total: int) -> List[int]:
+    """
+    Scale lengths proportionally so they add up to total, keeping every
+    length >= 1 (largest remainder rounding).
+    """
+    if total < len(lengths):
+        raise ValueError(
+            f"Cycle length {total} is too short for the template phases"
         )
-        return self.decide_workout_intensity(cycle_day, desired_intensity)
\ No newline at end of file
+    spare = total - len(lengths)
+    weight = sum(lengths) - len(lengths)
+    shares = [
+        (length - 1) * spare / weight if weight else spare / len(lengths)
+        for length in lengths
+    ]
+    scaled = [1 + math.floor(share) for share in shares]
+    by_remainder = sorted(
+        range(len(lengths)),
+        key=lambda i: shares[i] - math.floor(shares[i]),
+        reverse=True,
+    )
+    for i in by_remainder[: total - sum(scaled)]:
+        scaled[i] += 1
+    return scaled
+
+
+def _target_lengths(
+    template_lengths: List[int], cycle_length: int, bleed_days: int
+) -> List[int]:
+    """
+    Phase lengths of the rescaled cycle, taken from phase_engine's phases
+    for (cycle_length, bleed_days) so /workout-plan and /cycle-summary
+    agree on which day is which phase. Templates whose phase count does
+    not match phase_engine's (or cycles too short to have every phase)
+    are scaled proportionally instead.
+    """
+    codes = get_phases(np.arange(1, cycle_length + 1), cycle_length, bleed_days)
+    # run lengths of consecutive equal phase codes
+    boundaries = np.flatnonzero(np.diff(codes)) + 1
+    runs = np.diff(np.concatenate(([0], boundaries, [cycle_length]))).tolist()
+    if len(runs) == len(template_lengths):
+        return runs
+    return _scale_lengths(template_lengths, cycle_length)
+
+
+def _numeric_columns(rows: Sequence[Dict[str, Any]]) -> Dict[str, bool]:
+    """
+    Columns whose every value is a number -> True if they are all ints.
+    """
+    columns: Dict[str, bool] = {}
+    for column in rows[0]:
+        if column in ("Cycle_Day", "Template_Day"):
+            continue
+        is_int = True
+        try:
+            for row in rows:
+                value = row.get(column)
+                float(value)
+                is_int = is_int and value.strip().lstrip("-").isdigit()
+        except (TypeError, ValueError):
+            continue
+        columns[column] = is_int
+    return columns
+
+
+def rescale_template_rows(
+    records: Sequence[Optional[CycleDayRecord]],
+    rows_by_day: Dict[int, Dict[str, Any]],
+    cycle_length: int,
+    bleed_days: int,
+) -> List[Dict[str, Any]]:
+    """
+    Stretch or shrink a gap-free template to cycle_length days, phase by
+    phase (see _target_lengths). Within a phase, numeric columns (hormones,
+    scores) are linearly interpolated between the neighbouring template
+    days; text columns (phase, symptoms) come from the nearest day.
+    Every row gets a Template_Day column naming that nearest day.
+    """
+    if any(record is None for record in records[1:]):
+        raise ValueError("Template has missing cycle days, cannot rescale it")
+    segments = _phase_segments(records)
+    lengths = _target_lengths(
+        [length for _, _, length in segments], cycle_length, bleed_days
+    )
+    template_rows = [rows_by_day[day] for day in range(1, len(records))]
+    numeric = _numeric_columns(template_rows)
+
+    rows: List[Dict[str, Any]] = []
+    for (_, first_day, length), target_length in zip(segments, lengths):
+        last_day = first_day + length - 1
+        for i in range(target_length):
+            # centre of the i-th target day, in template days
+            position = first_day + (i + 0.5) * length / target_length - 0.5
+            position = min(max(position, first_day), last_day)
+            low = math.floor(position)
+            high = min(low + 1, last_day)
+            weight = position - low
+            nearest = int(round(position))
+
+            row = dict(rows_by_day[nearest])
+            for column, is_int in numeric.items():
+                value = (1 - weight) * float(rows_by_day[low][column])
+                value += weight * float(rows_by_day[high][column])
+                row[column] = str(int(round(value))) if is_int else str(round(value, 3))
+            row["Cycle_Day"] = str(len(rows) + 1)
+            row["Template_Day"] = str(nearest)
+            rows.append(row)
+    return rows
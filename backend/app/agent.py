@@ -1,16 +1,29 @@
 import json
-from datetime import datetime, timedelta, timezone
-from typing import List, Dict, Any
+from datetime import date, datetime, time, timedelta, timezone, tzinfo
+from typing import List, Dict, Any, Optional, Tuple
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
 
 from googleapiclient.discovery import build
 from openai import OpenAI
 
-from .storage import load_google_credentials, PROFILES
-from .phase_engine import get_cycle_day, get_phase
-from .planning_rules import category_target_phases
+from .storage import load_google_credentials, get_quiz_history, PROFILES
+from .quiz_history import rolling_averages
+from .phase_engine import ProfileError, get_profile_context
+from .planning_rules import rules
+from .calendar_service import IntervalIndex
+from .event_classifier import classifier
+from .llm_cache import cache_key, llm_cache
 
 client = OpenAI()  # uses OPENAI_API_KEY from env
 
+# how many weeks of check-ins the trend summary for the model covers
+QUIZ_TREND_WEEKS = 8
+# the fallback agent moves an event to a free slot up to this many days later
+MOVE_SEARCH_DAYS = 7
+
+PLANNER_MODEL = "gpt-4o-mini"
+PLANNER_TEMPERATURE = 0.2
+
 
 def fetch_next_week_events(user_id: str) -> List[Dict[str, Any]]:
     """Fetch events for the next 7 days from the user's primary Google Calendar."""
@@ -37,14 +50,19 @@ def fetch_next_week_events(user_id: str) -> List[Dict[str, Any]]:
     )
 
     items = events_result.get("items", [])
+    # all-day events only have a date; they are in the calendar's timezone
+    calendar_tz = events_result.get("timeZone")
     simplified = []
     for ev in items:
+        start = ev.get("start")
+        if calendar_tz and start and "dateTime" not in start:
+            start = {"timeZone": calendar_tz, **start}
         simplified.append(
             {
                 "id": ev.get("id"),
                 "summary": ev.get("summary") or "",
                 "description": ev.get("description") or "",
-                "start": ev.get("start"),
+                "start": start,
                 "end": ev.get("end"),
                 "location": ev.get("location") or "",
             }
@@ -83,25 +101,44 @@ def _extract_json_from_content(content: str) -> dict:
     return json.loads(text)
 
 
+def _zone(name: Optional[str]) -> tzinfo:
+    # IANA name from Google Calendar; UTC if missing or unknown
+    try:
+        return ZoneInfo(name) if name else timezone.utc
+    except (ZoneInfoNotFoundError, ValueError):
+        return timezone.utc
+
+
+def _event_times(ev: Dict[str, Any]) -> Tuple[datetime, Optional[datetime]]:
+    """
+    (start, end) of a simplified event; end is None for all-day events,
+    which get an assumed 09:00 start in their calendar's timezone (so they
+    compare correctly with the aware times of timed events) and do not
+    block any time.
+    """
+    start_info = ev["start"]
+    if "dateTime" not in start_info:
+        # all-day event: assume 09:00
+        day = date.fromisoformat(start_info["date"])
+        return datetime.combine(day, time(9), _zone(start_info.get("timeZone"))), None
+
+    start = datetime.fromisoformat(start_info["dateTime"].replace("Z", "+00:00"))
+    end_info = ev.get("end") or {}
+    if "dateTime" not in end_info:
+        return start, start + timedelta(hours=1)
+    return start, datetime.fromisoformat(end_info["dateTime"].replace("Z", "+00:00"))
+
+
 def _rule_based_suggestions(user_id: str) -> List[Dict[str, Any]]:
     """
     Fallback agent that does not depend on OpenAI.
     Uses your phase engine + category rules and always returns something
     if there are events.
     """
-    profile = PROFILES.get(user_id)
-    if not profile:
-        raise RuntimeError("Profile not found")
-
-    lps_raw = profile.get("last_period_start")
-    if not lps_raw:
-        raise RuntimeError("Profile incomplete")
-
-    from datetime import date
-
-    last_period_start = date.fromisoformat(lps_raw)
-    cycle_length = profile.get("cycle_length", 28)
-    bleed_days = profile.get("menstruation_phase_duration", 5)
+    try:
+        context = get_profile_context(user_id)
+    except ProfileError as e:
+        raise RuntimeError(str(e))
 
     events = fetch_next_week_events(user_id)
 
@@ -116,32 +153,18 @@ def _rule_based_suggestions(user_id: str) -> List[Dict[str, Any]]:
             }
         ]
 
-    suggestions: List[Dict[str, Any]] = []
-
-    for ev in events:
-        title = (ev["summary"] or "").lower()
+    times = [_event_times(ev) for ev in events]
+    busy = IntervalIndex((start, end) for start, end in times if end is not None)
+    classes = classifier.classify_many([ev["summary"] for ev in events])
 
-        if any(k in title for k in ["exam", "study", "lecture", "project"]):
-            category = "work"
-        elif any(k in title for k in ["party", "drinks", "friend", "dinner"]):
-            category = "social"
-        else:
-            category = "work"
+    suggestions: List[Dict[str, Any]] = []
 
+    for ev, (start_dt, end_dt), (category, _) in zip(events, times, classes):
         start_info = ev["start"]
-        if "dateTime" in start_info:
-            start_dt = datetime.fromisoformat(
-                start_info["dateTime"].replace("Z", "+00:00")
-            )
-        else:
-            # all-day event: assume 09:00
-            start_dt = datetime.fromisoformat(start_info["date"] + "T09:00:00")
 
-        cycle_day = get_cycle_day(start_dt.date(), last_period_start, cycle_length)
-        phase = get_phase(cycle_day, cycle_length, bleed_days)
+        phase = context.phase_for(start_dt.date())
 
-        target_phases = category_target_phases(category)
-        is_ideal = phase in target_phases
+        is_ideal = rules.fits(category, phase)
 
         if is_ideal:
             title = ev.get("summary") or "(no title)"
@@ -156,28 +179,70 @@ def _rule_based_suggestions(user_id: str) -> List[Dict[str, Any]]:
                 }
             )
         else:
-            # naive move +2 days
             title = ev.get("summary") or "(no title)"
-            new_dt = start_dt + timedelta(days=2)
+            duration = end_dt - start_dt if end_dt is not None else timedelta(hours=1)
+
+            # first later day in a fitting phase with a free slot of the
+            # event's length near its current time of day
+            new_dt = None
+            for days in range(1, MOVE_SEARCH_DAYS + 1):
+                wanted = start_dt + timedelta(days=days)
+                new_phase = context.phase_for(wanted.date())
+                if not rules.fits(category, new_phase):
+                    continue
+                new_dt = busy.free_slot_on_day(wanted, duration)
+                if new_dt is not None:
+                    reason = (
+                        f"Move “{title}” out of {phase} phase; "
+                        f"{wanted.strftime('%A')} is in your {new_phase} phase "
+                        "and that slot is free."
+                    )
+                    break
+
+            if new_dt is None:
+                # nothing free in a better phase: a couple of days later
+                new_dt = start_dt + timedelta(days=2)
+                reason = (
+                    f"Move “{title}” out of {phase} phase; "
+                    f"a couple of days later fits your cycle better."
+                )
+            if end_dt is not None:
+                busy.add(new_dt, new_dt + duration)
+
             suggestions.append(
                 {
                     "event_id": ev["id"],
                     "event_title": title,
                     "action": "move",
                     "new_start": new_dt.isoformat(),
-                    "new_end": (new_dt + (ev.get("end") and timedelta(hours=1) or timedelta())).isoformat()
+                    "new_end": (new_dt + duration).isoformat()
                     if "dateTime" in start_info
                     else None,
-                    "reason": (
-                        f"Move “{title}” out of {phase} phase; "
-                        f"a couple of days later fits your cycle better."
-                    ),
+                    "reason": reason,
                 }
             )
 
     return suggestions
 
 
+def _weekly_quiz_trends(user_id: str) -> Optional[Dict[str, Any]]:
+    """
+    Compact summary of the user's check-in history for the model:
+    rolling averages over the last QUIZ_TREND_WEEKS weeks, overall and
+    per cycle phase, instead of the raw check-ins.
+    """
+    history = get_quiz_history(user_id)
+    if history is None or not len(history):
+        return None
+
+    try:
+        phase_for = get_profile_context(user_id).phase_for
+    except ProfileError:
+        phase_for = None
+
+    return rolling_averages(history, QUIZ_TREND_WEEKS, phase_for=phase_for)
+
+
 def run_planner_agent(user_id: str) -> List[Dict[str, Any]]:
     """
     Use OpenAI to plan the week. If the response is malformed or empty,
@@ -189,9 +254,11 @@ def run_planner_agent(user_id: str) -> List[Dict[str, Any]]:
     if not events:
         return _rule_based_suggestions(user_id)
     
-    profile = PROFILES.get(user_id, {})
-    weekly_quiz = profile.get("weekly_quiz")
+    profile = PROFILES.get(user_id)
+    weekly_quiz = profile.weekly_quiz if profile else None
+    weekly_quiz_trends = _weekly_quiz_trends(user_id)
 
+    raw = ""
     try:
         system_prompt = (
             "You are she.Calendar, an AI agent that improves a user's weekly "
@@ -200,7 +267,9 @@ def run_planner_agent(user_id: str) -> List[Dict[str, Any]]:
     "- 'events': the next 7 days of events from Google Calendar "
     "  (each has id, summary, start, end, etc.)\n"
     "- optionally 'weekly_quiz': {stress, concentration, energy, workout, social, symptoms}\n"
-    "Use weekly_quiz to adjust how aggressively you move events.\n"
+    "- optionally 'weekly_quiz_trends': average check-in answers over the last "
+    "  weeks, 'overall' and 'by_phase' (menstrual/follicular/ovulation/luteal)\n"
+    "Use weekly_quiz and weekly_quiz_trends to adjust how aggressively you move events.\n"
     "For each suggestion, include:\n"
     "- event_id (string) – the Google Calendar event id\n"
     "- event_title (string) – a short human-readable title from the event\n"
@@ -216,6 +285,19 @@ def run_planner_agent(user_id: str) -> List[Dict[str, Any]]:
         payload_for_model = {"events": events}
         if weekly_quiz:
             payload_for_model["weekly_quiz"] = weekly_quiz
+        if weekly_quiz_trends:
+            payload_for_model["weekly_quiz_trends"] = weekly_quiz_trends
+
+        # same events, check-ins and prompt -> same plan, without a model call
+        key = cache_key(
+            PLANNER_MODEL,
+            system_prompt,
+            payload_for_model,
+            temperature=PLANNER_TEMPERATURE,
+        )
+        cached = llm_cache.get(key)
+        if cached is not None:
+            return json.loads(cached)
 
         messages = [
             {"role": "system", "content": system_prompt},
@@ -226,8 +308,8 @@ def run_planner_agent(user_id: str) -> List[Dict[str, Any]]:
         ]
 
         completion = client.chat.completions.create(
-            model="gpt-4o-mini",
-            temperature=0.2,
+            model=PLANNER_MODEL,
+            temperature=PLANNER_TEMPERATURE,
             messages=messages,
         )
         raw = completion.choices[0].message.content or ""
@@ -240,6 +322,8 @@ def run_planner_agent(user_id: str) -> List[Dict[str, Any]]:
             print("Agent returned empty or invalid 'suggestions', falling back.")
             return _rule_based_suggestions(user_id)
 
+        # only usable plans are cached; failures are retried next time
+        llm_cache.put(key, json.dumps(suggestions, default=str))
         return suggestions
 
     except Exception as e:
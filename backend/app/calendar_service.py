@@ -0,0 +1,148 @@
+from bisect import bisect_left, bisect_right
+from datetime import datetime, time, timedelta, timezone
+from typing import Iterable, List, Optional, Tuple
+
+# suggested slots are looked for between these times of day (widened to
+# the event's own time if it lies outside)
+DAY_HOURS = (time(7), time(22))
+
+
+def _naive(dt: datetime) -> datetime:
+    # aware times are compared in UTC; naive ones are taken as they are
+    if dt.tzinfo is None:
+        return dt
+    return dt.astimezone(timezone.utc).replace(tzinfo=None)
+
+
+def _like(naive: datetime, reference: datetime) -> datetime:
+    # back into the timezone of the query
+    if reference.tzinfo is None:
+        return naive
+    return naive.replace(tzinfo=timezone.utc).astimezone(reference.tzinfo)
+
+
+class IntervalIndex:
+    """
+    Busy time of a calendar as disjoint, sorted [start, end) runs kept in
+    two parallel lists (overlapping or touching events are merged on
+    insert). Conflict checks are a bisect; a free-slot search bisects to
+    the query time and walks outwards gap by gap.
+    """
+
+    def __init__(self, intervals: Iterable[Tuple[datetime, datetime]] = ()):
+        merged: List[List[datetime]] = []
+        for start, end in sorted(
+            (_naive(start), _naive(end)) for start, end in intervals
+        ):
+            if end <= start:
+                continue
+            if merged and start <= merged[-1][1]:
+                merged[-1][1] = max(merged[-1][1], end)
+            else:
+                merged.append([start, end])
+        self._starts = [start for start, _ in merged]
+        self._ends = [end for _, end in merged]
+
+    def __len__(self) -> int:
+        return len(self._starts)
+
+    def add(self, start: datetime, end: datetime) -> None:
+        """
+        Mark [start, end) busy, merging it with the runs it touches.
+        """
+        start, end = _naive(start), _naive(end)
+        if end <= start:
+            return
+        # runs that overlap or touch [start, end]
+        lo = bisect_left(self._ends, start)
+        hi = bisect_right(self._starts, end)
+        if lo < hi:
+            start = min(start, self._starts[lo])
+            end = max(end, self._ends[hi - 1])
+        self._starts[lo:hi] = [start]
+        self._ends[lo:hi] = [end]
+
+    def overlaps(self, start: datetime, end: datetime) -> bool:
+        start, end = _naive(start), _naive(end)
+        # first run that ends after start
+        i = bisect_right(self._ends, start)
+        return i < len(self._starts) and self._starts[i] < end
+
+    def find_free_slot(
+        self,
+        start: datetime,
+        duration: timedelta,
+        earliest: Optional[datetime] = None,
+        latest: Optional[datetime] = None,
+    ) -> Optional[datetime]:
+        """
+        Start of the free [s, s + duration) closest to start, with
+        earliest <= s and s + duration <= latest; None if there is none.
+        The result is in start's timezone.
+        """
+        wanted = _naive(start)
+        lower = _naive(earliest) if earliest is not None else None
+        upper = _naive(latest) - duration if latest is not None else None
+        if lower is not None and upper is not None and lower > upper:
+            return None
+        if lower is not None and wanted < lower:
+            wanted = lower
+        if upper is not None and wanted > upper:
+            wanted = upper
+
+        starts, ends = self._starts, self._ends
+        # index of the first run that ends after wanted
+        i = bisect_right(ends, wanted)
+        if i >= len(starts) or starts[i] >= wanted + duration:
+            return _like(wanted, start)
+
+        # later: the gap after run j starts at ends[j]
+        forward = None
+        j = i
+        while j < len(starts):
+            candidate = ends[j]
+            if upper is not None and candidate > upper:
+                break
+            if j + 1 >= len(starts) or candidate + duration <= starts[j + 1]:
+                forward = candidate
+                break
+            j += 1
+
+        # earlier: the gap before run j ends at starts[j]
+        backward = None
+        j = i
+        while j >= 0:
+            candidate = starts[j] - duration
+            if candidate > wanted:
+                j -= 1
+                continue
+            if lower is not None and candidate < lower:
+                break
+            if j == 0 or ends[j - 1] <= candidate:
+                backward = candidate
+                break
+            j -= 1
+
+        if forward is None and backward is None:
+            return None
+        if backward is None or (
+            forward is not None and forward - wanted <= wanted - backward
+        ):
+            return _like(forward, start)
+        return _like(backward, start)
+
+    def free_slot_on_day(
+        self, wanted: datetime, duration: timedelta
+    ) -> Optional[datetime]:
+        """
+        Free slot closest to wanted on wanted's day, within DAY_HOURS of
+        wanted's own UTC offset (pass an aware wanted for aware busy time).
+        """
+        day_start = datetime.combine(wanted.date(), DAY_HOURS[0], wanted.tzinfo)
+        day_end = datetime.combine(wanted.date(), DAY_HOURS[1], wanted.tzinfo)
+        return self.find_free_slot(
+            wanted,
+            duration,
+            earliest=min(day_start, wanted),
+            latest=max(day_end, wanted + duration),
+        )
@@ -0,0 +1,88 @@
+import os
+
+# Where db.json and the other storage files live.
+DATA_DIR = os.getenv("SHE_DATA_DIR", os.path.dirname(__file__))
+
+# "json"    -> rewrite db.json on every change (default, hackathon mode)
+# "journal" -> append one record per change to db.journal and let a
+#              background thread compact it into db.json
+# "sqlite"  -> keep everything in an SQLite database (db.json is migrated
+#              into it on first start)
+# "sharded" -> users in users.json (plus users.journal), profiles and tokens spread over
+#              SHARD_COUNT files that are loaded on first access
+STORAGE_MODE = os.getenv("SHE_STORAGE_MODE", "json")
+
+# "json" writes snapshots as db.json, "binary" as db.snapshot (much faster
+# to load). Loading picks whichever of the two files is newer.
+SNAPSHOT_FORMAT = os.getenv("SHE_SNAPSHOT_FORMAT", "json")
+
+# seconds between background journal compactions
+JOURNAL_COMPACT_INTERVAL = float(os.getenv("SHE_JOURNAL_COMPACT_INTERVAL", "30"))
+
+# database file used by the sqlite storage mode
+SQLITE_PATH = os.getenv("SHE_SQLITE_PATH", os.path.join(DATA_DIR, "db.sqlite3"))
+
+# sharded storage mode; changing SHARD_COUNT for existing data requires a
+# re-split, users hash to a different shard file
+SHARD_DIR = os.getenv("SHE_SHARD_DIR", os.path.join(DATA_DIR, "shards"))
+SHARD_COUNT = int(os.getenv("SHE_SHARD_COUNT", "64"))
+
+# Write-behind: mutations only update the in-memory mirrors and a flusher
+# thread persists them every FLUSH_INTERVAL seconds, or earlier once
+# FLUSH_DIRTY_THRESHOLD records are waiting. Works with every storage mode.
+WRITE_BEHIND = os.getenv("SHE_WRITE_BEHIND", "0") == "1"
+FLUSH_INTERVAL = float(os.getenv("SHE_FLUSH_INTERVAL", "2"))
+FLUSH_DIRTY_THRESHOLD = int(os.getenv("SHE_FLUSH_DIRTY_THRESHOLD", "100"))
+
+# /api/admin/* endpoints require this in the X-Admin-Token header; while it
+# is empty they answer 403 to everyone.
+ADMIN_TOKEN = os.getenv("SHE_ADMIN_TOKEN", "")
+
+# users whose last rendered /cycle-summary is kept for ETag revalidation
+# (see cycle_summary_cache.py); the least recently used are dropped first
+CYCLE_SUMMARY_CACHE_SIZE = int(os.getenv("SHE_CYCLE_SUMMARY_CACHE_SIZE", "10000"))
+
+# Keep a heap of upcoming phase transitions and notify handlers when one
+# is due (see scheduler.py). Off by default: nothing registers a handler
+# yet, and loading the heap reads every profile at startup (every shard
+# file in sharded mode).
+PHASE_SCHEDULER = os.getenv("SHE_PHASE_SCHEDULER", "0") == "1"
+
+# cycle template CSV behind /api/user/{id}/workout-plan; the file is
+# re-read when its mtime changes (checked every RELOAD_INTERVAL seconds,
+# 0 disables the watcher)
+WORKOUT_TEMPLATE_PATH = os.getenv(
+    "SHE_WORKOUT_TEMPLATE", os.path.join(DATA_DIR, "cycle_template.csv")
+)
+WORKOUT_TEMPLATE_RELOAD_INTERVAL = float(
+    os.getenv("SHE_WORKOUT_TEMPLATE_RELOAD_INTERVAL", "5")
+)
+
+# default and maximum seconds /api/plan/optimize spends improving a plan
+PLAN_OPTIMIZE_TIME_BUDGET = float(os.getenv("SHE_PLAN_OPTIMIZE_TIME_BUDGET", "0.5"))
+PLAN_OPTIMIZE_MAX_TIME_BUDGET = float(
+    os.getenv("SHE_PLAN_OPTIMIZE_MAX_TIME_BUDGET", "5")
+)
+
+# JSON file with the category -> target phase rules (see planning_rules.py);
+# the built-in rules are used if it does not exist. Reload with
+# POST /api/admin/planning-rules/reload.
+PLANNING_RULES_PATH = os.getenv(
+    "SHE_PLANNING_RULES", os.path.join(DATA_DIR, "planning_rules.json")
+)
+
+# JSON file with the event-title keywords of the rule-based agent (see
+# event_classifier.py); built-in keywords are used if it does not exist.
+# Reload with POST /api/admin/event-keywords/reload.
+EVENT_KEYWORDS_PATH = os.getenv(
+    "SHE_EVENT_KEYWORDS", os.path.join(DATA_DIR, "event_keywords.json")
+)
+
+# Planner responses are cached by a hash of the model request (see
+# llm_cache.py): LLM_CACHE_TTL seconds (0 disables the cache), at most
+# LLM_CACHE_SIZE in memory, and also on disk in LLM_CACHE_DIR if set
+# (at most LLM_CACHE_DISK_SIZE files).
+LLM_CACHE_TTL = float(os.getenv("SHE_LLM_CACHE_TTL", "3600"))
+LLM_CACHE_SIZE = int(os.getenv("SHE_LLM_CACHE_SIZE", "1024"))
+LLM_CACHE_DIR = os.getenv("SHE_LLM_CACHE_DIR", "")
+LLM_CACHE_DISK_SIZE = int(os.getenv("SHE_LLM_CACHE_DISK_SIZE", "10000"))
@@ -0,0 +1,71 @@
+import hashlib
+import threading
+from collections import OrderedDict
+from datetime import date
+from typing import NamedTuple, Optional, Tuple
+
+from . import config
+from .storage import on_profile_saved
+
+
+class CachedSummary(NamedTuple):
+    key: Tuple[date, int]  # (today, profile version)
+    etag: str
+    body: bytes
+
+
+# user_id -> last rendered /cycle-summary body. An entry is only served
+# while its key matches, so it expires at local midnight (today changes)
+# and as soon as the profile is saved again (version changes). At most
+# config.CYCLE_SUMMARY_CACHE_SIZE users, least recently used first.
+_entries: "OrderedDict[str, CachedSummary]" = OrderedDict()
+_lock = threading.Lock()
+
+
+def get(user_id: str, today: date, version: int) -> Optional[CachedSummary]:
+    with _lock:
+        entry = _entries.get(user_id)
+        if entry is None or entry.key != (today, version):
+            return None
+        _entries.move_to_end(user_id)
+    return entry
+
+
+def put(user_id: str, today: date, version: int, body: bytes) -> CachedSummary:
+    # strong ETag: a hash of the exact bytes we send
+    etag = '"' + hashlib.sha256(body).hexdigest()[:32] + '"'
+    entry = CachedSummary(key=(today, version), etag=etag, body=body)
+    with _lock:
+        _entries[user_id] = entry
+        _entries.move_to_end(user_id)
+        while len(_entries) > config.CYCLE_SUMMARY_CACHE_SIZE:
+            _entries.popitem(last=False)
+    return entry
+
+
+def invalidate(user_id: str) -> None:
+    with _lock:
+        _entries.pop(user_id, None)
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """
+    True if an If-None-Match header value covers etag: "*", or any listed
+    tag under weak comparison (a W/ prefix on either side is ignored).
+    """
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    opaque = _opaque_tag(etag)
+    return any(
+        _opaque_tag(tag) == opaque for tag in if_none_match.split(",")
+    )
+
+
+def _opaque_tag(tag: str) -> str:
+    tag = tag.strip()
+    return tag[2:] if tag.startswith("W/") else tag
+
+
+on_profile_saved(invalidate)
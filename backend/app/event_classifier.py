@@ -0,0 +1,176 @@
+import json
+import logging
+import os
+import re
+from typing import Dict, List, Mapping, NamedTuple, Optional, Sequence, Tuple
+
+from . import config
+
+logger = logging.getLogger(__name__)
+
+# Built-in keywords, used when no keywords file exists: category -> words
+# that mark an event title as that category (matched as lowercase
+# substrings, so "friend" also matches "friends"). Ties go to the category
+# listed first.
+DEFAULT_KEYWORDS: Dict[str, List[str]] = {
+    "work": ["exam", "study", "lecture", "project"],
+    "social": ["party", "drinks", "friend", "dinner"],
+}
+# category of titles without any keyword
+DEFAULT_CATEGORY = "work"
+
+
+class Classification(NamedTuple):
+    category: str
+    # share of the keyword hits that went to category; 0.0 if none matched
+    confidence: float
+
+
+class _Compiled(NamedTuple):
+    pattern: Optional["re.Pattern[str]"]
+    # lowercase keyword -> category rank (position in the keywords dict)
+    rank_of: Dict[str, int]
+    categories: Tuple[str, ...]
+    default_category: str
+
+
+def _trie_pattern(keywords: Sequence[str]) -> str:
+    """
+    Regex matching any of keywords, factored into a prefix trie
+    ("dinner|drinks" -> "d(?:inner|rinks)") so the engine follows one
+    branch per character instead of trying every keyword at every
+    position. Optional tails are greedy, so the longest keyword wins.
+    """
+    trie: Dict[str, dict] = {}
+    for keyword in keywords:
+        node = trie
+        for char in keyword:
+            node = node.setdefault(char, {})
+        node[""] = {}
+
+    def render(node: Dict[str, dict]) -> str:
+        terminal = "" in node
+        branches = [
+            re.escape(char) + render(child)
+            for char, child in sorted(node.items())
+            if char
+        ]
+        if not branches:
+            return ""
+        if len(branches) == 1 and not terminal:
+            return branches[0]
+        group = "(?:" + "|".join(branches) + ")"
+        return group + "?" if terminal else group
+
+    return render(trie)
+
+
+def compile_keywords(
+    keywords: Mapping[str, Sequence[str]], default_category: str = DEFAULT_CATEGORY
+) -> _Compiled:
+    """
+    All keywords of all categories as one pattern (see _trie_pattern). A
+    keyword listed under several categories counts for the first one.
+    """
+    rank_of: Dict[str, int] = {}
+    categories = tuple(keywords)
+    for rank, category in enumerate(categories):
+        for keyword in keywords[category]:
+            keyword = keyword.lower()
+            if keyword:
+                rank_of.setdefault(keyword, rank)
+
+    pattern = re.compile(_trie_pattern(list(rank_of))) if rank_of else None
+    return _Compiled(pattern, rank_of, categories, default_category)
+
+
+class EventClassifier:
+    """
+    Event title -> category, from keyword lists compiled into one regex so
+    a title is scanned once whatever the number of keywords. Keywords come
+    from a JSON file ({"default": category, "keywords": {category: [...]}})
+    or DEFAULT_KEYWORDS if there is no such file; reload() swaps in a newly
+    compiled pattern with a single assignment.
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path
+        self._compiled = compile_keywords(DEFAULT_KEYWORDS)
+        self.reload()
+
+    def _read(self) -> _Compiled:
+        if not self.path or not os.path.exists(self.path):
+            return compile_keywords(DEFAULT_KEYWORDS)
+        with open(self.path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        return compile_keywords(
+            data["keywords"], data.get("default", DEFAULT_CATEGORY)
+        )
+
+    def reload(self) -> None:
+        """
+        Re-read and compile the keywords. On failure the old ones stay.
+        """
+        try:
+            self._compiled = self._read()
+        except Exception:
+            logger.exception("Loading event keywords from %s failed", self.path)
+
+    @staticmethod
+    def _result(compiled: _Compiled, found: List[str]) -> Classification:
+        if not found:
+            return Classification(compiled.default_category, 0.0)
+        rank_of = compiled.rank_of
+        if len(found) == 1:
+            return Classification(compiled.categories[rank_of[found[0]]], 1.0)
+        hits = [0] * len(compiled.categories)
+        for keyword in found:
+            hits[rank_of[keyword]] += 1
+        # most hits; ties go to the lower rank
+        best = hits.index(max(hits))
+        return Classification(compiled.categories[best], hits[best] / len(found))
+
+    def classify(self, title: Optional[str]) -> Classification:
+        compiled = self._compiled
+        if compiled.pattern is None or not title:
+            return Classification(compiled.default_category, 0.0)
+        return self._result(compiled, compiled.pattern.findall(title.lower()))
+
+    def classify_many(self, titles: Sequence[Optional[str]]) -> List[Classification]:
+        """
+        Batched classify against one snapshot of the keywords; recurring
+        titles (the same weekly meeting, ...) are scanned once.
+        """
+        compiled = self._compiled
+        pattern = compiled.pattern
+        default = Classification(compiled.default_category, 0.0)
+        seen: Dict[str, Classification] = {}
+        results: List[Classification] = []
+        for title in titles:
+            if pattern is None or not title:
+                results.append(default)
+                continue
+            result = seen.get(title)
+            if result is None:
+                result = self._result(compiled, pattern.findall(title.lower()))
+                seen[title] = result
+            results.append(result)
+        return results
+
+    def keywords(self) -> Dict[str, List[str]]:
+        """
+        Category -> keywords now in effect, for inspection.
+        """
+        compiled = self._compiled
+        result: Dict[str, List[str]] = {c: [] for c in compiled.categories}
+        for keyword, rank in compiled.rank_of.items():
+            result[compiled.categories[rank]].append(keyword)
+        return result
+
+
+# process-wide classifier; reload with reload_classifier()
+classifier = EventClassifier(config.EVENT_KEYWORDS_PATH)
+
+
+def reload_classifier() -> None:
+    classifier.reload()
@@ -0,0 +1,242 @@
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+from . import config
+
+logger = logging.getLogger(__name__)
+
+
+def cache_key(model: str, system_prompt: str, payload: Any, **params: Any) -> str:
+    """
+    sha256 of the request as the model sees it: model name, sampling
+    parameters, system prompt and the user payload, serialized with sorted
+    keys so equal payloads hash equal whatever their dict order.
+    """
+    request = {
+        "model": model,
+        "params": params,
+        "system": system_prompt,
+        "payload": payload,
+    }
+    text = json.dumps(
+        request, sort_keys=True, separators=(",", ":"), ensure_ascii=False, default=str
+    )
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+class LLMCache:
+    """
+    Completed model responses by cache_key(). Entries live for `ttl`
+    seconds in an in-memory LRU of at most `max_entries`; with a
+    `directory` they are also written there (one JSON file per key) so
+    they survive restarts and are shared between workers. The directory
+    is pruned at startup, once the files written since the last prune may
+    exceed `max_disk_entries`, and at least once per `ttl`: expired files
+    go, then the oldest ones down to 90% of the limit, so a full directory
+    is not listed again on the next write.
+    """
+
+    def __init__(
+        self,
+        max_entries: int,
+        ttl: float,
+        directory: str = "",
+        max_disk_entries: int = 10_000,
+    ):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.directory = directory
+        self.max_disk_entries = max_disk_entries
+        # key -> (expires_at, value), least recently used first
+        self._entries: "OrderedDict[str, Tuple[float, str]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._disk_hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._disk_evictions = 0
+        # upper bound of the files on disk (writes since the last prune
+        # count even if they replaced a file), and when to prune anyway so
+        # expired files do not pile up below the limit
+        self._disk_count = 0
+        self._next_prune = 0.0
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+            self._prune_disk()
+
+    @property
+    def enabled(self) -> bool:
+        return self.ttl > 0 and self.max_entries > 0
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, key + ".json")
+
+    def _remember(self, key: str, expires_at: float, value: str) -> None:
+        # caller holds the lock
+        self._entries[key] = (expires_at, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self._evictions += 1
+
+    def _read_disk(self, key: str, now: float) -> Optional[Tuple[float, str]]:
+        path = self._path(key)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return None
+        try:
+            expires_at = float(data["expires_at"])
+            value = data["value"]
+        except (KeyError, TypeError, ValueError):
+            # not written by put(): treat it as a miss, put() overwrites it
+            return None
+        if not isinstance(value, str):
+            return None
+        if expires_at <= now:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            return None
+        return expires_at, value
+
+    def get(self, key: str) -> Optional[str]:
+        if not self.enabled:
+            return None
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if entry[0] > now:
+                    self._entries.move_to_end(key)
+                    self._hits += 1
+                    return entry[1]
+                del self._entries[key]
+
+        entry = self._read_disk(key, now) if self.directory else None
+        with self._lock:
+            if entry is None:
+                self._misses += 1
+                return None
+            self._remember(key, *entry)
+            self._hits += 1
+            self._disk_hits += 1
+        return entry[1]
+
+    def put(self, key: str, value: str) -> None:
+        if not self.enabled:
+            return
+        now = time.time()
+        expires_at = now + self.ttl
+        with self._lock:
+            self._remember(key, expires_at, value)
+
+        if self.directory:
+            path = self._path(key)
+            tmp_path = f"{path}.{threading.get_ident()}.tmp"
+            try:
+                with open(tmp_path, "w", encoding="utf-8") as f:
+                    json.dump({"expires_at": expires_at, "value": value}, f)
+                os.replace(tmp_path, path)
+            except OSError:
+                logger.exception("Writing LLM cache entry %s failed", path)
+                return
+            with self._lock:
+                self._disk_count += 1
+                due = (
+                    self._disk_count > self.max_disk_entries
+                    or now >= self._next_prune
+                )
+            if due:
+                self._prune_disk()
+
+    def _disk_files(self) -> List[os.DirEntry]:
+        try:
+            return [
+                entry
+                for entry in os.scandir(self.directory)
+                if entry.is_file() and entry.name.endswith(".json")
+            ]
+        except OSError:
+            return []
+
+    def _prune_disk(self) -> None:
+        """
+        Remove expired files (by mtime, which is their write time), then
+        the oldest files down to 90% of max_disk_entries.
+        """
+        now = time.time()
+        with self._lock:
+            # writes during the prune count on top of the files it leaves
+            self._disk_count = 0
+            self._next_prune = now + self.ttl
+        files = []
+        for entry in self._disk_files():
+            try:
+                mtime = entry.stat().st_mtime
+            except OSError:
+                continue
+            files.append((mtime, entry.path))
+        files.sort()
+        excess = 0
+        if len(files) > self.max_disk_entries:
+            excess = len(files) - (self.max_disk_entries - self.max_disk_entries // 10)
+        removed = 0
+        for i, (mtime, path) in enumerate(files):
+            if i >= excess and mtime + self.ttl > now:
+                break
+            try:
+                os.remove(path)
+                removed += 1
+            except OSError:
+                pass
+        with self._lock:
+            self._disk_count += len(files) - removed
+            self._disk_evictions += removed
+
+    def clear(self) -> None:
+        """
+        Drop every entry, in memory and on disk.
+        """
+        with self._lock:
+            self._entries.clear()
+            self._disk_count = 0
+        for entry in self._disk_files() if self.directory else ():
+            try:
+                os.remove(entry.path)
+            except OSError:
+                pass
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                "enabled": self.enabled,
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl": self.ttl,
+                "directory": self.directory or None,
+                "hits": self._hits,
+                "disk_hits": self._disk_hits,
+                "misses": self._misses,
+                "evictions": self._evictions,
+                "disk_evictions": self._disk_evictions,
+                "hit_rate": self._hits / lookups if lookups else None,
+            }
+
+
+# process-wide cache of planner responses
+llm_cache = LLMCache(
+    config.LLM_CACHE_SIZE,
+    config.LLM_CACHE_TTL,
+    config.LLM_CACHE_DIR,
+    config.LLM_CACHE_DISK_SIZE,
+)
@@ -1,5 +1,7 @@
+import hmac
+from contextlib import asynccontextmanager
 from datetime import date, datetime, timedelta
-from typing import Any, Dict, List  # <-- added List
+from typing import Any, Dict, List, Literal, Optional
 
 
 from .google_auth import build_flow
@@ -8,12 +10,24 @@ from google.oauth2.credentials import Credentials
 from googleapiclient.errors import HttpError
 from urllib.parse import urlencode
 
-from fastapi import FastAPI, HTTPException, Request
-from fastapi.responses import RedirectResponse
+from fastapi import Depends, FastAPI, Header, HTTPException, Request, Response
+from fastapi.responses import RedirectResponse, StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
 
 from .agent import run_planner_agent
-from .planning_rules import category_target_phases
+from .calendar_service import IntervalIndex
+from .config import (
+    ADMIN_TOKEN,
+    PHASE_SCHEDULER,
+    PLAN_OPTIMIZE_MAX_TIME_BUDGET,
+    PLAN_OPTIMIZE_TIME_BUDGET,
+)
+from .scheduler import PlanTask, optimize_slots, scheduler
+from .workout_engine import workout_engine
+from . import cycle_summary_cache
+from .planning_rules import reload_rules, rules
+from .event_classifier import classifier, reload_classifier
+from .llm_cache import llm_cache
 
 
 from .models import (
@@ -25,8 +39,15 @@ from .models import (
     QuizProfileResponse,
     CycleSummaryResponse,
     PhaseTips,
+    PhaseTimelineDay,
+    PhaseTimelineResponse,
+    WorkoutPlanDay,
+    WorkoutPlanResponse,
     PlanEvaluateRequest,
     PlanEvaluateResponse,
+    PlanOptimizeRequest,
+    PlanOptimizeResponse,
+    OptimizedTask,
     TaskPlanSuggestion,
     CalendarStatusResponse,
     AgentPlanWeekResponse,
@@ -47,18 +68,47 @@ from .storage import (
     save_google_tokens,
     load_google_credentials,
     save_weekly_quiz,
+    write_behind_stats,
 )
+from . import storage
 from .phase_engine import (
-    get_cycle_day,
+    PHASES,
+    ProfileContext,
+    PhaseWindowIndex,
+    ProfileError,
     get_phase,
     get_phase_label,
     get_phase_tips,
+    get_profile_context,
+    iter_cohort_summaries,
+    phase_cache_info,
 )
 
-app = FastAPI(title="she.Calendar API")
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    workout_engine.start()
+    if PHASE_SCHEDULER:
+        scheduler.start()
+    yield
+    scheduler.stop()
+    workout_engine.stop()
+    # make sure write-behind changes reach disk before the process exits
+    storage.shutdown()
+
+
+app = FastAPI(title="she.Calendar API", lifespan=lifespan)
 
 REDIRECT_URI = "http://localhost:8000/api/google/oauth2callback"
 
+# longest range /phase-timeline answers in one request
+MAX_TIMELINE_DAYS = 731
+# longest range /workout-plan answers in one request
+MAX_WORKOUT_PLAN_DAYS = 366
+# /plan/evaluate looks for a better day in [day - 3, day + 7]
+SUGGESTION_WINDOW = (-3, 7)
+# longest horizon /plan/optimize plans over
+MAX_OPTIMIZE_HORIZON_DAYS = 184
+
 # --- CORS so frontend (Vite) can talk to backend on localhost ---
 app.add_middleware(
     CORSMiddleware,
@@ -99,14 +149,10 @@ def login(payload: LoginRequest) -> LoginResponse:
     workout_pref = None
 
     if profile:
-        lps = profile.get("last_period_start")
-        if isinstance(lps, str):
-            try:
-                last_period_start = date.fromisoformat(lps)
-            except ValueError:
-                last_period_start = None
-        cycle_length = profile.get("cycle_length")
-        workout_pref = profile.get("workout_intensity")
+        if isinstance(profile.last_period_start, date):
+            last_period_start = profile.last_period_start
+        cycle_length = profile.cycle_length
+        workout_pref = profile.workout_intensity
 
     return LoginResponse(
         user_id=user["id"],
@@ -139,22 +185,14 @@ def save_quiz_profile(payload: QuizProfileInput) -> QuizProfileResponse:
         workout_intensity=payload.workout_intensity,
     )
 
-    # last_period_start stored as ISO string in db.json
-    lps_raw = profile["last_period_start"]
-    lps_date = (
-        date.fromisoformat(lps_raw)
-        if isinstance(lps_raw, str)
-        else payload.last_period_start
-    )
-
     return QuizProfileResponse(
         user_id=user_id,
-        last_period_start=lps_date,
-        cycle_length=profile["cycle_length"],
-        menstruation_phase_duration=profile["menstruation_phase_duration"],
-        symptoms=profile["symptoms"],
-        medication=profile["medication"],
-        workout_intensity=profile["workout_intensity"],
+        last_period_start=profile.last_period_start,
+        cycle_length=profile.cycle_length,
+        menstruation_phase_duration=profile.menstruation_phase_duration,
+        symptoms=list(profile.symptoms),
+        medication=profile.medication,
+        workout_intensity=profile.workout_intensity,
     )
 
 @app.post("/api/profile/weekly-quiz", response_model=WeeklyQuizResponse)
@@ -190,37 +228,41 @@ def save_weekly_quiz_endpoint(payload: WeeklyQuizInput) -> WeeklyQuizResponse:
 # ---------- CYCLE SUMMARY FOR DASHBOARD ----------
 
 @app.get("/api/user/{user_id}/cycle-summary", response_model=CycleSummaryResponse)
-def get_cycle_summary(user_id: str) -> CycleSummaryResponse:
+def get_cycle_summary(user_id: str, request: Request) -> Response:
     """
     Return current cycle day, phase, and short tips for the dashboard.
+    The rendered body is cached per (user, today, profile version) and sent
+    with a strong ETag, so a conditional repeat load gets a bodyless 304.
     """
-    if user_id not in PROFILES:
-        raise HTTPException(status_code=404, detail="Profile not found")
+    context = _profile_context(user_id)
+
+    today = date.today()
+
+    entry = cycle_summary_cache.get(user_id, today, context.version)
+    if entry is None:
+        summary = _build_cycle_summary(context, today)
+        entry = cycle_summary_cache.put(
+            user_id, today, context.version, summary.model_dump_json().encode("utf-8")
+        )
 
-    profile = PROFILES[user_id]
+    # no-cache: the browser may store it but has to revalidate, because a
+    # profile save changes the answer before midnight
+    headers = {"ETag": entry.etag, "Cache-Control": "private, no-cache"}
+    if cycle_summary_cache.etag_matches(request.headers.get("if-none-match"), entry.etag):
+        return Response(status_code=304, headers=headers)
+    return Response(content=entry.body, media_type="application/json", headers=headers)
 
-    # last_period_start is stored as ISO string in db.json
-    lps_raw = profile.get("last_period_start")
-    if not lps_raw:
-        raise HTTPException(status_code=400, detail="Profile incomplete")
 
+def _profile_context(user_id: str) -> ProfileContext:
     try:
-        last_period_start = (
-            date.fromisoformat(lps_raw)
-            if isinstance(lps_raw, str)
-            else lps_raw
-        )
-    except Exception:
-        raise HTTPException(
-            status_code=400, detail="Invalid last_period_start in profile"
-        )
+        return get_profile_context(user_id)
+    except ProfileError as e:
+        raise HTTPException(status_code=e.status_code, detail=str(e))
 
-    cycle_length = profile.get("cycle_length", 28)
-    bleed_days = profile.get("menstruation_phase_duration", 5)
 
-    today = date.today()
-    cycle_day = get_cycle_day(today, last_period_start, cycle_length)
-    phase = get_phase(cycle_day, cycle_length, bleed_days)
+def _build_cycle_summary(context: ProfileContext, today: date) -> CycleSummaryResponse:
+    cycle_day = context.cycle_day(today)
+    phase = get_phase(cycle_day, context.cycle_length, context.bleed_days)
     phase_label = get_phase_label(phase)
     tips_raw = get_phase_tips(phase)
 
@@ -231,7 +273,7 @@ def get_cycle_summary(user_id: str) -> CycleSummaryResponse:
     )
 
     return CycleSummaryResponse(
-        user_id=user_id,
+        user_id=context.user_id,
         today=today,
         cycle_day=cycle_day,
         phase=phase,
@@ -240,6 +282,100 @@ def get_cycle_summary(user_id: str) -> CycleSummaryResponse:
     )
 
 
+@app.get("/api/user/{user_id}/phase-timeline", response_model=PhaseTimelineResponse)
+def get_phase_timeline_endpoint(
+    user_id: str,
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+) -> PhaseTimelineResponse:
+    """
+    Return cycle day and phase for every day in [start, end]
+    (default: today and the next 90 days), computed in one vectorized pass.
+    """
+    context = _profile_context(user_id)
+
+    start = start or date.today()
+    end = end or start + timedelta(days=90)
+    if end < start:
+        raise HTTPException(status_code=400, detail="end must not be before start")
+    if (end - start).days + 1 > MAX_TIMELINE_DAYS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Timeline is limited to {MAX_TIMELINE_DAYS} days",
+        )
+
+    dates, cycle_days, phase_codes = context.phases_between(start, end)
+
+    days = [
+        PhaseTimelineDay(date=day, cycle_day=cycle_day, phase=PHASES[code])
+        for day, cycle_day, code in zip(
+            dates.tolist(), cycle_days.tolist(), phase_codes.tolist()
+        )
+    ]
+
+    return PhaseTimelineResponse(user_id=user_id, start=start, end=end, days=days)
+
+
+@app.get("/api/user/{user_id}/workout-plan", response_model=WorkoutPlanResponse)
+def get_workout_plan(
+    user_id: str,
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+    intensity: Literal["light", "moderate", "heavy"] = "moderate",
+) -> WorkoutPlanResponse:
+    """
+    Recommended workout intensity for every day in [start, end]
+    (default: the next 7 days) given the intensity the user would like to
+    train at, from the cycle template rescaled to the user's cycle.
+    """
+    context = _profile_context(user_id)
+
+    engine = workout_engine.current()
+    if engine is None:
+        raise HTTPException(status_code=503, detail="Workout template not loaded")
+
+    start = start or date.today()
+    end = end or start + timedelta(days=6)
+    if end < start:
+        raise HTTPException(status_code=400, detail="end must not be before start")
+    if (end - start).days + 1 > MAX_WORKOUT_PLAN_DAYS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Workout plan is limited to {MAX_WORKOUT_PLAN_DAYS} days",
+        )
+
+    dates = [start + timedelta(days=i) for i in range((end - start).days + 1)]
+    try:
+        decisions = engine.decide_many(
+            context.last_period_start,
+            dates,
+            intensity,
+            cycle_length=context.cycle_length,
+            bleed_days=context.bleed_days,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    days = [
+        WorkoutPlanDay(
+            date=day,
+            cycle_day=decision["cycle_day"],
+            cycle_phase=decision["cycle_phase"],
+            recommended_intensity=decision["recommended_intensity"],
+            ok_to_do_heavy=decision["ok_to_do_heavy"],
+            energy_level=decision["energy_level"],
+            rest_need=decision["rest_need"],
+            symptoms=decision["symptoms"],
+            reason=decision["reason"],
+        )
+        for day, decision in zip(dates, decisions)
+    ]
+
+    return WorkoutPlanResponse(
+        user_id=user_id, start=start, end=end, desired_intensity=intensity, days=days
+    )
+
+
 @app.get("/api/user/{user_id}/calendar-status", response_model=CalendarStatusResponse)
 def calendar_status(user_id: str) -> CalendarStatusResponse:
     """
@@ -255,6 +391,16 @@ def calendar_status(user_id: str) -> CalendarStatusResponse:
 # ---------- PLANNING EVALUATION ----------
 
 
+def _parse_iso_datetime(value: str) -> datetime:
+    raw = value
+    if raw.endswith("Z"):
+        raw = raw.replace("Z", "+00:00")
+    try:
+        return datetime.fromisoformat(raw)
+    except ValueError:
+        raise HTTPException(status_code=400, detail=f"Invalid datetime: {value}")
+
+
 @app.post("/api/plan/evaluate", response_model=PlanEvaluateResponse)
 def evaluate_plan(payload: PlanEvaluateRequest) -> PlanEvaluateResponse:
     """
@@ -262,47 +408,28 @@ def evaluate_plan(payload: PlanEvaluateRequest) -> PlanEvaluateResponse:
     is ideal for the user's cycle phase, and if not suggest a better slot.
     """
     user_id = payload.user_id
-    if user_id not in PROFILES:
-        raise HTTPException(status_code=404, detail="Profile not found")
-
-    profile = PROFILES[user_id]
+    context = _profile_context(user_id)
 
-    lps_raw = profile.get("last_period_start")
-    if not lps_raw:
-        raise HTTPException(status_code=400, detail="Profile incomplete")
+    starts = [_parse_iso_datetime(task.start_iso) for task in payload.tasks]
 
-    try:
-        last_period_start = (
-            date.fromisoformat(lps_raw)
-            if isinstance(lps_raw, str)
-            else lps_raw
-        )
-    except Exception:
-        raise HTTPException(
-            status_code=400, detail="Invalid last_period_start in profile"
-        )
-
-    cycle_length = profile.get("cycle_length", 28)
-    bleed_days = profile.get("menstruation_phase_duration", 5)
+    # phases of every day in every task's window, computed once
+    window = PhaseWindowIndex(
+        context, [start_dt.date() for start_dt in starts], *SUGGESTION_WINDOW
+    )
+    # the other tasks are the calendar a suggested slot must not collide with
+    busy = IntervalIndex(
+        (start_dt, start_dt + timedelta(hours=task.duration_hours))
+        for task, start_dt in zip(payload.tasks, starts)
+    )
+    codes = [window.code_on(start_dt.date()) for start_dt in starts]
+    ideal = rules.fit_many([task.category for task in payload.tasks], codes)
 
     suggestions = []
 
-    for task in payload.tasks:
-        raw = task.start_iso
-        if raw.endswith("Z"):
-            raw = raw.replace("Z", "+00:00")
-        try:
-            start_dt = datetime.fromisoformat(raw)
-        except ValueError:
-            raise HTTPException(
-                status_code=400, detail=f"Invalid datetime: {task.start_iso}"
-            )
-
-        cycle_day = get_cycle_day(start_dt.date(), last_period_start, cycle_length)
-        phase = get_phase(cycle_day, cycle_length, bleed_days)
-
-        target_phases = category_target_phases(task.category)
-        is_ideal = phase in target_phases
+    for task, start_dt, code, is_ideal in zip(
+        payload.tasks, starts, codes, ideal.tolist()
+    ):
+        phase = PHASES[code]
 
         if is_ideal:
             reason = f"This fits well into your {phase} phase for a {task.category} task."
@@ -318,20 +445,22 @@ def evaluate_plan(payload: PlanEvaluateRequest) -> PlanEvaluateResponse:
             )
             continue
 
-        # look for a better day within a small window around the chosen time
+        # look for a better day within a small window around the chosen time,
+        # at the free slot closest to the chosen time of day
         best_dt = None
         best_phase = None
-        for delta_days in range(-3, 8):
-            candidate_date = start_dt.date() + timedelta(days=delta_days)
-            candidate_cycle_day = get_cycle_day(
-                candidate_date, last_period_start, cycle_length
-            )
-            candidate_phase = get_phase(
-                candidate_cycle_day, cycle_length, bleed_days
-            )
-            if candidate_phase in target_phases:
-                best_dt = datetime.combine(candidate_date, start_dt.time())
+        duration = timedelta(hours=task.duration_hours)
+        for candidate_date, candidate_phase in window.days_in_window(
+            start_dt.date(), rules.mask_for(task.category)
+        ):
+            # keep the task's UTC offset: busy time and DAY_HOURS are
+            # compared in it
+            wanted = datetime.combine(candidate_date, start_dt.timetz())
+            slot = busy.free_slot_on_day(wanted, duration)
+            if slot is not None:
+                best_dt = slot
                 best_phase = candidate_phase
+                busy.add(slot, slot + duration)
                 break
 
         if best_dt is not None:
@@ -370,6 +499,142 @@ def evaluate_plan(payload: PlanEvaluateRequest) -> PlanEvaluateResponse:
     return PlanEvaluateResponse(user_id=user_id, suggestions=suggestions)
 
 
+# ---------- ADMIN / BATCH ----------
+
+
+def require_admin(x_admin_token: Optional[str] = Header(None)) -> None:
+    """
+    Dependency of every /api/admin/* endpoint: the X-Admin-Token header
+    must match SHE_ADMIN_TOKEN. Without a configured token the admin
+    endpoints are closed.
+    """
+    if not ADMIN_TOKEN or not x_admin_token or not hmac.compare_digest(
+        x_admin_token.encode("utf-8"), ADMIN_TOKEN.encode("utf-8")
+    ):
+        raise HTTPException(status_code=403, detail="Admin token required")
+
+
+@app.get("/api/admin/cohort-summary", dependencies=[Depends(require_admin)])
+def admin_cohort_summary(
+    day: Optional[date] = None,
+    tips: bool = True,
+) -> StreamingResponse:
+    """
+    Cycle summary of every user as NDJSON (one /cycle-summary body per
+    line), for batch jobs such as the nightly push notifications.
+    """
+    return StreamingResponse(
+        iter_cohort_summaries(day or date.today(), include_tips=tips),
+        media_type="application/x-ndjson",
+    )
+
+
+@app.post("/api/admin/planning-rules/reload", dependencies=[Depends(require_admin)])
+def admin_reload_planning_rules() -> Dict[str, List[str]]:
+    """
+    Re-read the category -> phase rules file and return the rules now in
+    effect (category or alias -> target phases).
+    """
+    reload_rules()
+    return rules.categories()
+
+
+@app.post("/api/admin/event-keywords/reload", dependencies=[Depends(require_admin)])
+def admin_reload_event_keywords() -> Dict[str, List[str]]:
+    """
+    Re-read the event-title keywords file and return the keywords now in
+    effect per category.
+    """
+    reload_classifier()
+    return classifier.keywords()
+
+
+@app.post("/api/plan/optimize", response_model=PlanOptimizeResponse)
+def optimize_plan(payload: PlanOptimizeRequest) -> PlanOptimizeResponse:
+    """
+    Place a batch of tasks into free slots of the horizon, avoiding busy
+    intervals and each other and respecting per-day capacity, so that as
+    many as possible land in a phase that suits their category.
+    Times are local wall-clock times; a UTC offset in the input is dropped.
+    """
+    user_id = payload.user_id
+    context = _profile_context(user_id)
+
+    if not 0 <= payload.day_start_hour < payload.day_end_hour <= 24:
+        raise HTTPException(status_code=400, detail="Invalid day hours")
+    if not 5 <= payload.slot_minutes <= 240:
+        raise HTTPException(
+            status_code=400, detail="slot_minutes must be between 5 and 240"
+        )
+    if not 1 <= payload.horizon_days <= MAX_OPTIMIZE_HORIZON_DAYS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"horizon_days must be between 1 and {MAX_OPTIMIZE_HORIZON_DAYS}",
+        )
+
+    tasks = [
+        PlanTask(
+            title=task.title,
+            category=task.category,
+            start=_parse_iso_datetime(task.start_iso).replace(tzinfo=None),
+            duration_hours=task.duration_hours,
+        )
+        for task in payload.tasks
+    ]
+    busy = [
+        (
+            _parse_iso_datetime(interval.start_iso).replace(tzinfo=None),
+            _parse_iso_datetime(interval.end_iso).replace(tzinfo=None),
+        )
+        for interval in payload.busy
+    ]
+
+    horizon_start = payload.horizon_start or min(
+        (task.start.date() for task in tasks), default=date.today()
+    )
+    time_budget = PLAN_OPTIMIZE_TIME_BUDGET
+    if payload.time_budget_ms is not None:
+        time_budget = payload.time_budget_ms / 1000
+    time_budget = min(max(time_budget, 0.0), PLAN_OPTIMIZE_MAX_TIME_BUDGET)
+
+    plan = optimize_slots(
+        context,
+        tasks,
+        busy,
+        horizon_start,
+        payload.horizon_days,
+        day_start_hour=payload.day_start_hour,
+        day_end_hour=payload.day_end_hour,
+        capacity_hours=payload.daily_capacity_hours,
+        capacity_by_date=payload.capacity_by_date,
+        slot_minutes=payload.slot_minutes,
+        time_budget=time_budget,
+    )
+
+    assignments = [
+        OptimizedTask(
+            title=task.title,
+            category=task.category,
+            original_start_iso=task.start_iso,
+            scheduled=assignment.start is not None,
+            suggested_start_iso=assignment.start.isoformat() if assignment.start else None,
+            suggested_end_iso=assignment.end.isoformat() if assignment.end else None,
+            phase=assignment.phase,
+            fits_phase=assignment.fits_phase,
+        )
+        for task, assignment in zip(payload.tasks, plan.assignments)
+    ]
+
+    return PlanOptimizeResponse(
+        user_id=user_id,
+        assignments=assignments,
+        unscheduled=sum(1 for a in assignments if not a.scheduled),
+        phase_fit=sum(1 for a in assignments if a.fits_phase),
+        score=round(plan.score, 3),
+        iterations=plan.iterations,
+    )
+
+
 # ---------- DEBUG ENDPOINTS (for you, not for production) ----------
 
 @app.get("/api/debug/users")
@@ -379,7 +644,32 @@ def debug_users() -> Dict[str, Any]:
 
 @app.get("/api/debug/profiles")
 def debug_profiles() -> Dict[str, Any]:
-    return PROFILES
+    return {user_id: profile.to_dict() for user_id, profile in PROFILES.items()}
+
+
+@app.get("/api/debug/storage")
+def debug_storage() -> Dict[str, Any]:
+    return write_behind_stats()
+
+
+@app.get("/api/debug/phase-cache")
+def debug_phase_cache() -> Dict[str, Any]:
+    return phase_cache_info()
+
+
+@app.get("/api/debug/scheduler")
+def debug_scheduler() -> Dict[str, Any]:
+    return scheduler.stats()
+
+
+@app.get("/api/debug/workout-engine")
+def debug_workout_engine() -> Dict[str, Any]:
+    return workout_engine.stats()
+
+
+@app.get("/api/debug/llm-cache")
+def debug_llm_cache() -> Dict[str, Any]:
+    return llm_cache.stats()
 
 
 # ---------- GOOGLE OAUTH ----------
@@ -1,5 +1,5 @@
 from datetime import date
-from typing import Optional, List
+from typing import Dict, Optional, List
 from pydantic import BaseModel, EmailStr
 
 
@@ -76,6 +76,39 @@ class CycleSummaryResponse(BaseModel):
     tips: PhaseTips
 
 
+class PhaseTimelineDay(BaseModel):
+    date: date
+    cycle_day: int
+    phase: str
+
+
+class PhaseTimelineResponse(BaseModel):
+    user_id: str
+    start: date
+    end: date
+    days: List[PhaseTimelineDay]
+
+
+class WorkoutPlanDay(BaseModel):
+    date: date
+    cycle_day: int
+    cycle_phase: str
+    recommended_intensity: str
+    ok_to_do_heavy: bool
+    energy_level: int
+    rest_need: int
+    symptoms: List[str]
+    reason: str
+
+
+class WorkoutPlanResponse(BaseModel):
+    user_id: str
+    start: date
+    end: date
+    desired_intensity: str
+    days: List[WorkoutPlanDay]
+
+
 class TaskToPlan(BaseModel):
     title: str
     category: str  # "work" | "uni" | "social" | etc.
@@ -104,6 +137,45 @@ class PlanEvaluateResponse(BaseModel):
     suggestions: List[TaskPlanSuggestion]
 
 
+class BusyInterval(BaseModel):
+    start_iso: str  # ISO datetime string
+    end_iso: str
+
+
+class PlanOptimizeRequest(BaseModel):
+    user_id: str
+    tasks: List[TaskToPlan]
+    busy: List[BusyInterval] = []
+    horizon_start: Optional[date] = None  # default: earliest task day
+    horizon_days: int = 14
+    day_start_hour: int = 8
+    day_end_hour: int = 20
+    daily_capacity_hours: float = 8.0
+    capacity_by_date: Dict[date, float] = {}  # per-day overrides
+    slot_minutes: int = 30
+    time_budget_ms: Optional[int] = None  # default: SHE_PLAN_OPTIMIZE_TIME_BUDGET
+
+
+class OptimizedTask(BaseModel):
+    title: str
+    category: str
+    original_start_iso: str
+    scheduled: bool
+    suggested_start_iso: Optional[str] = None
+    suggested_end_iso: Optional[str] = None
+    phase: Optional[str] = None
+    fits_phase: bool = False
+
+
+class PlanOptimizeResponse(BaseModel):
+    user_id: str
+    assignments: List[OptimizedTask]
+    unscheduled: int
+    phase_fit: int
+    score: float  # total cost, lower is better
+    iterations: int
+
+
 class CalendarStatusResponse(BaseModel):
     user_id: str
     connected: bool
@@ -1,7 +1,40 @@
+import json
+from bisect import bisect_left
+from json.encoder import encode_basestring_ascii
 from datetime import date, timedelta
-from typing import Dict, List, Any, Optional
+from functools import lru_cache
+from types import MappingProxyType
+from typing import (
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Any,
+    Mapping,
+    Optional,
+    Sequence,
+    Tuple,
+)
 
-from .storage import PROFILES
+import numpy as np
+
+from .phase_model import (
+    FOLLICULAR,
+    LUTEAL,
+    MENSTRUAL,
+    OVULATION,
+    PHASES,
+    get_phases,
+    phase_boundaries,
+)
+from .storage import PROFILES, on_profile_saved, profile_version
+
+# distinct (cycle_length, bleed_days) pairs whose phase tables are kept
+PHASE_TABLE_CACHE_SIZE = 256
+# longer "cycles" are computed per call instead of tabulated
+MAX_TABLE_CYCLE_LENGTH = 120
+# users per chunk of the NDJSON cohort stream
+COHORT_CHUNK_SIZE = 10_000
 
 
 def get_cycle_day(today: date, last_period_start: date, cycle_length: int) -> int:
@@ -25,16 +58,30 @@ def get_phase(cycle_day: int, cycle_length: int, bleed_days: int) -> str:
       - follicular
       - ovulation
       - luteal
+    Days inside the cycle are a lookup in the cached table for
+    (cycle_length, bleed_days).
     """
-    if bleed_days <= 0:
-        bleed_days = 5
+    if 1 <= cycle_day <= cycle_length <= MAX_TABLE_CYCLE_LENGTH:
+        return _phase_table(cycle_length, bleed_days)[cycle_day]
+    return _compute_phase(cycle_day, cycle_length, bleed_days)
 
-    # crude model, good enough for hackathon
-    ovulation_day = int(cycle_length * 0.5)
-    late_follicular_start = bleed_days + 1
-    ovulation_window_start = max(ovulation_day - 1, late_follicular_start + 1)
-    ovulation_window_end = ovulation_day + 1
-    luteal_start = ovulation_window_end + 1
+
+@lru_cache(maxsize=PHASE_TABLE_CACHE_SIZE)
+def _phase_table(cycle_length: int, bleed_days: int) -> Tuple[str, ...]:
+    """
+    Phase slug for every cycle day; index 0 is unused so the table can be
+    indexed by cycle day directly.
+    """
+    return ("",) + tuple(
+        _compute_phase(cycle_day, cycle_length, bleed_days)
+        for cycle_day in range(1, cycle_length + 1)
+    )
+
+
+def _compute_phase(cycle_day: int, cycle_length: int, bleed_days: int) -> str:
+    bleed_days, ovulation_window_start, ovulation_window_end = phase_boundaries(
+        cycle_length, bleed_days
+    )
 
     if cycle_day <= bleed_days:
         return "menstrual"
@@ -45,6 +92,72 @@ def get_phase(cycle_day: int, cycle_length: int, bleed_days: int) -> str:
     return "luteal"
 
 
+def days_to_next_phase(
+    cycle_day: int, cycle_length: int, bleed_days: int
+) -> Optional[Tuple[int, str]]:
+    """
+    (days until the phase changes, phase it changes to) as seen from
+    cycle_day, or None if the whole cycle is a single phase.
+    """
+    if 1 <= cycle_day <= cycle_length <= MAX_TABLE_CYCLE_LENGTH:
+        return _transition_table(cycle_length, bleed_days)[cycle_day]
+    return _compute_next_phase(cycle_day, cycle_length, bleed_days)
+
+
+@lru_cache(maxsize=PHASE_TABLE_CACHE_SIZE)
+def _transition_table(
+    cycle_length: int, bleed_days: int
+) -> Tuple[Optional[Tuple[int, str]], ...]:
+    return (None,) + tuple(
+        _compute_next_phase(cycle_day, cycle_length, bleed_days)
+        for cycle_day in range(1, cycle_length + 1)
+    )
+
+
+def _compute_next_phase(
+    cycle_day: int, cycle_length: int, bleed_days: int
+) -> Optional[Tuple[int, str]]:
+    current = get_phase(cycle_day, cycle_length, bleed_days)
+    for offset in range(1, cycle_length + 1):
+        # wrap into the next cycle
+        next_day = (cycle_day - 1 + offset) % cycle_length + 1
+        phase = get_phase(next_day, cycle_length, bleed_days)
+        if phase != current:
+            return offset, phase
+    return None
+
+
+def get_cycle_days(dates, last_period_start: date, cycle_length: int) -> np.ndarray:
+    """
+    Batched get_cycle_day: cycle days (1..cycle_length) for an array of
+    dates (date objects or datetime64) in one vectorized pass.
+    """
+    if cycle_length <= 0:
+        cycle_length = 28
+
+    days = np.asarray(dates, dtype="datetime64[D]")
+    days_since_start = (days - np.datetime64(last_period_start, "D")).astype(np.int64)
+    # numpy's % floors like Python's, so dates before the period wrap too
+    return days_since_start % cycle_length + 1
+
+
+def get_phase_timeline(
+    start: date,
+    end: date,
+    last_period_start: date,
+    cycle_length: int,
+    bleed_days: int,
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Dates, cycle days and phase codes for every day in [start, end].
+    """
+    dates = np.arange(
+        np.datetime64(start, "D"), np.datetime64(end, "D") + 1, dtype="datetime64[D]"
+    )
+    cycle_days = get_cycle_days(dates, last_period_start, cycle_length)
+    return dates, cycle_days, get_phases(cycle_days, cycle_length, bleed_days)
+
+
 def get_phase_label(phase: str) -> str:
     return {
         "menstrual": "Menstrual phase",
@@ -54,94 +167,404 @@ def get_phase_label(phase: str) -> str:
     }.get(phase, "Unknown phase")
 
 
-def get_phase_tips(phase: str) -> Dict[str, List[str] or str]:
+_PHASE_TIPS_SOURCE = {
+    "menstrual": {
+        "headline": "Low-energy, high-care days.",
+        "do": [
+            "Prioritise rest and low-pressure work.",
+            "Block focused time for small, concrete tasks.",
+            "Favour gentle movement: walks, stretching, yoga.",
+        ],
+        "avoid": [
+            "Overloading your calendar with back-to-back meetings.",
+            "Scheduling heavy workouts or intense social events.",
+        ],
+    },
+    "follicular": {
+        "headline": "Brain is sharp, energy is climbing.",
+        "do": [
+            "Plan deep-work blocks and heavy study sessions.",
+            "Start new projects and brainstorming sessions.",
+            "Schedule strength or higher-intensity workouts.",
+        ],
+        "avoid": [
+            "Leaving important tasks for much later in the cycle.",
+        ],
+    },
+    "ovulation": {
+        "headline": "Peak visibility & social energy.",
+        "do": [
+            "Schedule presentations, networking, and social plans.",
+            "Batch calls and collaborative work.",
+            "Use your high energy for ambitious workouts.",
+        ],
+        "avoid": [
+            "Hiding high-stakes tasks in low-energy days instead.",
+        ],
+    },
+    "luteal": {
+        "headline": "Energy slowly dips, detail-oriented mode.",
+        "do": [
+            "Tidy up tasks, documents, and code.",
+            "Plan admin, reviews, and low-pressure work.",
+            "Prioritise sleep and calmer movement.",
+        ],
+        "avoid": [
+            "Overcommitting to last-minute high-social events.",
+            "Scheduling big deadlines right before your period starts.",
+        ],
+    },
+}
+
+_DEFAULT_TIPS_SOURCE = {
+    "headline": "Tune into how you feel today.",
+    "do": ["Notice your energy and adjust where you can."],
+    "avoid": [],
+}
+
+
+def _freeze_tips(tips: Dict[str, Any]) -> Mapping[str, Any]:
+    """
+    Read-only view of a tips dict: lists become tuples, the dict a mappingproxy.
+    """
+    return MappingProxyType(
+        {
+            key: tuple(value) if isinstance(value, list) else value
+            for key, value in tips.items()
+        }
+    )
+
+
+# built once at import; get_phase_tips hands out these shared, immutable objects
+_PHASE_TIPS = {phase: _freeze_tips(tips) for phase, tips in _PHASE_TIPS_SOURCE.items()}
+_DEFAULT_TIPS = _freeze_tips(_DEFAULT_TIPS_SOURCE)
+
+
+def get_phase_tips(phase: str) -> Mapping[str, Any]:
     """
     Returns short, friendly tips for the current phase.
+    The result is shared and read-only.
     """
-    tips = {
-        "menstrual": {
-            "headline": "Low-energy, high-care days.",
-            "do": [
-                "Prioritise rest and low-pressure work.",
-                "Block focused time for small, concrete tasks.",
-                "Favour gentle movement: walks, stretching, yoga.",
-            ],
-            "avoid": [
-                "Overloading your calendar with back-to-back meetings.",
-                "Scheduling heavy workouts or intense social events.",
-            ],
-        },
-        "follicular": {
-            "headline": "Brain is sharp, energy is climbing.",
-            "do": [
-                "Plan deep-work blocks and heavy study sessions.",
-                "Start new projects and brainstorming sessions.",
-                "Schedule strength or higher-intensity workouts.",
-            ],
-            "avoid": [
-                "Leaving important tasks for much later in the cycle.",
-            ],
-        },
-        "ovulation": {
-            "headline": "Peak visibility & social energy.",
-            "do": [
-                "Schedule presentations, networking, and social plans.",
-                "Batch calls and collaborative work.",
-                "Use your high energy for ambitious workouts.",
-            ],
-            "avoid": [
-                "Hiding high-stakes tasks in low-energy days instead.",
-            ],
-        },
-        "luteal": {
-            "headline": "Energy slowly dips, detail-oriented mode.",
-            "do": [
-                "Tidy up tasks, documents, and code.",
-                "Plan admin, reviews, and low-pressure work.",
-                "Prioritise sleep and calmer movement.",
-            ],
-            "avoid": [
-                "Overcommitting to last-minute high-social events.",
-                "Scheduling big deadlines right before your period starts.",
-            ],
-        },
+    return _PHASE_TIPS.get(phase, _DEFAULT_TIPS)
+
+
+def phase_cache_info() -> Dict[str, int]:
+    """
+    Hit/miss counters of the per-(cycle_length, bleed_days) phase tables.
+    """
+    info = _phase_table.cache_info()
+    return {
+        "hits": info.hits,
+        "misses": info.misses,
+        "size": info.currsize,
+        "max_size": info.maxsize,
     }
-    return tips.get(
-        phase,
-        {
-            "headline": "Tune into how you feel today.",
-            "do": ["Notice your energy and adjust where you can."],
-            "avoid": [],
-        },
+
+
+class ProfileError(ValueError):
+    """
+    The profile is missing (status_code 404) or cannot be used for cycle
+    maths (400). str(error) is the message for the client.
+    """
+
+    def __init__(self, message: str, status_code: int = 400):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+class ProfileContext:
+    """
+    One profile version with its cycle parameters resolved (parsed
+    last_period_start, defaults for cycle_length and bleed_days) and the
+    phase helpers built on them. Built once per profile version by
+    get_profile_context and shared by every request after that.
+    """
+
+    __slots__ = (
+        "user_id",
+        "version",
+        "last_period_start",
+        "cycle_length",
+        "bleed_days",
     )
 
-def get_cycle_summary(user_id: str) -> Dict[str, Any]:
+    def __init__(
+        self,
+        user_id: str,
+        version: int,
+        last_period_start: date,
+        cycle_length: int,
+        bleed_days: int,
+    ):
+        self.user_id = user_id
+        self.version = version
+        self.last_period_start = last_period_start
+        self.cycle_length = cycle_length
+        self.bleed_days = bleed_days
+
+    def cycle_day(self, day: date) -> int:
+        return get_cycle_day(day, self.last_period_start, self.cycle_length)
+
+    def phase_for(self, day: date) -> str:
+        return get_phase(self.cycle_day(day), self.cycle_length, self.bleed_days)
+
+    def next_transition(self, day: date) -> Optional[Tuple[date, str]]:
+        """
+        First date after day on which the phase changes, and the new phase.
+        """
+        change = days_to_next_phase(
+            self.cycle_day(day), self.cycle_length, self.bleed_days
+        )
+        if change is None:
+            return None
+        days, phase = change
+        return day + timedelta(days=days), phase
+
+    def phases_between(
+        self, start: date, end: date
+    ) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Dates, cycle days and phase codes (see PHASES) for [start, end].
+        """
+        return get_phase_timeline(
+            start, end, self.last_period_start, self.cycle_length, self.bleed_days
+        )
+
+
+class PhaseWindowIndex:
     """
-    Compute current cycle day, phase label and tips for a given user_id.
-    Used by both the /cycle-summary endpoint and the AI agent.
+    Phases of every day in the union of the windows
+    [day + first_offset, day + last_offset] around a batch of days,
+    computed in one vectorized pass. For each target phase bitmask a
+    next-occurrence array (index of the next day at or after i whose phase
+    is in the mask) is built on first use, so walking the days of a window
+    that have a target phase is a bisect plus one list lookup per day.
+    Queries must use days from the batch the index was built for.
+    """
+
+    def __init__(
+        self,
+        context: ProfileContext,
+        days: Sequence[date],
+        first_offset: int,
+        last_offset: int,
+    ):
+        self.context = context
+        self.first_offset = first_offset
+        self.last_offset = last_offset
+
+        centers = np.unique(
+            np.array([day.toordinal() for day in days], dtype=np.int64)
+        )
+        offsets = np.arange(first_offset, last_offset + 1, dtype=np.int64)
+        ordinals = np.unique((centers[:, None] + offsets).ravel())
+        start = context.last_period_start.toordinal()
+        cycle_days = (ordinals - start) % context.cycle_length + 1
+
+        self._codes = get_phases(cycle_days, context.cycle_length, context.bleed_days)
+        self._ordinals: List[int] = ordinals.tolist()
+        self._code_list: List[int] = self._codes.tolist()
+        self._next: Dict[int, List[int]] = {}
+
+    def _next_index(self, target_mask: int) -> List[int]:
+        next_index = self._next.get(target_mask)
+        if next_index is None:
+            count = len(self._ordinals)
+            matches = (target_mask >> self._codes) & 1
+            positions = np.where(matches.astype(bool), np.arange(count), count)
+            # running minimum from the right = next matching position
+            next_index = np.minimum.accumulate(positions[::-1])[::-1].tolist()
+            self._next[target_mask] = next_index
+        return next_index
+
+    def code_on(self, day: date) -> int:
+        ordinal = day.toordinal()
+        i = bisect_left(self._ordinals, ordinal)
+        if i < len(self._ordinals) and self._ordinals[i] == ordinal:
+            return self._code_list[i]
+        return PHASES.index(self.context.phase_for(day))
+
+    def days_in_window(
+        self, day: date, target_mask: int
+    ) -> Iterator[Tuple[date, str]]:
+        """
+        Every date in day's window whose phase is in target_mask, in order.
+        """
+        ordinal = day.toordinal()
+        last = ordinal + self.last_offset
+        next_index = self._next_index(target_mask)
+        i = bisect_left(self._ordinals, ordinal + self.first_offset)
+        while i < len(self._ordinals):
+            j = next_index[i]
+            if j >= len(self._ordinals) or self._ordinals[j] > last:
+                return
+            yield date.fromordinal(self._ordinals[j]), PHASES[self._code_list[j]]
+            i = j + 1
+
+
+# user_id -> context of the latest profile version seen
+_contexts: Dict[str, ProfileContext] = {}
+
+
+def get_profile_context(user_id: str) -> ProfileContext:
+    """
+    Return the cached ProfileContext for this user's current profile
+    version, building it on the first request after a save.
+    Raises ProfileError if there is no usable profile.
     """
+    version = profile_version(user_id)
+    context = _contexts.get(user_id)
+    if context is not None and context.version == version:
+        return context
+
     profile = PROFILES.get(user_id)
     if not profile:
-        raise ValueError("Profile not found for user")
+        raise ProfileError("Profile not found", status_code=404)
+
+    last_period_start = profile.last_period_start
+    if not last_period_start:
+        raise ProfileError("Profile incomplete")
+    if not isinstance(last_period_start, date):
+        raise ProfileError("Invalid last_period_start in profile")
+
+    context = ProfileContext(
+        user_id=user_id,
+        version=version,
+        last_period_start=last_period_start,
+        cycle_length=profile.cycle_length or 28,
+        bleed_days=profile.menstruation_phase_duration or 5,
+    )
+    _contexts[user_id] = context
+    return context
 
-    last_period_raw = profile["last_period_start"]
-    if isinstance(last_period_raw, str):
-        last_period_start = date.fromisoformat(last_period_raw)
-    else:
-        last_period_start = last_period_raw  # already a date
 
-    cycle_length = int(profile["cycle_length"])
-    bleed_days = int(profile["menstruation_phase_duration"])
+on_profile_saved(lambda user_id: _contexts.pop(user_id, None))
 
-    today = date.today()
-    days_since = (today - last_period_start).days
-    cycle_day = (days_since % cycle_length) + 1
 
-    phase_label = get_phase(cycle_day, cycle_length, bleed_days)
-    tips = get_phase_tips(phase_label)
+def get_cycle_summary(user_id: str) -> Dict[str, Any]:
+    """
+    Compute current cycle day, phase label and tips for a given user_id.
+    Used by both the /cycle-summary endpoint and the AI agent.
+    """
+    context = get_profile_context(user_id)
+
+    cycle_day = context.cycle_day(date.today())
+    phase_label = get_phase(cycle_day, context.cycle_length, context.bleed_days)
+    tips = dict(get_phase_tips(phase_label))
 
     return {
       "cycle_day": cycle_day,
       "phase_label": phase_label,
       "tips": tips,
     }
+
+
+def get_cohort_phases(
+    today: date,
+    last_period_starts: np.ndarray,
+    cycle_lengths: np.ndarray,
+    bleed_days: np.ndarray,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Cycle day and phase code (see PHASES) for many users at once.
+    The inputs hold one entry per user; last_period_starts are date
+    ordinals (date.toordinal()). Same model as get_cycle_day/get_phase,
+    with the phase boundaries computed per user.
+    """
+    cycle_lengths = np.asarray(cycle_lengths, dtype=np.int64)
+    cycle_lengths = np.where(cycle_lengths > 0, cycle_lengths, 28)
+    bleed_days = np.asarray(bleed_days, dtype=np.int64)
+    bleed_days = np.where(bleed_days > 0, bleed_days, 5)
+
+    days_since_start = today.toordinal() - np.asarray(last_period_starts, dtype=np.int64)
+    cycle_days = days_since_start % cycle_lengths + 1
+
+    # phase_boundaries, one value per user
+    ovulation_day = cycle_lengths // 2
+    ovulation_window_start = np.maximum(ovulation_day - 1, bleed_days + 2)
+    ovulation_window_end = ovulation_day + 1
+
+    codes = np.full(cycle_days.shape, LUTEAL, dtype=np.int8)
+    codes[cycle_days <= ovulation_window_end] = OVULATION
+    codes[cycle_days <= ovulation_window_start - 1] = FOLLICULAR
+    codes[cycle_days <= bleed_days] = MENSTRUAL
+    return cycle_days, codes
+
+
+def cohort_arrays(
+    user_ids: Optional[Iterable[str]] = None,
+) -> Tuple[List[str], np.ndarray, np.ndarray, np.ndarray]:
+    """
+    (user_ids, last_period_starts, cycle_lengths, bleed_days) for
+    get_cohort_phases, read straight from the profiles (all of them by
+    default). Profiles without a usable last_period_start are skipped.
+    """
+    if user_ids is None:
+        profiles = list(PROFILES.items())
+    else:
+        profiles = [(user_id, PROFILES.get(user_id)) for user_id in user_ids]
+
+    rows = [
+        (
+            user_id,
+            profile.last_period_start.toordinal(),
+            profile.cycle_length or 28,
+            profile.menstruation_phase_duration or 5,
+        )
+        for user_id, profile in profiles
+        if profile is not None and isinstance(profile.last_period_start, date)
+    ]
+    if not rows:
+        empty = np.zeros(0, dtype=np.int64)
+        return [], empty, empty, empty
+
+    ids, starts, cycle_lengths, bleed_days = zip(*rows)
+    return (
+        list(ids),
+        np.array(starts, dtype=np.int64),
+        np.array(cycle_lengths, dtype=np.int64),
+        np.array(bleed_days, dtype=np.int64),
+    )
+
+
+def iter_cohort_summaries(
+    today: Optional[date] = None,
+    user_ids: Optional[Iterable[str]] = None,
+    include_tips: bool = True,
+    chunk_size: int = COHORT_CHUNK_SIZE,
+) -> Iterator[bytes]:
+    """
+    Cycle summary of every user (or of user_ids) as NDJSON, one line per
+    user with the fields of /cycle-summary (tips only if include_tips),
+    yielded in chunks of chunk_size lines. Phases are computed for the whole cohort in one
+    vectorized pass; the phase/label/tips part of a line is rendered once
+    per phase.
+    """
+    today = today or date.today()
+    ids, starts, cycle_lengths, bleed_days = cohort_arrays(user_ids)
+    cycle_days, codes = get_cohort_phases(today, starts, cycle_lengths, bleed_days)
+
+    middle = ',"today":"%s","cycle_day":' % today.isoformat()
+    tails = []
+    for phase in PHASES:
+        tail = ',"phase":"%s","phase_label":%s' % (
+            phase,
+            json.dumps(get_phase_label(phase)),
+        )
+        if include_tips:
+            tail += ',"tips":' + json.dumps(_PHASE_TIPS_SOURCE[phase])
+        tails.append(tail + "}\n")
+
+    for offset in range(0, len(ids), chunk_size):
+        chunk = slice(offset, offset + chunk_size)
+        lines = [
+            '{"user_id":'
+            + encode_basestring_ascii(user_id)
+            + middle
+            + str(cycle_day)
+            + tails[code]
+            for user_id, cycle_day, code in zip(
+                ids[chunk], cycle_days[chunk].tolist(), codes[chunk].tolist()
+            )
+        ]
+        yield "".join(lines).encode("utf-8")
@@ -0,0 +1,43 @@
+# The phase model without storage: phase codes, phase boundaries and the
+# batched phase lookup. Importing it does not load the DB, unlike
+# phase_engine, which re-exports everything here.
+
+from typing import Tuple
+
+import numpy as np
+
+# phase codes used by the batched (array) APIs: PHASES[code] -> slug
+PHASES = ("menstrual", "follicular", "ovulation", "luteal")
+MENSTRUAL, FOLLICULAR, OVULATION, LUTEAL = range(len(PHASES))
+
+
+def phase_boundaries(cycle_length: int, bleed_days: int) -> Tuple[int, int, int]:
+    """
+    Returns (bleed_days, ovulation_window_start, ovulation_window_end).
+    """
+    if bleed_days <= 0:
+        bleed_days = 5
+
+    # crude model, good enough for hackathon
+    ovulation_day = int(cycle_length * 0.5)
+    late_follicular_start = bleed_days + 1
+    ovulation_window_start = max(ovulation_day - 1, late_follicular_start + 1)
+    ovulation_window_end = ovulation_day + 1
+    return bleed_days, ovulation_window_start, ovulation_window_end
+
+
+def get_phases(cycle_days: np.ndarray, cycle_length: int, bleed_days: int) -> np.ndarray:
+    """
+    Batched phase_engine.get_phase: phase codes (see PHASES) for an array of cycle days.
+    """
+    bleed_days, ovulation_window_start, ovulation_window_end = phase_boundaries(
+        cycle_length, bleed_days
+    )
+
+    cycle_days = np.asarray(cycle_days)
+    codes = np.full(cycle_days.shape, LUTEAL, dtype=np.int8)
+    # later masks win, mirroring the order of the checks in get_phase
+    codes[cycle_days <= ovulation_window_end] = OVULATION
+    codes[cycle_days <= ovulation_window_start - 1] = FOLLICULAR
+    codes[cycle_days <= bleed_days] = MENSTRUAL
+    return codes
@@ -1,17 +1,151 @@
 # backend/app/planning_rules.py
 
-def category_target_phases(category: str):
+import json
+import logging
+import os
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Sequence, Tuple
+
+import numpy as np
+
+from . import config
+from .phase_engine import PHASES
+
+logger = logging.getLogger(__name__)
+
+# A set of phases is a bitmask over the phase codes: bit (1 << code).
+ALL_PHASES_MASK = (1 << len(PHASES)) - 1
+PHASE_BITS: Dict[str, int] = {phase: 1 << code for code, phase in enumerate(PHASES)}
+
+# Built-in rules, used when no rules file exists. Each category lists the
+# phases where it usually fits best and the other names it goes by.
+# "default" covers unknown categories.
+DEFAULT_RULES: Dict[str, Dict[str, Any]] = {
+    "social": {
+        "phases": ["follicular", "ovulation"],
+        "aliases": ["dating", "networking"],
+    },
+    "work": {
+        "phases": ["follicular", "ovulation", "luteal"],
+        "aliases": ["uni", "study", "deep_work"],
+    },
+    "sport": {
+        "phases": ["follicular", "ovulation"],
+        "aliases": ["workout", "exercise"],
+    },
+    "rest": {"phases": ["menstrual", "luteal"], "aliases": []},
+    "default": {"phases": list(PHASES), "aliases": []},
+}
+
+# MASK_PHASES[mask] -> phase slugs of that mask, in cycle order
+MASK_PHASES: Tuple[Tuple[str, ...], ...] = tuple(
+    tuple(phase for code, phase in enumerate(PHASES) if mask >> code & 1)
+    for mask in range(ALL_PHASES_MASK + 1)
+)
+
+
+def phase_mask(phases: Iterable[str]) -> int:
+    """
+    Bitmask of the given phase slugs; unknown slugs are ignored.
+    """
+    mask = 0
+    for phase in phases:
+        mask |= PHASE_BITS.get(phase, 0)
+    return mask
+
+
+def compile_rules(rules: Mapping[str, Mapping[str, Any]]) -> Tuple[Dict[str, int], int]:
+    """
+    Turn a rules dict (see DEFAULT_RULES) into {category or alias: mask},
+    keyed by lowercase name, and the mask for unknown categories.
+    """
+    masks: Dict[str, int] = {}
+    default_mask = ALL_PHASES_MASK
+    for category, rule in rules.items():
+        mask = phase_mask(rule.get("phases", ()))
+        if category.lower() == "default":
+            default_mask = mask
+            continue
+        for name in [category, *rule.get("aliases", ())]:
+            masks[name.lower()] = mask
+    return masks, default_mask
+
+
+class RuleRegistry:
+    """
+    Category -> target-phase rules, compiled into one bitmask per category
+    and alias. Rules come from a JSON file shaped like DEFAULT_RULES, or the
+    built-in ones if there is no such file. reload() compiles a new table
+    and swaps it in with a single assignment, so lookups never see a
+    half-built one.
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path
+        self._table: Tuple[Dict[str, int], int] = compile_rules(DEFAULT_RULES)
+        self.reload()
+
+    def _read(self) -> Mapping[str, Mapping[str, Any]]:
+        if not self.path or not os.path.exists(self.path):
+            return DEFAULT_RULES
+        with open(self.path, "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    def reload(self) -> None:
+        """
+        Re-read and compile the rules. On failure the old rules stay.
+        """
+        try:
+            self._table = compile_rules(self._read())
+        except Exception:
+            logger.exception("Loading planning rules from %s failed", self.path)
+
+    def mask_for(self, category: str) -> int:
+        masks, default_mask = self._table
+        mask = masks.get(category)
+        if mask is None:
+            mask = masks.get(category.lower(), default_mask)
+        return mask
+
+    def fits(self, category: str, phase: str) -> bool:
+        """
+        Whether phase is one of category's target phases.
+        """
+        return bool(self.mask_for(category) & PHASE_BITS.get(phase, 0))
+
+    def fit_many(self, categories: Sequence[str], codes: Sequence[int]) -> np.ndarray:
+        """
+        Batched fits: bool array, True where phase code codes[i] is a target
+        phase of categories[i].
+        """
+        lookup: Dict[str, int] = {}
+        masks = np.empty(len(categories), dtype=np.int64)
+        for i, category in enumerate(categories):
+            mask = lookup.get(category)
+            if mask is None:
+                mask = lookup[category] = self.mask_for(category)
+            masks[i] = mask
+        return (masks >> np.asarray(codes, dtype=np.int64) & 1).astype(bool)
+
+    def categories(self) -> Dict[str, List[str]]:
+        """
+        Category or alias -> target phases, for inspection.
+        """
+        masks, default_mask = self._table
+        result = {name: list(MASK_PHASES[mask]) for name, mask in masks.items()}
+        result["default"] = list(MASK_PHASES[default_mask])
+        return result
+
+
+# process-wide rules; reload with reload_rules()
+rules = RuleRegistry(config.PLANNING_RULES_PATH)
+
+
+def reload_rules() -> None:
+    rules.reload()
+
+
+def category_target_phases(category: str) -> List[str]:
     """
     Map a task category to the menstrual phases where it usually fits best.
     """
-    category = category.lower()
-    if category in {"social", "dating", "networking"}:
-        return ["follicular", "ovulation"]
-    if category in {"work", "uni", "study", "deep_work"}:
-        return ["follicular", "ovulation", "luteal"]
-    if category in {"sport", "workout", "exercise"}:
-        return ["follicular", "ovulation"]
-    if category in {"rest"}:
-        return ["menstrual", "luteal"]
-    # default: accept all phases
-    return ["menstrual", "follicular", "ovulation", "luteal"]
+    return list(MASK_PHASES[rules.mask_for(category)])
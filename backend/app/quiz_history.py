@@ -0,0 +1,101 @@
+from array import array
+from bisect import bisect_left
+from datetime import datetime, timezone
+from typing import Callable, Dict, Any, Optional
+
+QUIZ_FIELDS = ("stress", "concentration", "energy", "workout", "social")
+
+
+class QuizHistory:
+    """
+    Every weekly check-in of one user, stored column-wise: one typed array
+    per answer plus a timestamp column (UTC epoch seconds, append order).
+    A check-in costs a few bytes instead of a dict per submission, and
+    window queries are a bisect on the timestamp column.
+    """
+
+    __slots__ = ("timestamp",) + QUIZ_FIELDS
+
+    def __init__(self):
+        self.timestamp = array("d")
+        for field in QUIZ_FIELDS:
+            setattr(self, field, array("h"))
+
+    def __len__(self) -> int:
+        return len(self.timestamp)
+
+    def append(self, timestamp: float, **answers: int) -> None:
+        # check-ins arrive in time order; clamp so the column stays sorted
+        if self.timestamp and timestamp < self.timestamp[-1]:
+            timestamp = self.timestamp[-1]
+        self.timestamp.append(timestamp)
+        for field in QUIZ_FIELDS:
+            getattr(self, field).append(int(answers[field]))
+
+    def since(self, timestamp: float) -> int:
+        """
+        Index of the first check-in at or after timestamp.
+        """
+        return bisect_left(self.timestamp, timestamp)
+
+    def to_dict(self, count: Optional[int] = None) -> Dict[str, list]:
+        """
+        The columns as lists; only the first count check-ins if given.
+        """
+        if count is None:
+            return {field: getattr(self, field).tolist() for field in self.__slots__}
+        return {
+            field: getattr(self, field)[:count].tolist() for field in self.__slots__
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, list]) -> "QuizHistory":
+        history = cls()
+        for field in cls.__slots__:
+            getattr(history, field).extend(data.get(field, []))
+        return history
+
+
+def _averages(history: QuizHistory, indexes) -> Dict[str, Any]:
+    count = len(indexes)
+    result: Dict[str, Any] = {"count": count}
+    for field in QUIZ_FIELDS:
+        column = getattr(history, field)
+        result[field] = (
+            round(sum(column[i] for i in indexes) / count, 2) if count else None
+        )
+    return result
+
+
+def rolling_averages(
+    history: QuizHistory,
+    weeks: int,
+    now: Optional[float] = None,
+    phase_for: Optional[Callable] = None,
+) -> Dict[str, Any]:
+    """
+    Average answers over the last `weeks` weeks.
+    If phase_for (date -> phase slug) is given, the window is also broken
+    down by the cycle phase each check-in fell into.
+    """
+    if now is None:
+        now = datetime.now(timezone.utc).timestamp()
+
+    start = history.since(now - weeks * 7 * 24 * 3600)
+    indexes = range(start, len(history))
+    summary: Dict[str, Any] = {
+        "weeks": weeks,
+        "overall": _averages(history, indexes),
+    }
+
+    if phase_for is not None:
+        by_phase: Dict[str, list] = {}
+        for i in indexes:
+            day = datetime.fromtimestamp(history.timestamp[i], timezone.utc).date()
+            by_phase.setdefault(phase_for(day), []).append(i)
+        summary["by_phase"] = {
+            phase: _averages(history, phase_indexes)
+            for phase, phase_indexes in by_phase.items()
+        }
+
+    return summary
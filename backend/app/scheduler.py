@@ -0,0 +1,600 @@
+import heapq
+import itertools
+import logging
+import math
+import threading
+import time
+from datetime import date, datetime, timedelta, time as dt_time
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+from .phase_engine import PHASES, ProfileContext, ProfileError, get_profile_context
+from .planning_rules import rules
+from .storage import PROFILES, on_profile_saved
+
+logger = logging.getLogger(__name__)
+
+# upper bound for one sleep of the worker, so a wall-clock jump is noticed
+MAX_SLEEP = 60.0
+
+
+class PhaseTransition(NamedTuple):
+    user_id: str
+    day: date  # first day of the new phase
+    phase: str
+    previous_phase: str
+
+
+def _midnight(day: date) -> float:
+    # transitions happen at local midnight, like date.today() rolling over
+    return datetime.combine(day, dt_time.min).timestamp()
+
+
+class PhaseScheduler:
+    """
+    Min-heap of every user's next phase transition, keyed by the timestamp
+    at which it happens. The worker thread sleeps until the earliest entry
+    is due, hands it to the handlers and pushes that user's following
+    transition, so a day costs a heap operation per transition instead of
+    a scan over all profiles.
+    Rescheduling a user (e.g. after a profile save) pushes a new entry;
+    the old one stays in the heap and is skipped when popped.
+    """
+
+    def __init__(self, clock: Callable[[], float] = time.time):
+        self._clock = clock
+        self._heap: List[Tuple[float, int, PhaseTransition]] = []
+        # user_id -> sequence number of the user's live heap entry
+        self._entries: Dict[str, int] = {}
+        self._seq = itertools.count()
+        self._handlers: List[Callable[[PhaseTransition], None]] = []
+        self._cond = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+        self._stopping = False
+        self._listening = False
+        self._emitted = 0
+
+    def add_handler(self, handler: Callable[[PhaseTransition], None]) -> None:
+        """
+        Register a callback that gets every due PhaseTransition.
+        Handlers run on the scheduler thread and should not block.
+        """
+        self._handlers.append(handler)
+
+    def _today(self) -> date:
+        return date.fromtimestamp(self._clock())
+
+    def _next_transition(
+        self, user_id: str, after: date
+    ) -> Optional[PhaseTransition]:
+        try:
+            context = get_profile_context(user_id)
+        except ProfileError:
+            return None
+        change = context.next_transition(after)
+        if change is None:
+            return None
+        day, phase = change
+        return PhaseTransition(user_id, day, phase, context.phase_for(after))
+
+    def _push(self, transition: PhaseTransition) -> None:
+        # caller holds self._cond
+        seq = next(self._seq)
+        self._entries[transition.user_id] = seq
+        heapq.heappush(self._heap, (_midnight(transition.day), seq, transition))
+
+    def schedule(
+        self, user_id: str, after: Optional[date] = None
+    ) -> Optional[PhaseTransition]:
+        """
+        (Re)compute the user's next transition after `after` (default:
+        today) and replace the user's heap entry with it.
+        """
+        transition = self._next_transition(user_id, after or self._today())
+        with self._cond:
+            if transition is None:
+                self._entries.pop(user_id, None)
+            else:
+                self._push(transition)
+            self._compact()
+            self._cond.notify()
+        return transition
+
+    def unschedule(self, user_id: str) -> None:
+        with self._cond:
+            self._entries.pop(user_id, None)
+
+    def _compact(self) -> None:
+        # drop stale entries once they outnumber the live ones
+        if len(self._heap) <= 2 * len(self._entries) + 64:
+            return
+        self._heap = [
+            entry
+            for entry in self._heap
+            if self._entries.get(entry[2].user_id) == entry[1]
+        ]
+        heapq.heapify(self._heap)
+
+    def load(self) -> int:
+        """
+        Schedule every profile in one go (heapify instead of a push per
+        user). Returns the number of scheduled users.
+        """
+        today = self._today()
+        transitions = [
+            transition
+            for transition in (
+                self._next_transition(user_id, today) for user_id in list(PROFILES)
+            )
+            if transition is not None
+        ]
+        with self._cond:
+            self._heap = []
+            self._entries = {}
+            for transition in transitions:
+                seq = next(self._seq)
+                self._entries[transition.user_id] = seq
+                self._heap.append((_midnight(transition.day), seq, transition))
+            heapq.heapify(self._heap)
+            self._cond.notify()
+        return len(transitions)
+
+    def _pop_due(self) -> List[PhaseTransition]:
+        # caller holds self._cond
+        now = self._clock()
+        due: List[PhaseTransition] = []
+        while self._heap and self._heap[0][0] <= now:
+            _, seq, transition = heapq.heappop(self._heap)
+            if self._entries.get(transition.user_id) != seq:
+                continue  # superseded by a later schedule()
+            del self._entries[transition.user_id]
+            due.append(transition)
+        return due
+
+    def run_due(self) -> int:
+        """
+        Emit every transition that is due and schedule the users' next
+        ones. Returns the number of emitted transitions.
+        """
+        with self._cond:
+            due = self._pop_due()
+        for transition in due:
+            self._emit(transition)
+            self.schedule(transition.user_id, transition.day)
+        return len(due)
+
+    def _emit(self, transition: PhaseTransition) -> None:
+        self._emitted += 1
+        for handler in list(self._handlers):
+            try:
+                handler(transition)
+            except Exception:
+                logger.exception("Phase transition handler failed")
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                while not self._stopping:
+                    timeout = MAX_SLEEP
+                    if self._heap:
+                        timeout = min(timeout, self._heap[0][0] - self._clock())
+                        if timeout <= 0:
+                            break
+                    self._cond.wait(timeout)
+                if self._stopping:
+                    return
+            self.run_due()
+
+    def start(self) -> None:
+        """
+        Schedule all profiles, follow profile saves and start the worker.
+        """
+        if self._thread is not None:
+            return
+        self._stopping = False
+        self.load()
+        if not self._listening:
+            on_profile_saved(self.schedule)
+            self._listening = True
+        self._thread = threading.Thread(
+            target=self._run, name="phase-transition-scheduler", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self) -> None:
+        with self._cond:
+            self._stopping = True
+            self._cond.notify()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def stats(self) -> Dict[str, Any]:
+        with self._cond:
+            return {
+                "scheduled": len(self._entries),
+                "heap_size": len(self._heap),
+                "next_due": self._heap[0][0] if self._heap else None,
+                "emitted": self._emitted,
+            }
+
+
+# process-wide scheduler, started from the FastAPI lifespan hook
+scheduler = PhaseScheduler()
+
+
+# ---------- slot optimizer ----------
+
+# Costs minimised by optimize_slots. A day outside the task's target
+# phases costs more than moving the task several days, moving it by a day
+# more than any shift within a day, and every placement beats none.
+PHASE_MISS_COST = 10.0
+DAY_MOVE_COST = 1.0
+HOUR_MOVE_COST = 0.05
+UNSCHEDULED_COST = 1000.0
+
+
+class PlanTask(NamedTuple):
+    title: str
+    category: str
+    start: datetime  # wanted start (naive, local wall-clock time)
+    duration_hours: float
+
+
+class SlotAssignment(NamedTuple):
+    start: Optional[datetime]  # None if the task could not be placed
+    end: Optional[datetime]
+    phase: Optional[str]
+    fits_phase: bool
+    cost: float
+
+
+class SlotPlan(NamedTuple):
+    assignments: List[SlotAssignment]  # parallel to the tasks
+    score: float  # total cost, lower is better
+    iterations: int  # local-search moves tried
+
+
+class _SlotSolver:
+    """
+    Tasks on a grid of horizon_days x slots_per_day. Each day's occupancy
+    is an int bitmask (bit i = slot i taken), so "are these k slots free"
+    is one AND. A task occupies consecutive slots on a single day.
+    """
+
+    def __init__(
+        self,
+        context: ProfileContext,
+        tasks: Sequence[PlanTask],
+        busy: Sequence[Tuple[datetime, datetime]],
+        horizon_start: date,
+        horizon_days: int,
+        day_start_hour: int,
+        day_end_hour: int,
+        capacity_hours: float,
+        capacity_by_date: Dict[date, float],
+        slot_minutes: int,
+    ):
+        self.tasks = tasks
+        self.horizon_start = horizon_start
+        self.days = horizon_days
+        self.slot_minutes = slot_minutes
+        self.slots_per_day = (day_end_hour - day_start_hour) * 60 // slot_minutes
+        self.day_starts = [
+            datetime.combine(horizon_start + timedelta(days=d), dt_time(day_start_hour))
+            for d in range(horizon_days)
+        ]
+
+        _, _, codes = context.phases_between(
+            horizon_start, horizon_start + timedelta(days=horizon_days - 1)
+        )
+        self.phases = [PHASES[code] for code in codes.tolist()]
+
+        self.capacity = [
+            int(
+                capacity_by_date.get(day_start.date(), capacity_hours)
+                * 60
+                // slot_minutes
+            )
+            for day_start in self.day_starts
+        ]
+        self.load = [0] * horizon_days
+        self.occupied = [0] * horizon_days
+        for busy_start, busy_end in busy:
+            self._block(busy_start, busy_end)
+
+        # per task: slot count, wanted day/slot, target-phase fit per day
+        fits_by_category: Dict[str, List[bool]] = {}
+        self.length: List[int] = []
+        self.origin: List[Tuple[int, float]] = []
+        self.fits: List[List[bool]] = []
+        for task in tasks:
+            self.length.append(
+                max(1, math.ceil(task.duration_hours * 60 / slot_minutes))
+            )
+            origin_day = (task.start.date() - horizon_start).days
+            minutes = (task.start.hour - day_start_hour) * 60 + task.start.minute
+            self.origin.append((origin_day, minutes / slot_minutes))
+            fits = fits_by_category.get(task.category)
+            if fits is None:
+                mask = rules.mask_for(task.category)
+                fits = ((mask >> codes) & 1).astype(bool).tolist()
+                fits_by_category[task.category] = fits
+            self.fits.append(fits)
+
+        # per task: (day, slot) or None, and the cost of that placement
+        self.placement: List[Optional[Tuple[int, int]]] = [None] * len(tasks)
+        self.cost: List[float] = [UNSCHEDULED_COST] * len(tasks)
+
+    def _block(self, start: datetime, end: datetime) -> None:
+        slot = timedelta(minutes=self.slot_minutes)
+        first = max(0, (start.date() - self.horizon_start).days)
+        last = min(self.days - 1, (end.date() - self.horizon_start).days)
+        for d in range(first, last + 1):
+            day_start = self.day_starts[d]
+            lo = max(0, math.floor((start - day_start) / slot))
+            hi = min(self.slots_per_day, math.ceil((end - day_start) / slot))
+            if lo < hi:
+                self.occupied[d] |= ((1 << (hi - lo)) - 1) << lo
+
+    def _day_cost(self, t: int, d: int) -> float:
+        cost = DAY_MOVE_COST * abs(d - self.origin[t][0])
+        if not self.fits[t][d]:
+            cost += PHASE_MISS_COST
+        return cost
+
+    def _slot_cost(self, t: int, slot: int) -> float:
+        hours = abs(slot - self.origin[t][1]) * self.slot_minutes / 60
+        return HOUR_MOVE_COST * hours
+
+    def _nearest_free_slot(self, t: int, d: int) -> Optional[int]:
+        k = self.length[t]
+        last = self.slots_per_day - k
+        if last < 0:
+            return None
+        mask = (1 << k) - 1
+        occupied = self.occupied[d]
+        wanted = min(max(int(round(self.origin[t][1])), 0), last)
+        for distance in range(last + 1):
+            for slot in (wanted - distance, wanted + distance):
+                if 0 <= slot <= last and not occupied & (mask << slot):
+                    return slot
+            if wanted - distance < 0 and wanted + distance > last:
+                break
+        return None
+
+    def best_placement(self, t: int) -> Tuple[Optional[Tuple[int, int]], float]:
+        """
+        Cheapest free (day, slot) for task t given everything else placed.
+        """
+        k = self.length[t]
+        best: Optional[Tuple[int, int]] = None
+        best_cost = UNSCHEDULED_COST
+        for d in sorted(range(self.days), key=lambda d: self._day_cost(t, d)):
+            day_cost = self._day_cost(t, d)
+            if day_cost >= best_cost:
+                break
+            if self.load[d] + k > self.capacity[d]:
+                continue
+            slot = self._nearest_free_slot(t, d)
+            if slot is None:
+                continue
+            cost = day_cost + self._slot_cost(t, slot)
+            if cost < best_cost:
+                best, best_cost = (d, slot), cost
+        return best, best_cost
+
+    def place(self, t: int, placement: Optional[Tuple[int, int]], cost: float) -> None:
+        self.placement[t] = placement
+        self.cost[t] = cost
+        if placement is not None:
+            d, slot = placement
+            self.occupied[d] |= ((1 << self.length[t]) - 1) << slot
+            self.load[d] += self.length[t]
+
+    def remove(self, t: int) -> None:
+        placement = self.placement[t]
+        if placement is not None:
+            d, slot = placement
+            self.occupied[d] &= ~(((1 << self.length[t]) - 1) << slot)
+            self.load[d] -= self.length[t]
+        self.placement[t] = None
+        self.cost[t] = UNSCHEDULED_COST
+
+    def greedy(self) -> None:
+        # most constrained first (fewest days in the target phases), and
+        # short before long so a few long tasks cannot take the room of
+        # many short ones
+        order = sorted(
+            range(len(self.tasks)),
+            key=lambda t: (sum(self.fits[t]), self.length[t]),
+        )
+        for t in order:
+            self.place(t, *self.best_placement(t))
+
+    def _placed_cost(self, t: int, placement: Tuple[int, int]) -> float:
+        d, slot = placement
+        return self._day_cost(t, d) + self._slot_cost(t, slot)
+
+    def improve(self, deadline: float) -> int:
+        """
+        Local search until nothing improves or the deadline passes:
+        re-place every costly task at its best spot given the others,
+        swap phase-missing tasks with same-length tasks on days that fit
+        them, then trade placed tasks for unplaced ones (see eject).
+        Returns the number of moves tried.
+        """
+        iterations = 0
+        improved = True
+        while improved and time.perf_counter() < deadline:
+            improved = False
+
+            for t in sorted(range(len(self.tasks)), key=lambda t: -self.cost[t]):
+                if self.cost[t] <= 0 or time.perf_counter() >= deadline:
+                    break
+                iterations += 1
+                old_placement, old_cost = self.placement[t], self.cost[t]
+                self.remove(t)
+                placement, cost = self.best_placement(t)
+                if cost < old_cost - 1e-9:
+                    self.place(t, placement, cost)
+                    improved = True
+                else:
+                    self.place(t, old_placement, old_cost)
+
+            by_day: Dict[Tuple[int, int], List[int]] = {}
+            for t, placement in enumerate(self.placement):
+                if placement is not None:
+                    by_day.setdefault((placement[0], self.length[t]), []).append(t)
+
+            for a, placement_a in enumerate(self.placement):
+                if time.perf_counter() >= deadline:
+                    break
+                if placement_a is None or self.fits[a][placement_a[0]]:
+                    continue
+                k = self.length[a]
+                for d in range(self.days):
+                    if not self.fits[a][d] or d == placement_a[0]:
+                        continue
+                    swapped = False
+                    for b in by_day.get((d, k), ()):
+                        iterations += 1
+                        placement_b = self.placement[b]
+                        if placement_b is None or placement_b[0] != d:
+                            continue
+                        cost_a = self._placed_cost(a, placement_b)
+                        cost_b = self._placed_cost(b, placement_a)
+                        if cost_a + cost_b < self.cost[a] + self.cost[b] - 1e-9:
+                            # same length: occupancy and load stay as they are
+                            self.placement[a], self.placement[b] = placement_b, placement_a
+                            self.cost[a], self.cost[b] = cost_a, cost_b
+                            by_day[(d, k)].remove(b)
+                            by_day.setdefault((placement_a[0], k), []).append(b)
+                            improved = swapped = True
+                            break
+                    if swapped:
+                        break
+            traded, tried = self.eject(deadline)
+            iterations += tried
+            improved = improved or traded
+        return iterations
+
+    def eject(self, deadline: float) -> Tuple[bool, int]:
+        """
+        Trade one placed task for unplaced ones: free its slots, fill its
+        day with unplaced tasks (shortest first), re-place it wherever it
+        still fits, and keep the change if the total cost went down.
+        A trade never lowers the number of placed tasks. Returns whether
+        any trade was kept and how many were tried.
+        """
+        unplaced = sorted(
+            (t for t, placement in enumerate(self.placement) if placement is None),
+            key=lambda t: self.length[t],
+        )
+        if not unplaced:
+            return False, 0
+
+        improved = False
+        tried = 0
+        placed = sorted(
+            (t for t, placement in enumerate(self.placement) if placement is not None),
+            key=lambda t: -self.length[t],
+        )
+        for p in placed:
+            if not unplaced or time.perf_counter() >= deadline:
+                break
+            if self.length[p] <= self.length[unplaced[0]]:
+                # only a longer task frees room for more than itself
+                continue
+            tried += 1
+            old_placement, old_cost = self.placement[p], self.cost[p]
+            d = old_placement[0]
+            self.remove(p)
+
+            inserted = []
+            for u in unplaced:
+                k = self.length[u]
+                if self.load[d] + k > self.capacity[d]:
+                    continue
+                slot = self._nearest_free_slot(u, d)
+                if slot is None:
+                    continue
+                self.place(u, (d, slot), self._placed_cost(u, (d, slot)))
+                inserted.append(u)
+            if not inserted:
+                self.place(p, old_placement, old_cost)
+                continue
+
+            self.place(p, *self.best_placement(p))
+            before = old_cost + UNSCHEDULED_COST * len(inserted)
+            after = self.cost[p] + sum(self.cost[u] for u in inserted)
+            if after < before - 1e-9:
+                improved = True
+                taken = set(inserted)
+                unplaced = [u for u in unplaced if u not in taken]
+                if self.placement[p] is None:
+                    unplaced.append(p)
+                    unplaced.sort(key=lambda t: self.length[t])
+            else:
+                self.remove(p)
+                for u in inserted:
+                    self.remove(u)
+                self.place(p, old_placement, old_cost)
+        return improved, tried
+
+    def result(self, iterations: int) -> SlotPlan:
+        slot = timedelta(minutes=self.slot_minutes)
+        assignments = []
+        for t, placement in enumerate(self.placement):
+            if placement is None:
+                assignments.append(SlotAssignment(None, None, None, False, self.cost[t]))
+                continue
+            d, first_slot = placement
+            start = self.day_starts[d] + first_slot * slot
+            assignments.append(
+                SlotAssignment(
+                    start=start,
+                    end=start + timedelta(hours=self.tasks[t].duration_hours),
+                    phase=self.phases[d],
+                    fits_phase=self.fits[t][d],
+                    cost=self.cost[t],
+                )
+            )
+        return SlotPlan(assignments, sum(self.cost), iterations)
+
+
+def optimize_slots(
+    context: ProfileContext,
+    tasks: Sequence[PlanTask],
+    busy: Sequence[Tuple[datetime, datetime]],
+    horizon_start: date,
+    horizon_days: int,
+    day_start_hour: int = 8,
+    day_end_hour: int = 20,
+    capacity_hours: float = 8.0,
+    capacity_by_date: Optional[Dict[date, float]] = None,
+    slot_minutes: int = 30,
+    time_budget: float = 0.5,
+) -> SlotPlan:
+    """
+    Assign a start time to every task inside [day_start_hour, day_end_hour)
+    of the horizon days so that no two tasks or busy intervals overlap and
+    no day holds more than its capacity of task hours, preferring days in
+    the task category's target phases close to the wanted start.
+    Greedy construction, then local search for up to time_budget seconds.
+    """
+    deadline = time.perf_counter() + time_budget
+    solver = _SlotSolver(
+        context,
+        tasks,
+        busy,
+        horizon_start,
+        horizon_days,
+        day_start_hour,
+        day_end_hour,
+        capacity_hours,
+        capacity_by_date or {},
+        slot_minutes,
+    )
+    solver.greedy()
+    iterations = solver.improve(deadline)
+    return solver.result(iterations)
@@ -1,87 +1,756 @@
 import json
+import logging
 import os
+import sys
+import threading
+import time
+from contextlib import ExitStack
+from datetime import date
 from uuid import uuid4
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Callable, List, Optional, Tuple, Union
 
 from google.oauth2.credentials import Credentials
 
-DATA_DIR = os.path.dirname(__file__)
+from . import config
+from .quiz_history import QuizHistory
+from .storage_shards import ShardSet, ShardedTable
+from .storage_snapshot import dump_binary, load_binary
+from .storage_sqlite import SqliteStore
+
+logger = logging.getLogger(__name__)
+
+DATA_DIR = config.DATA_DIR
 DB_PATH = os.path.join(DATA_DIR, "db.json")
+# binary snapshot written instead of db.json when SNAPSHOT_FORMAT is "binary"
+SNAPSHOT_PATH = os.path.join(DATA_DIR, "db.snapshot")
+# append-only log of changes since the last snapshot (journal mode only)
+JOURNAL_PATH = os.path.join(DATA_DIR, "db.journal")
+# journal being folded into db.json by a running compaction
+COMPACTING_JOURNAL_PATH = JOURNAL_PATH + ".compacting"
+# users of the sharded mode (profiles and tokens live in config.SHARD_DIR)
+USERS_PATH = os.path.join(DATA_DIR, "users.json")
+# user changes since users.json was written (sharded mode only); folded
+# into users.json on the next start
+USERS_JOURNAL_PATH = os.path.join(DATA_DIR, "users.journal")
+
+
+class Profile:
+    """
+    A user's cycle profile, parsed once when it is loaded or saved:
+    last_period_start is a date, cycle_length and menstruation_phase_duration
+    are ints and symptoms is a tuple of interned strings.
+    Fields the stored dict did not have are None and to_dict() leaves them
+    out again; keys it does not know are kept in `extra` and written back,
+    so the db.json shape round-trips unchanged.
+    """
+
+    # stored fields, in db.json order
+    _FIELDS = (
+        "user_id",
+        "last_period_start",
+        "cycle_length",
+        "menstruation_phase_duration",
+        "symptoms",
+        "medication",
+        "workout_intensity",
+        "weekly_quiz",
+    )
+    __slots__ = _FIELDS + ("extra",)
+
+    def __init__(
+        self,
+        user_id: str,
+        last_period_start=None,
+        cycle_length: Optional[int] = None,
+        menstruation_phase_duration: Optional[int] = None,
+        symptoms=None,
+        medication: Optional[str] = None,
+        workout_intensity: Optional[str] = None,
+        weekly_quiz: Optional[Dict[str, int]] = None,
+        extra: Optional[Dict[str, Any]] = None,
+    ):
+        self.user_id = user_id
+        self.last_period_start = _as_date(last_period_start)
+        self.cycle_length = None if cycle_length is None else int(cycle_length)
+        self.menstruation_phase_duration = (
+            None
+            if menstruation_phase_duration is None
+            else int(menstruation_phase_duration)
+        )
+        self.symptoms = (
+            None if symptoms is None else tuple(sys.intern(str(s)) for s in symptoms)
+        )
+        self.medication = medication
+        self.workout_intensity = workout_intensity
+        self.weekly_quiz = weekly_quiz
+        self.extra = extra
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "Profile":
+        fields = {field: data.get(field) for field in cls._FIELDS}
+        extra = {key: value for key, value in data.items() if key not in fields}
+        return cls(**fields, extra=extra or None)
+
+    def to_dict(self) -> Dict[str, Any]:
+        data: Dict[str, Any] = {}
+        for field in self._FIELDS:
+            value = getattr(self, field)
+            if value is None:
+                continue
+            if isinstance(value, date):
+                value = value.isoformat()
+            elif isinstance(value, tuple):
+                value = list(value)
+            data[field] = value
+        if self.extra:
+            data.update(self.extra)
+        return data
+
 
-# in-memory mirrors
+def _as_date(value):
+    """
+    Parse an ISO date string. Unparseable strings are kept as they are so
+    nothing is lost on save; the endpoints report them as invalid.
+    """
+    if isinstance(value, str):
+        try:
+            return date.fromisoformat(value)
+        except ValueError:
+            return value
+    return value
+
+
+# in-memory mirrors (PROFILES and TOKENS are lazy ShardedTables in sharded mode)
 USERS: Dict[str, Dict[str, Any]] = {}
-PROFILES: Dict[str, Dict[str, Any]] = {}
+PROFILES: Dict[str, Profile] = {}
 TOKENS: Dict[str, Dict[str, Any]] = {}
+# every weekly quiz per user; profile.weekly_quiz keeps only the latest
+QUIZ_HISTORY: Dict[str, QuizHistory] = {}
 
+# bumped by save_profile; anything cached per profile is keyed on it
+_profile_versions: Dict[str, int] = {}
+# called with the user_id after save_profile (see on_profile_saved)
+_profile_listeners: List[Callable[[str], None]] = []
 
-def _load_db() -> None:
+# (decode, encode) between the in-memory record types and the stored shape
+_CODECS = {
+    "profiles": (Profile.from_dict, Profile.to_dict),
+    "quiz_history": (QuizHistory.from_dict, QuizHistory.to_dict),
+}
+# normalized email -> user id, kept in sync with USERS
+EMAIL_INDEX: Dict[str, str] = {}
+
+# set by _load_db in sqlite / sharded mode
+_sqlite: Optional[SqliteStore] = None
+_shards: Optional[ShardSet] = None
+
+# FastAPI runs the sync handlers on a threadpool: every change to the
+# mirrors and every read of them for persistence happens under this lock.
+_state_lock = threading.RLock()
+
+# group commit of full db.json rewrites (see _save_db)
+_commit_cond = threading.Condition()
+_commit_requested = 0
+_commit_durable = 0
+_commit_leader = False
+
+# one lock per file written by the sharded mode, so an older snapshot of a
+# shard can never be renamed over a newer one
+_file_locks: Dict[str, threading.Lock] = {}
+
+# write-behind queue: (table, key) -> monotonic time it was first dirtied
+_dirty: Dict[Tuple[str, str], float] = {}
+_flush_lock = threading.Lock()
+_flush_wakeup = threading.Event()
+_flush_stats: Dict[str, Any] = {
+    "flushes": 0,
+    "flushed_records": 0,
+    "last_flush_seconds": 0.0,
+}
+
+_journal_lock = threading.Lock()
+_journal_file = None
+_journal_records = 0
+_users_journal_file = None
+
+
+def _binary_snapshot_is_newer() -> bool:
+    if not os.path.exists(SNAPSHOT_PATH):
+        return False
+    if not os.path.exists(DB_PATH):
+        return True
+    return os.path.getmtime(SNAPSHOT_PATH) >= os.path.getmtime(DB_PATH)
+
+
+def _read_db_file() -> Dict[str, Any]:
     """
-    Load USERS, PROFILES and TOKENS from db.json if it exists.
+    Read the newest snapshot: db.snapshot if it is newer than db.json,
+    db.json otherwise. Returns an empty dict if neither can be read.
     """
-    global USERS, PROFILES, TOKENS
+    if _binary_snapshot_is_newer():
+        try:
+            data = load_binary(SNAPSHOT_PATH)
+        except Exception:
+            logger.exception("Reading %s failed", SNAPSHOT_PATH)
+            data = None
+        if data is not None:
+            return data
+        logger.warning("Ignoring unreadable db.snapshot, falling back to db.json")
 
     if not os.path.exists(DB_PATH):
-        USERS = {}
-        PROFILES = {}
-        TOKENS = {}
-        return
+        return {}
 
     try:
         with open(DB_PATH, "r", encoding="utf-8") as f:
-            data = json.load(f)
+            return json.load(f)
     except Exception:
-        USERS = {}
-        PROFILES = {}
-        TOKENS = {}
+        return {}
+
+
+def _replay_journal(path: str, tables: Dict[str, Dict[str, Any]]) -> int:
+    """
+    Apply every record of a journal file on top of the loaded tables.
+    A torn line (crash in the middle of an append) is skipped; the
+    compaction that follows the load drops it from disk.
+    Returns the number of records applied.
+    """
+    if not os.path.exists(path):
+        return 0
+
+    applied = 0
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                logger.warning("Skipping torn record in %s", path)
+                continue
+            tables[record["t"]][record["k"]] = record["v"]
+            applied += 1
+    return applied
+
+
+def _load_db() -> None:
+    """
+    Load USERS, PROFILES, TOKENS and QUIZ_HISTORY from db.json if it exists.
+    In sqlite mode they come from the database instead (db.json or
+    db.snapshot is migrated on the first start). In journal mode the journal is replayed
+    on top of the snapshot and then compacted, so the next start only has
+    to read db.json.
+    """
+    global USERS, PROFILES, TOKENS, QUIZ_HISTORY, _journal_records, _sqlite, _shards
+
+    if config.STORAGE_MODE == "sharded":
+        _load_shards()
+        _build_email_index()
         return
 
-    USERS = data.get("users", {})
-    PROFILES = data.get("profiles", {})
-    TOKENS = data.get("tokens", {})  # <-- this was never global before
+    if config.STORAGE_MODE == "sqlite":
+        _sqlite = SqliteStore(config.SQLITE_PATH)
+        if _sqlite.is_empty() and (
+            os.path.exists(DB_PATH) or os.path.exists(SNAPSHOT_PATH)
+        ):
+            # the newest of db.json and db.snapshot, as the other modes load it
+            legacy = _read_db_file()
+            _sqlite.import_data(legacy)
+            logger.info(
+                "Migrated %d users to %s",
+                len(legacy.get("users", {})),
+                config.SQLITE_PATH,
+            )
+        data = _sqlite.load_all()
+    else:
+        data = _read_db_file()
 
+    tables = {
+        "users": data.get("users", {}),
+        "profiles": data.get("profiles", {}),
+        "tokens": data.get("tokens", {}),
+        "quiz_history": data.get("quiz_history", {}),
+    }
+    if config.STORAGE_MODE == "journal":
+        _journal_records = _replay_journal(
+            COMPACTING_JOURNAL_PATH, tables
+        ) + _replay_journal(JOURNAL_PATH, tables)
 
-def _save_db() -> None:
+    for table, (decode, _) in _CODECS.items():
+        tables[table] = {key: decode(value) for key, value in tables[table].items()}
+
+    USERS = tables["users"]
+    PROFILES = tables["profiles"]
+    TOKENS = tables["tokens"]  # <-- this was never global before
+    QUIZ_HISTORY = tables["quiz_history"]
+
+    # compact whenever a journal file is left over, even one with only a
+    # torn tail: appending after a torn line would glue the next record
+    # onto it and lose everything after it on the next replay
+    if config.STORAGE_MODE == "journal" and (
+        os.path.exists(JOURNAL_PATH) or os.path.exists(COMPACTING_JOURNAL_PATH)
+    ):
+        _compact_journal()
+
+    _build_email_index()
+
+
+def _load_shards() -> None:
     """
-    Persist USERS, PROFILES and TOKENS to db.json.
+    Sharded mode: read users.json, fold users.journal into it, and set PROFILES / TOKENS / QUIZ_HISTORY
+    up as lazy views over the shard files. A legacy db.json is split into shards on
+    the first start.
+    """
+    global USERS, PROFILES, TOKENS, QUIZ_HISTORY, _shards
+
+    _shards = ShardSet(config.SHARD_DIR, config.SHARD_COUNT, codecs=_CODECS)
+
+    if not os.path.exists(USERS_PATH) and os.path.exists(DB_PATH):
+        legacy = _read_db_file()
+        _shards.import_data(legacy)
+        for shard in range(_shards.count):
+            _atomic_write(_shards.path(shard), _shards.serialize(shard))
+        _atomic_write(USERS_PATH, json.dumps(legacy.get("users", {}), ensure_ascii=False))
+        logger.info(
+            "Split db.json into %d shards in %s", _shards.count, config.SHARD_DIR
+        )
+
+    USERS = {}
+    if os.path.exists(USERS_PATH):
+        with open(USERS_PATH, "r", encoding="utf-8") as f:
+            USERS = json.load(f)
+    if os.path.exists(USERS_JOURNAL_PATH):
+        # fold the journal (and any torn tail) into a fresh users.json
+        _replay_journal(USERS_JOURNAL_PATH, {"users": USERS})
+        _atomic_write(USERS_PATH, json.dumps(USERS, ensure_ascii=False))
+        os.remove(USERS_JOURNAL_PATH)
+    PROFILES = ShardedTable(_shards, "profiles")
+    TOKENS = ShardedTable(_shards, "tokens")
+    QUIZ_HISTORY = ShardedTable(_shards, "quiz_history")
+
+
+def _normalize_email(email: str) -> str:
+    return email.strip().lower()
+
+
+def _build_email_index() -> None:
     """
-    data = {
+    Rebuild EMAIL_INDEX from USERS.
+    Older db.json files can hold the same address twice (different casing
+    or a register race); the first user wins and the rest are reported.
+    """
+    global EMAIL_INDEX
+
+    index: Dict[str, str] = {}
+    for user_id, user in USERS.items():
+        email = _normalize_email(user["email"])
+        if email in index:
+            logger.warning(
+                "Duplicate email %r in db: keeping user %s, ignoring user %s",
+                email,
+                index[email],
+                user_id,
+            )
+            continue
+        index[email] = user_id
+    EMAIL_INDEX = index
+
+
+def _tables() -> Dict[str, Dict[str, Any]]:
+    return {
         "users": USERS,
         "profiles": PROFILES,
         "tokens": TOKENS,
+        "quiz_history": QUIZ_HISTORY,
+    }
+
+
+def _snapshot_data() -> Dict[str, Any]:
+    data = {}
+    for table, rows in _tables().items():
+        if table in _CODECS:
+            encode = _CODECS[table][1]
+            rows = {key: encode(value) for key, value in rows.items()}
+        data[table] = rows
+    return data
+
+
+def _copy_tables() -> Dict[str, Dict[str, Any]]:
+    """
+    Shallow copy of the mirrors, to serialize after releasing _state_lock
+    (caller holds it). Saves replace records rather than change them,
+    except that quiz histories grow in place, so each is kept with its
+    current length, and a weekly quiz is set on the profile in place. A
+    quiz saved meanwhile may end up in the snapshot; its journal record
+    replays the same value over it on load.
+    """
+    tables = {table: dict(rows) for table, rows in _tables().items()}
+    tables["quiz_history"] = {
+        user_id: (history, len(history)) for user_id, history in QUIZ_HISTORY.items()
+    }
+    return tables
+
+
+def _encode_copy(tables: Dict[str, Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    _snapshot_data() of a _copy_tables() copy.
+    """
+    data = dict(tables)
+    data["profiles"] = {
+        user_id: profile.to_dict() for user_id, profile in tables["profiles"].items()
+    }
+    data["quiz_history"] = {
+        user_id: history.to_dict(count)
+        for user_id, (history, count) in tables["quiz_history"].items()
+    }
+    return data
+
+
+def _record_value(table: str, key: str) -> Any:
+    """
+    Current value of one record in its stored (db.json) shape.
+    """
+    value = _tables()[table][key]
+    if table in _CODECS:
+        value = _CODECS[table][1](value)
+    return value
+
+
+def _atomic_write(path: str, content: Union[str, bytes]) -> None:
+    """
+    Write content to path so readers see either the old or the new file:
+    temp file, fsync, then rename over the target.
+    """
+    if isinstance(content, str):
+        content = content.encode("utf-8")
+    tmp_path = f"{path}.{threading.get_ident()}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(content)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+def _serialize_snapshot(
+    data: Optional[Dict[str, Any]] = None,
+) -> Tuple[str, Union[str, bytes]]:
+    """
+    Serialize data (by default the mirrors, then the caller must hold
+    _state_lock) in the configured snapshot format.
+    Returns (path, content).
+    """
+    if data is None:
+        data = _snapshot_data()
+    if config.SNAPSHOT_FORMAT == "binary":
+        return SNAPSHOT_PATH, dump_binary(data)
+    return DB_PATH, json.dumps(data, ensure_ascii=False, indent=2)
+
+
+def _write_db_snapshot() -> None:
+    with _state_lock:
+        path, content = _serialize_snapshot()
+    _atomic_write(path, content)
+
+
+def _save_db() -> None:
+    """
+    Persist all mirrors to db.json (or db.snapshot).
+    Concurrent callers are group-committed: one of them writes a snapshot
+    covering every change requested so far while the others wait, and each
+    caller returns once a snapshot that includes its change is on disk.
+    """
+    global _commit_requested, _commit_durable, _commit_leader
+
+    with _commit_cond:
+        _commit_requested += 1
+        ticket = _commit_requested
+
+        while _commit_durable < ticket:
+            if _commit_leader:
+                _commit_cond.wait()
+                continue
+
+            _commit_leader = True
+            batch = _commit_requested
+            _commit_cond.release()
+            try:
+                _write_db_snapshot()
+            finally:
+                _commit_cond.acquire()
+                _commit_leader = False
+                _commit_cond.notify_all()
+            # only reached when the write succeeded; on failure the
+            # waiters wake up and one of them retries
+            _commit_durable = batch
+
+
+def _append_journal(table: str, key: str, value: Any) -> None:
+    """
+    Append one compact record to db.journal. Cost does not depend on
+    how many users are stored.
+    """
+    global _journal_file, _journal_records
+
+    line = json.dumps(
+        {"t": table, "k": key, "v": value},
+        ensure_ascii=False,
+        separators=(",", ":"),
+    )
+    with _journal_lock:
+        if _journal_file is None:
+            _journal_file = open(JOURNAL_PATH, "a", encoding="utf-8")
+        _journal_file.write(line + "\n")
+        _journal_file.flush()
+        _journal_records += 1
+
+
+def _compact_journal() -> None:
+    """
+    Fold the journal into a fresh db.json snapshot.
+    The journal swap and a shallow copy of the mirrors happen under
+    _state_lock, so the snapshot holds at least the swapped-out records;
+    writers wait for those, but not for the serialization or the write.
+    """
+    global _journal_file, _journal_records
+
+    with _state_lock, _journal_lock:
+        if (
+            _journal_records == 0
+            and not os.path.exists(JOURNAL_PATH)
+            and not os.path.exists(COMPACTING_JOURNAL_PATH)
+        ):
+            return
+
+        if _journal_file is not None:
+            _journal_file.close()
+            _journal_file = None
+
+        if os.path.exists(JOURNAL_PATH):
+            if os.path.exists(COMPACTING_JOURNAL_PATH):
+                # a previous compaction failed: keep its records too
+                with open(COMPACTING_JOURNAL_PATH, "ab+") as dst, \
+                        open(JOURNAL_PATH, "rb") as src:
+                    # never glue a record onto a torn last line
+                    end = dst.seek(0, os.SEEK_END)
+                    if end > 0:
+                        dst.seek(end - 1)
+                        if dst.read(1) != b"\n":
+                            dst.write(b"\n")
+                    dst.write(src.read())
+                os.remove(JOURNAL_PATH)
+            else:
+                os.replace(JOURNAL_PATH, COMPACTING_JOURNAL_PATH)
+
+        tables = _copy_tables()
+        _journal_records = 0
+
+    path, snapshot = _serialize_snapshot(_encode_copy(tables))
+    _atomic_write(path, snapshot)
+    os.remove(COMPACTING_JOURNAL_PATH)
+
+
+def _compaction_loop() -> None:
+    while True:
+        time.sleep(config.JOURNAL_COMPACT_INTERVAL)
+        try:
+            _compact_journal()
+        except Exception:
+            logger.exception("Journal compaction failed")
+
+
+def _write_records(keys: List[Tuple[str, str]]) -> None:
+    """
+    Persist the current value of the given (table, key) records.
+    Journal mode appends them to db.journal, sqlite mode upserts their rows
+    in one transaction, json mode group-commits a db.json rewrite.
+    Must be called without holding _state_lock. Values are read under the
+    lock, so when two threads race on one record the last writer always
+    persists the newest state.
+    """
+    if config.STORAGE_MODE == "json":
+        _save_db()
+        return
+
+    if config.STORAGE_MODE == "sharded":
+        _write_shards(keys)
+        return
+
+    with _state_lock:
+        records = [(table, key, _record_value(table, key)) for table, key in keys]
+        if config.STORAGE_MODE == "sqlite":
+            _sqlite.put_many(records)
+        else:
+            for table, key, value in records:
+                _append_journal(table, key, value)
+
+
+def _write_shards(keys: List[Tuple[str, str]]) -> None:
+    """
+    Rewrite only the files touched by the given records: the owning shard
+    file for profiles and tokens. Users are appended to users.journal, so
+    a registration does not rewrite every user.
+    """
+    global _users_journal_file
+
+    user_ids = [key for table, key in keys if table == "users"]
+    if user_ids:
+        with _state_lock:
+            lines = [
+                json.dumps(
+                    {"t": "users", "k": user_id, "v": USERS[user_id]},
+                    ensure_ascii=False,
+                    separators=(",", ":"),
+                )
+                for user_id in user_ids
+            ]
+        with _journal_lock:
+            if _users_journal_file is None:
+                _users_journal_file = open(USERS_JOURNAL_PATH, "a", encoding="utf-8")
+            _users_journal_file.write("".join(line + "\n" for line in lines))
+            _users_journal_file.flush()
+
+    shards = {_shards.shard_of(key) for table, key in keys if table != "users"}
+    paths = {_shards.path(shard) for shard in shards}
+
+    with ExitStack() as stack:
+        for path in sorted(paths):
+            with _state_lock:
+                lock = _file_locks.setdefault(path, threading.Lock())
+            stack.enter_context(lock)
+
+        with _state_lock:
+            files = {_shards.path(shard): _shards.serialize(shard) for shard in shards}
+
+        for path, text in files.items():
+            _atomic_write(path, text)
+
+
+def _persist(table: str, key: str) -> None:
+    """
+    Persist one changed record, or queue it for the flusher thread in
+    write-behind mode so the request does not wait on disk I/O.
+    """
+    if not config.WRITE_BEHIND:
+        _write_records([(table, key)])
+        return
+
+    with _state_lock:
+        _dirty.setdefault((table, key), time.monotonic())
+        queue_depth = len(_dirty)
+    if queue_depth >= config.FLUSH_DIRTY_THRESHOLD:
+        _flush_wakeup.set()
+
+
+def flush() -> None:
+    """
+    Persist every record queued by write-behind mode.
+    Called by the flusher thread and on shutdown.
+    """
+    with _flush_lock:
+        with _state_lock:
+            pending = dict(_dirty)
+            _dirty.clear()
+        if not pending:
+            return
+
+        started = time.monotonic()
+        try:
+            _write_records(list(pending))
+        except Exception:
+            # put them back (keeping their original age) for the next round
+            with _state_lock:
+                for record, dirtied_at in pending.items():
+                    _dirty[record] = min(dirtied_at, _dirty.get(record, dirtied_at))
+            raise
+
+        _flush_stats["flushes"] += 1
+        _flush_stats["flushed_records"] += len(pending)
+        _flush_stats["last_flush_seconds"] = time.monotonic() - started
+
+
+def _flush_loop() -> None:
+    while True:
+        _flush_wakeup.wait(config.FLUSH_INTERVAL)
+        _flush_wakeup.clear()
+        try:
+            flush()
+        except Exception:
+            logger.exception("Write-behind flush failed")
+
+
+def write_behind_stats() -> Dict[str, Any]:
+    """
+    Queue depth and flush lag (age of the oldest unflushed change) of the
+    write-behind queue, plus flush counters.
+    """
+    with _state_lock:
+        queue_depth = len(_dirty)
+        oldest = min(_dirty.values(), default=None)
+    return {
+        "enabled": config.WRITE_BEHIND,
+        "queue_depth": queue_depth,
+        "flush_lag_seconds": time.monotonic() - oldest if oldest is not None else 0.0,
+        **_flush_stats,
     }
-    with open(DB_PATH, "w", encoding="utf-8") as f:
-        json.dump(data, f, ensure_ascii=False, indent=2)
+
+
+def shutdown() -> None:
+    """
+    Flush queued writes and close open files/connections.
+    Called from the FastAPI lifespan hook.
+    """
+    global _journal_file, _users_journal_file
+
+    flush()
+    with _journal_lock:
+        if _journal_file is not None:
+            _journal_file.close()
+            _journal_file = None
+        if _users_journal_file is not None:
+            _users_journal_file.close()
+            _users_journal_file = None
+    if _sqlite is not None:
+        _sqlite.close()
 
 
 # load once at import
 _load_db()
 
+if config.STORAGE_MODE == "journal":
+    threading.Thread(
+        target=_compaction_loop, name="db-journal-compactor", daemon=True
+    ).start()
+
+if config.WRITE_BEHIND:
+    threading.Thread(
+        target=_flush_loop, name="db-write-behind-flusher", daemon=True
+    ).start()
+
 
 def create_user(email: str) -> Dict[str, Any]:
     """
     Create a new user (or return existing if same email).
     Email is the only identifier for now.
     """
-    existing = get_user_by_email(email)
-    if existing:
-        return existing
+    with _state_lock:
+        existing = get_user_by_email(email)
+        if existing:
+            return existing
 
-    user_id = str(uuid4())
-    user = {
-        "id": user_id,
-        "email": email.lower(),
-    }
-    USERS[user_id] = user
-    _save_db()
+        user_id = str(uuid4())
+        user = {
+            "id": user_id,
+            "email": _normalize_email(email),
+        }
+        USERS[user_id] = user
+        EMAIL_INDEX[user["email"]] = user_id
+
+    _persist("users", user_id)
     return user
 
 
 def get_user_by_email(email: str) -> Optional[Dict[str, Any]]:
-    email = email.lower()
-    for user in USERS.values():
-        if user["email"] == email:
-            return user
-    return None
+    user_id = EMAIL_INDEX.get(_normalize_email(email))
+    if user_id is None:
+        return None
+    return USERS.get(user_id)
 
 
 def save_profile(
@@ -93,28 +762,58 @@ def save_profile(
     symptoms,
     medication: str,
     workout_intensity: str,
-) -> Dict[str, Any]:
-    profile = {
-        "user_id": user_id,
-        "last_period_start": str(last_period_start),  # ISO string
-        "cycle_length": cycle_length,
-        "menstruation_phase_duration": menstruation_phase_duration,
-        "symptoms": symptoms or [],
-        "medication": medication,
-        "workout_intensity": workout_intensity,
-    }
-    PROFILES[user_id] = profile
-    _save_db()
+) -> Profile:
+    profile = Profile(
+        user_id=user_id,
+        last_period_start=last_period_start,  # date, stored as ISO string
+        cycle_length=cycle_length,
+        menstruation_phase_duration=menstruation_phase_duration,
+        symptoms=symptoms or [],
+        medication=medication,
+        workout_intensity=workout_intensity,
+    )
+    with _state_lock:
+        # keys this version does not know about survive a re-save
+        previous = PROFILES.get(user_id)
+        if previous is not None:
+            profile.extra = previous.extra
+        PROFILES[user_id] = profile
+        _profile_versions[user_id] = _profile_versions.get(user_id, 0) + 1
+    _persist("profiles", user_id)
+
+    for listener in _profile_listeners:
+        listener(user_id)
     return profile
 
 
+def profile_version(user_id: str) -> int:
+    """
+    Counter bumped on every save_profile for this user (0 before the first
+    save in this process). Used as cache key for derived data.
+    """
+    return _profile_versions.get(user_id, 0)
+
+
+def on_profile_saved(listener: Callable[[str], None]) -> None:
+    """
+    Register a callback that gets the user_id after each save_profile.
+    """
+    _profile_listeners.append(listener)
+
+
 def save_google_tokens(user_id: str, creds: Credentials) -> None:
     """
     Store Google OAuth tokens for this user in db.json.
     Called from the /api/google/oauth2callback handler.
     """
-    TOKENS[user_id] = json.loads(creds.to_json())
-    _save_db()
+    token_info = json.loads(creds.to_json())
+    with _state_lock:
+        TOKENS[user_id] = token_info
+    _persist("tokens", user_id)
+
+
+def get_quiz_history(user_id: str) -> Optional[QuizHistory]:
+    return QUIZ_HISTORY.get(user_id)
 
 
 def load_google_credentials(user_id: str) -> Optional[Credentials]:
@@ -138,17 +837,27 @@ def save_weekly_quiz(
 ) -> Dict[str, Any]:
     """
     Store the latest weekly quiz answers on the user's profile
-    under the key 'weekly_quiz'.
+    under the key 'weekly_quiz' and append them to QUIZ_HISTORY.
     """
-    profile = PROFILES.get(user_id) or {"user_id": user_id}
-    profile["weekly_quiz"] = {
+    weekly_quiz = {
         "stress": stress,
         "concentration": concentration,
         "energy": energy,
         "workout": workout,
         "social": social,
     }
-    PROFILES[user_id] = profile
-    _save_db()
-    return profile["weekly_quiz"]
+    with _state_lock:
+        profile = PROFILES.get(user_id) or Profile(user_id)
+        profile.weekly_quiz = weekly_quiz
+        PROFILES[user_id] = profile
+
+        history = QUIZ_HISTORY.get(user_id)
+        if history is None:
+            history = QuizHistory()
+            QUIZ_HISTORY[user_id] = history
+        history.append(time.time(), **weekly_quiz)
+
+    _persist("profiles", user_id)
+    _persist("quiz_history", user_id)
+    return weekly_quiz
 
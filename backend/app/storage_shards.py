@@ -0,0 +1,126 @@
+import json
+import os
+import threading
+import zlib
+from collections.abc import MutableMapping
+from typing import Dict, Any, Callable, Iterator, Optional, Tuple
+
+# tables that live in the per-user shard files (users stay in users.json,
+# the email index needs all of them at startup anyway)
+SHARDED_TABLES = ("profiles", "tokens", "quiz_history")
+
+
+class ShardSet:
+    """
+    Profiles, tokens and quiz history split over `count` JSON files by a stable hash of
+    the user_id. A shard is read from disk the first time one of its users
+    is touched, so startup does not parse data nobody asked for.
+    `codecs` maps a table to (decode, encode) functions applied to its
+    values when a shard is read and serialized.
+    """
+
+    def __init__(
+        self,
+        directory: str,
+        count: int,
+        codecs: Optional[Dict[str, Tuple[Callable, Callable]]] = None,
+    ):
+        self.directory = directory
+        self.count = count
+        self.codecs = codecs or {}
+        self._shards: Dict[int, Dict[str, Dict[str, Any]]] = {}
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+
+    def shard_of(self, user_id: str) -> int:
+        # crc32 instead of hash(): str hashes change between processes
+        return zlib.crc32(user_id.encode("utf-8")) % self.count
+
+    def path(self, shard: int) -> str:
+        return os.path.join(self.directory, f"shard-{shard:03d}.json")
+
+    def shard(self, shard: int) -> Dict[str, Dict[str, Any]]:
+        data = self._shards.get(shard)
+        if data is not None:
+            return data
+
+        with self._lock:
+            data = self._shards.get(shard)
+            if data is None:
+                data = self._read(shard)
+                self._shards[shard] = data
+        return data
+
+    def _read(self, shard: int) -> Dict[str, Dict[str, Any]]:
+        path = self.path(shard)
+        data: Dict[str, Dict[str, Any]] = {}
+        if os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        for table in SHARDED_TABLES:
+            rows = data.setdefault(table, {})
+            if table in self.codecs:
+                decode = self.codecs[table][0]
+                for key, value in rows.items():
+                    rows[key] = decode(value)
+        return data
+
+    def loaded_shards(self) -> int:
+        return len(self._shards)
+
+    def serialize(self, shard: int) -> str:
+        data = {}
+        for table, rows in self.shard(shard).items():
+            if table in self.codecs:
+                encode = self.codecs[table][1]
+                rows = {key: encode(value) for key, value in rows.items()}
+            data[table] = rows
+        return json.dumps(data, ensure_ascii=False, separators=(",", ":"))
+
+    def import_data(self, data: Dict[str, Dict[str, Any]]) -> None:
+        """
+        Distribute a db.json-shaped dict over the shards (in memory only).
+        """
+        for table in SHARDED_TABLES:
+            decode = self.codecs[table][0] if table in self.codecs else None
+            for user_id, value in data.get(table, {}).items():
+                if decode is not None:
+                    value = decode(value)
+                self.shard(self.shard_of(user_id))[table][user_id] = value
+
+
+class ShardedTable(MutableMapping):
+    """
+    Dict-like view of one sharded table (e.g. profiles) across all shards,
+    so callers can keep using PROFILES.get(user_id) and `user_id in PROFILES`.
+    Iterating loads every shard.
+    """
+
+    def __init__(self, shards: ShardSet, table: str):
+        self._shards = shards
+        self.table = table
+
+    def _rows(self, user_id: str) -> Dict[str, Any]:
+        return self._shards.shard(self._shards.shard_of(user_id))[self.table]
+
+    def __getitem__(self, user_id: str) -> Any:
+        return self._rows(user_id)[user_id]
+
+    def __setitem__(self, user_id: str, value: Any) -> None:
+        self._rows(user_id)[user_id] = value
+
+    def __delitem__(self, user_id: str) -> None:
+        del self._rows(user_id)[user_id]
+
+    def __contains__(self, user_id: object) -> bool:
+        return isinstance(user_id, str) and user_id in self._rows(user_id)
+
+    def __iter__(self) -> Iterator[str]:
+        for shard in range(self._shards.count):
+            yield from list(self._shards.shard(shard)[self.table])
+
+    def __len__(self) -> int:
+        return sum(
+            len(self._shards.shard(shard)[self.table])
+            for shard in range(self._shards.count)
+        )
@@ -0,0 +1,46 @@
+import marshal
+import mmap
+import os
+import struct
+import sys
+from typing import Dict, Any, Optional
+
+# Binary snapshot layout:
+#   MAGIC | python major | python minor | payload length (uint64 LE) | payload
+# The payload is marshal-encoded. marshal is the fastest stdlib decoder for
+# plain dict/list/str/int data, but its format is tied to the interpreter
+# version, so a snapshot written by another Python is ignored and the
+# loader falls back to db.json.
+MAGIC = b"SHECAL\x00\x01"
+_HEADER = struct.Struct("<8sBBQ")
+
+
+def dump_binary(data: Dict[str, Any]) -> bytes:
+    payload = marshal.dumps(data)
+    header = _HEADER.pack(
+        MAGIC, sys.version_info.major, sys.version_info.minor, len(payload)
+    )
+    return header + payload
+
+
+def load_binary(path: str) -> Optional[Dict[str, Any]]:
+    """
+    Load a binary snapshot, or return None if the file is missing, was
+    written by another Python version or is truncated.
+    The file is memory-mapped, so the payload is decoded without copying it.
+    """
+    if not os.path.exists(path) or os.path.getsize(path) < _HEADER.size:
+        return None
+
+    with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        magic, major, minor, length = _HEADER.unpack_from(mm)
+        if magic != MAGIC or (major, minor) != sys.version_info[:2]:
+            return None
+        if _HEADER.size + length > len(mm):
+            return None
+        with memoryview(mm) as view:
+            payload = view[_HEADER.size:_HEADER.size + length]
+            try:
+                return marshal.loads(payload)
+            finally:
+                payload.release()
@@ -0,0 +1,244 @@
+import json
+import sqlite3
+import threading
+from typing import Dict, Any, List, Tuple
+
+from .quiz_history import QUIZ_FIELDS
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS users (
+    id TEXT PRIMARY KEY,
+    email TEXT NOT NULL,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS users_email_idx ON users (email);
+
+CREATE TABLE IF NOT EXISTS profiles (
+    user_id TEXT PRIMARY KEY,
+    data TEXT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS tokens (
+    user_id TEXT PRIMARY KEY,
+    data TEXT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS weekly_quizzes (
+    user_id TEXT PRIMARY KEY,
+    stress INTEGER NOT NULL,
+    concentration INTEGER NOT NULL,
+    energy INTEGER NOT NULL,
+    workout INTEGER NOT NULL,
+    social INTEGER NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS quiz_history (
+    user_id TEXT NOT NULL,
+    seq INTEGER NOT NULL,
+    timestamp REAL NOT NULL,
+    stress INTEGER NOT NULL,
+    concentration INTEGER NOT NULL,
+    energy INTEGER NOT NULL,
+    workout INTEGER NOT NULL,
+    social INTEGER NOT NULL,
+    PRIMARY KEY (user_id, seq)
+);
+"""
+
+# databases created before quiz_history had a seq column were keyed by
+# (user_id, timestamp), which dropped check-ins sharing a timestamp
+MIGRATE_QUIZ_HISTORY_SEQ = """
+ALTER TABLE quiz_history RENAME TO quiz_history_by_timestamp;
+CREATE TABLE quiz_history (
+    user_id TEXT NOT NULL,
+    seq INTEGER NOT NULL,
+    timestamp REAL NOT NULL,
+    stress INTEGER NOT NULL,
+    concentration INTEGER NOT NULL,
+    energy INTEGER NOT NULL,
+    workout INTEGER NOT NULL,
+    social INTEGER NOT NULL,
+    PRIMARY KEY (user_id, seq)
+);
+INSERT INTO quiz_history
+SELECT user_id,
+       ROW_NUMBER() OVER (PARTITION BY user_id ORDER BY timestamp) - 1,
+       timestamp, stress, concentration, energy, workout, social
+FROM quiz_history_by_timestamp;
+DROP TABLE quiz_history_by_timestamp;
+"""
+
+# Statements are kept as constants so sqlite3's per-connection statement
+# cache hands back the same prepared statement on every call.
+UPSERT_USER = (
+    "INSERT INTO users (id, email, data) VALUES (?, ?, ?) "
+    "ON CONFLICT(id) DO UPDATE SET email = excluded.email, data = excluded.data"
+)
+UPSERT_PROFILE = (
+    "INSERT INTO profiles (user_id, data) VALUES (?, ?) "
+    "ON CONFLICT(user_id) DO UPDATE SET data = excluded.data"
+)
+UPSERT_TOKENS = (
+    "INSERT INTO tokens (user_id, data) VALUES (?, ?) "
+    "ON CONFLICT(user_id) DO UPDATE SET data = excluded.data"
+)
+UPSERT_WEEKLY_QUIZ = (
+    "INSERT INTO weekly_quizzes "
+    "(user_id, stress, concentration, energy, workout, social) "
+    "VALUES (?, ?, ?, ?, ?, ?) "
+    "ON CONFLICT(user_id) DO UPDATE SET "
+    "stress = excluded.stress, concentration = excluded.concentration, "
+    "energy = excluded.energy, workout = excluded.workout, social = excluded.social"
+)
+# a profile saved without a weekly quiz has none, as in db.json
+DELETE_WEEKLY_QUIZ = "DELETE FROM weekly_quizzes WHERE user_id = ?"
+# history rows are append-only and keyed by their position in the
+# user's history: re-putting a history only inserts the rows from
+# NEXT_QUIZ_HISTORY_SEQ on (a conflict is an error, never ignored)
+NEXT_QUIZ_HISTORY_SEQ = (
+    "SELECT COALESCE(MAX(seq) + 1, 0) FROM quiz_history WHERE user_id = ?"
+)
+INSERT_QUIZ_HISTORY = (
+    "INSERT INTO quiz_history "
+    "(user_id, seq, timestamp, stress, concentration, energy, workout, social) "
+    "VALUES (?, ?, ?, ?, ?, ?, ?, ?)"
+)
+
+
+class SqliteStore:
+    """
+    SQLite persistence for users, profiles, tokens, weekly quizzes and
+    their history.
+    Every thread gets its own connection (sqlite3 connections must not be
+    shared across threads); the database runs in WAL mode so readers never
+    block the writer.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._local = threading.local()
+        self._connections: List[sqlite3.Connection] = []
+        self._connections_lock = threading.Lock()
+        conn = self._conn()
+        conn.executescript(SCHEMA)
+        columns = [row[1] for row in conn.execute("PRAGMA table_info(quiz_history)")]
+        if "seq" not in columns:
+            conn.executescript("BEGIN;" + MIGRATE_QUIZ_HISTORY_SEQ + "COMMIT;")
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            # check_same_thread=False only so close() can run from the
+            # shutdown thread; each connection is otherwise used by its owner
+            conn = sqlite3.connect(
+                self.path, cached_statements=64, check_same_thread=False
+            )
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+            with self._connections_lock:
+                self._connections.append(conn)
+        return conn
+
+    def close(self) -> None:
+        with self._connections_lock:
+            for conn in self._connections:
+                conn.close()
+            self._connections.clear()
+        self._local = threading.local()
+
+    def is_empty(self) -> bool:
+        row = self._conn().execute("SELECT COUNT(*) FROM users").fetchone()
+        return row[0] == 0
+
+    def load_all(self) -> Dict[str, Dict[str, Any]]:
+        """
+        Read every table back into the db.json shape used by storage.py.
+        Weekly quizzes are folded into their profile under 'weekly_quiz'.
+        """
+        conn = self._conn()
+        users = {
+            user_id: json.loads(data)
+            for user_id, data in conn.execute("SELECT id, data FROM users")
+        }
+        profiles = {
+            user_id: json.loads(data)
+            for user_id, data in conn.execute("SELECT user_id, data FROM profiles")
+        }
+        tokens = {
+            user_id: json.loads(data)
+            for user_id, data in conn.execute("SELECT user_id, data FROM tokens")
+        }
+        quiz_rows = conn.execute(
+            "SELECT user_id, stress, concentration, energy, workout, social "
+            "FROM weekly_quizzes"
+        )
+        for user_id, *values in quiz_rows:
+            profile = profiles.setdefault(user_id, {"user_id": user_id})
+            profile["weekly_quiz"] = dict(zip(QUIZ_FIELDS, values))
+
+        quiz_history: Dict[str, Dict[str, list]] = {}
+        history_rows = conn.execute(
+            "SELECT user_id, timestamp, stress, concentration, energy, workout, social "
+            "FROM quiz_history ORDER BY user_id, seq"
+        )
+        for user_id, *values in history_rows:
+            columns = quiz_history.setdefault(
+                user_id, {field: [] for field in ("timestamp",) + QUIZ_FIELDS}
+            )
+            for field, value in zip(("timestamp",) + QUIZ_FIELDS, values):
+                columns[field].append(value)
+
+        return {
+            "users": users,
+            "profiles": profiles,
+            "tokens": tokens,
+            "quiz_history": quiz_history,
+        }
+
+    def _put(self, conn: sqlite3.Connection, table: str, key: str, value: Any) -> None:
+        if table == "users":
+            email = value["email"].strip().lower()
+            conn.execute(UPSERT_USER, (key, email, json.dumps(value)))
+        elif table == "profiles":
+            profile = dict(value)
+            quiz = profile.pop("weekly_quiz", None)
+            conn.execute(UPSERT_PROFILE, (key, json.dumps(profile)))
+            if quiz:
+                conn.execute(
+                    UPSERT_WEEKLY_QUIZ,
+                    (key, *(quiz[field] for field in QUIZ_FIELDS)),
+                )
+            else:
+                conn.execute(DELETE_WEEKLY_QUIZ, (key,))
+        elif table == "tokens":
+            conn.execute(UPSERT_TOKENS, (key, json.dumps(value)))
+        elif table == "quiz_history":
+            columns = [value["timestamp"]] + [value[field] for field in QUIZ_FIELDS]
+            first = conn.execute(NEXT_QUIZ_HISTORY_SEQ, (key,)).fetchone()[0]
+            rows = list(zip(*columns))[first:]
+            conn.executemany(
+                INSERT_QUIZ_HISTORY,
+                ((key, first + i, *row) for i, row in enumerate(rows)),
+            )
+        else:
+            raise ValueError(f"Unknown table: {table}")
+
+    def put_many(self, records: List[Tuple[str, str, Any]]) -> None:
+        """
+        Upsert several (table, key, value) records in one transaction.
+        """
+        conn = self._conn()
+        with conn:
+            for table, key, value in records:
+                self._put(conn, table, key, value)
+
+    def import_data(self, data: Dict[str, Dict[str, Any]]) -> None:
+        """
+        Bulk-load a db.json-shaped dict in a single transaction.
+        """
+        conn = self._conn()
+        with conn:
+            for table in ("users", "profiles", "tokens", "quiz_history"):
+                for key, value in data.get(table, {}).items():
+                    self._put(conn, table, key, value)
@@ -0,0 +1,106 @@
+import logging
+import os
+import threading
+from typing import Any, Dict, Optional
+
+from . import config
+from .CycleDecisionEngine import CycleDecisionEngine
+
+logger = logging.getLogger(__name__)
+
+
+class WorkoutEngine:
+    """
+    Process-wide CycleDecisionEngine for the workout-plan API.
+    The template CSV is loaded once at startup; a watcher thread polls its
+    mtime and, when it changes, builds a new engine off the request path
+    and swaps it in with a single reference assignment. Requests that
+    already hold the old engine finish on it.
+    """
+
+    def __init__(self, path: str, reload_interval: float):
+        self.path = path
+        self.reload_interval = reload_interval
+        self._engine: Optional[CycleDecisionEngine] = None
+        self._mtime_ns: Optional[int] = None
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._reloads = 0
+        self._last_error: Optional[str] = None
+
+    def current(self) -> Optional[CycleDecisionEngine]:
+        """
+        The engine to answer a request with, or None if no template could
+        be loaded yet.
+        """
+        return self._engine
+
+    def _stat_mtime(self) -> Optional[int]:
+        try:
+            return os.stat(self.path).st_mtime_ns
+        except OSError:
+            return None
+
+    def reload_if_changed(self) -> bool:
+        """
+        Load the template if its mtime differs from the loaded one.
+        On failure the previous engine stays in place.
+        Returns True if a new engine was swapped in.
+        """
+        mtime_ns = self._stat_mtime()
+        if mtime_ns is None or mtime_ns == self._mtime_ns:
+            return False
+
+        try:
+            engine = CycleDecisionEngine(self.path)
+        except Exception as e:
+            # remember the mtime so a broken file is not re-parsed every poll
+            self._mtime_ns = mtime_ns
+            self._last_error = str(e)
+            logger.exception("Loading workout template %s failed", self.path)
+            return False
+
+        self._engine = engine
+        self._mtime_ns = mtime_ns
+        self._reloads += 1
+        self._last_error = None
+        return True
+
+    def _watch(self) -> None:
+        while not self._stop.wait(self.reload_interval):
+            self.reload_if_changed()
+
+    def start(self) -> None:
+        """
+        Load the template and start the mtime watcher.
+        """
+        self.reload_if_changed()
+        if self._thread is not None or self.reload_interval <= 0:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(
+            target=self._watch, name="workout-template-watcher", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def stats(self) -> Dict[str, Any]:
+        engine = self._engine
+        return {
+            "path": self.path,
+            "loaded": engine is not None,
+            "reloads": self._reloads,
+            "last_error": self._last_error,
+            "rescaled_templates": engine.rescale_cache_info() if engine else None,
+        }
+
+
+# process-wide engine, started from the FastAPI lifespan hook
+workout_engine = WorkoutEngine(
+    config.WORKOUT_TEMPLATE_PATH, config.WORKOUT_TEMPLATE_RELOAD_INTERVAL
+)
@@ -0,0 +1,55 @@
+"""
+Cycle summaries for a cohort of synthetic in-memory profiles: the
+vectorized phase pass, reading the arrays from the profiles, the whole
+NDJSON stream, and one scalar get_cycle_summary per user for comparison.
+
+    cd backend && python bench/bench_cohort_summary.py [users]
+"""
+import os
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("SHE_DATA_DIR", tempfile.mkdtemp(prefix="she-bench-"))
+
+from app import phase_engine  # noqa: E402
+from app.storage import Profile  # noqa: E402
+
+
+def timed(label, function):
+    started = time.perf_counter()
+    result = function()
+    print(f"{label:>22}: {time.perf_counter() - started:.2f} s")
+    return result
+
+
+def main(users):
+    first = date(2026, 1, 1)
+    profiles = phase_engine.PROFILES
+    profiles.clear()
+    for i in range(users):
+        user_id = f"{i:08d}-0000-4000-8000-000000000000"
+        profiles[user_id] = Profile(
+            user_id,
+            last_period_start=first + timedelta(days=i % 300),
+            cycle_length=24 + i % 12,
+            menstruation_phase_duration=3 + i % 5,
+        )
+    print(f"{users} profiles")
+
+    ids, starts, cycle_lengths, bleed_days = timed("array extraction", phase_engine.cohort_arrays)
+    timed(
+        "phase computation",
+        lambda: phase_engine.get_cohort_phases(date.today(), starts, cycle_lengths, bleed_days),
+    )
+    timed("full NDJSON stream", lambda: sum(map(len, phase_engine.iter_cohort_summaries())))
+    timed(
+        "scalar summaries",
+        lambda: [phase_engine.get_cycle_summary(user_id) for user_id in ids],
+    )
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 200_000)
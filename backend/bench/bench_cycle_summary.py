@@ -0,0 +1,47 @@
+"""
+The cycle-summary computation (cycle day, phase, label, tips) per call,
+with the cached phase tables and frozen tips against recomputing the
+phase and rebuilding the tips dict every time.
+
+    cd backend && python bench/bench_cycle_summary.py [calls]
+"""
+import os
+import sys
+import tempfile
+import timeit
+from datetime import date
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("SHE_DATA_DIR", tempfile.mkdtemp(prefix="she-bench-"))
+
+from app import phase_engine  # noqa: E402
+
+LAST_PERIOD_START = date(2026, 10, 1)
+TODAY = date(2026, 10, 20)
+
+
+def cached():
+    cycle_day = phase_engine.get_cycle_day(TODAY, LAST_PERIOD_START, 28)
+    phase = phase_engine.get_phase(cycle_day, 28, 5)
+    return cycle_day, phase_engine.get_phase_label(phase), dict(phase_engine.get_phase_tips(phase))
+
+
+def uncached():
+    cycle_day = phase_engine.get_cycle_day(TODAY, LAST_PERIOD_START, 28)
+    phase = phase_engine._compute_phase(cycle_day, 28, 5)
+    # what get_phase_tips used to do: build every phase's tips per call
+    tips = {
+        name: {key: list(value) if isinstance(value, list) else value for key, value in source.items()}
+        for name, source in phase_engine._PHASE_TIPS_SOURCE.items()
+    }
+    return cycle_day, phase_engine.get_phase_label(phase), tips[phase]
+
+
+def main(calls):
+    for name, function in (("uncached", uncached), ("cached", cached)):
+        seconds = timeit.timeit(function, number=calls)
+        print(f"{name:>8}: {seconds / calls * 1e6:.2f} us per call")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 200_000)
@@ -0,0 +1,46 @@
+"""
+get_user_by_email at growing user counts, against the linear scan it
+replaced.
+
+    cd backend && python bench/bench_email_lookup.py [users ...]
+"""
+import os
+import sys
+import tempfile
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("SHE_DATA_DIR", tempfile.mkdtemp(prefix="she-bench-"))
+
+from app import storage  # noqa: E402
+
+
+def linear_scan(email):
+    email = email.lower()
+    for user in storage.USERS.values():
+        if user["email"] == email:
+            return user
+    return None
+
+
+def main(sizes):
+    for size in sizes:
+        storage.USERS = {
+            f"id{i}": {"id": f"id{i}", "email": f"user{i}@example.org"}
+            for i in range(size)
+        }
+        storage._build_email_index()
+        # worst case for the scan: the last user
+        email = f"User{size - 1}@example.org"
+        number = 100_000
+        indexed = timeit.timeit(lambda: storage.get_user_by_email(email), number=number)
+        scan_number = max(1, min(number, 10_000_000 // size))
+        scanned = timeit.timeit(lambda: linear_scan(email), number=scan_number)
+        print(
+            f"{size:>9} users: index {indexed / number * 1e6:8.2f} us, "
+            f"scan {scanned / scan_number * 1e6:10.2f} us"
+        )
+
+
+if __name__ == "__main__":
+    main([int(arg) for arg in sys.argv[1:]] or [1_000, 100_000, 1_000_000])
@@ -0,0 +1,94 @@
+"""
+Event title classification: the old per-category any(k in title) loops
+against classify_many, for distinct titles, recurring titles, and a large
+keyword list.
+
+    cd backend && python bench/bench_event_classifier.py [titles]
+"""
+import json
+import os
+import random
+import string
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("SHE_DATA_DIR", tempfile.mkdtemp(prefix="she-bench-"))
+os.environ.setdefault("OPENAI_API_KEY", "bench")
+
+from app.event_classifier import DEFAULT_KEYWORDS, EventClassifier  # noqa: E402
+
+FILLER = ["meeting", "call", "gym", "weekly", "sync", "with", "team", "lunch"]
+
+
+def old_classify(titles, keywords):
+    categories = list(keywords.items())
+    result = []
+    for title in titles:
+        title = (title or "").lower()
+        for category, words in categories:
+            if any(k in title for k in words):
+                result.append(category)
+                break
+        else:
+            result.append("work")
+    return result
+
+
+def _titles(rng, keywords, count, distinct):
+    """
+    count titles drawn from distinct different ones; a title is a few
+    filler words and at most one keyword, as calendar titles mostly are.
+    """
+    words = [w for ws in keywords.values() for w in ws]
+    pool = []
+    for i in range(distinct):
+        title = [rng.choice(FILLER) for _ in range(rng.randint(1, 3))]
+        if rng.random() < 0.6:
+            title.insert(rng.randrange(len(title) + 1), rng.choice(words))
+        pool.append(" ".join(title).capitalize() + f" {i}")
+    return [rng.choice(pool) for _ in range(count)]
+
+
+def _timed(fn):
+    started = time.perf_counter()
+    fn()
+    return (time.perf_counter() - started) * 1000
+
+
+def case(name, keywords, titles):
+    path = os.path.join(tempfile.mkdtemp(prefix="she-bench-"), "event_keywords.json")
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({"keywords": keywords}, f)
+    classifier = EventClassifier(path)
+    old_ms = _timed(lambda: old_classify(titles, keywords))
+    new_ms = _timed(lambda: classifier.classify_many(titles))
+    print(f"{name}: old loops {old_ms:.1f} ms, classify_many {new_ms:.1f} ms")
+
+
+def main(count):
+    rng = random.Random(24)
+    print(f"{count} titles")
+    case(
+        "built-in keywords, mostly distinct titles",
+        DEFAULT_KEYWORDS,
+        _titles(rng, DEFAULT_KEYWORDS, count, count),
+    )
+    case(
+        "built-in keywords, 50 recurring titles",
+        DEFAULT_KEYWORDS,
+        _titles(rng, DEFAULT_KEYWORDS, count, 50),
+    )
+
+    def word():
+        return "".join(
+            rng.choice(string.ascii_lowercase) for _ in range(rng.randint(4, 9))
+        )
+
+    many = {f"c{c}": [word() for _ in range(51)] for c in range(8)}
+    case("408 keywords, mostly distinct titles", many, _titles(rng, many, count, count))
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 50_000)
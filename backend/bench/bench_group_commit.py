@@ -0,0 +1,69 @@
+"""
+Concurrent weekly-quiz submissions in json mode: wall time and number of
+db.json rewrites, against one rewrite per submission.
+
+    cd backend && python bench/bench_group_commit.py [users] [threads] [submissions]
+"""
+import os
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ["SHE_DATA_DIR"] = tempfile.mkdtemp(prefix="she-bench-")
+os.environ["SHE_STORAGE_MODE"] = "json"
+
+from app import storage  # noqa: E402
+
+
+def main(users, threads, submissions):
+    storage.USERS = {
+        f"id{i}": {"id": f"id{i}", "email": f"user{i}@example.org"}
+        for i in range(users)
+    }
+    user_ids = list(storage.USERS)
+
+    writes = [0]
+    write_db_snapshot = storage._write_db_snapshot
+
+    def counted_write():
+        writes[0] += 1
+        write_db_snapshot()
+
+    storage._write_db_snapshot = counted_write
+
+    started = time.perf_counter()
+    storage._save_db()
+    single = time.perf_counter() - started
+
+    def submit(worker):
+        for i in range(worker, submissions, threads):
+            storage.save_weekly_quiz(
+                user_ids[i % users],
+                stress=3,
+                concentration=4,
+                energy=2,
+                workout=1,
+                social=5,
+            )
+
+    writes[0] = 0
+    workers = [threading.Thread(target=submit, args=(n,)) for n in range(threads)]
+    started = time.perf_counter()
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    elapsed = time.perf_counter() - started
+
+    print(f"{users} users, one rewrite: {single * 1e3:.1f} ms")
+    print(
+        f"{submissions} submissions from {threads} threads: {elapsed:.2f} s, "
+        f"{writes[0]} rewrites (one per submission: ~{single * submissions:.1f} s)"
+    )
+
+
+if __name__ == "__main__":
+    args = [int(arg) for arg in sys.argv[1:]]
+    main(*(args + [5_000, 50, 200][len(args):]))
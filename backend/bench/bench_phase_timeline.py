@@ -0,0 +1,57 @@
+"""
+Cycle day and phase for N consecutive dates: scalar get_cycle_day /
+get_phase loop against the batched get_phase_timeline.
+
+    cd backend && python bench/bench_phase_timeline.py [dates ...]
+"""
+import os
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("SHE_DATA_DIR", tempfile.mkdtemp(prefix="she-bench-"))
+
+from app.phase_engine import get_cycle_day, get_phase, get_phase_timeline  # noqa: E402
+
+LAST_PERIOD_START = date(2026, 10, 1)
+CYCLE_LENGTH = 28
+BLEED_DAYS = 5
+
+
+def scalar(start, count):
+    result = []
+    for offset in range(count):
+        cycle_day = get_cycle_day(start + timedelta(days=offset), LAST_PERIOD_START, CYCLE_LENGTH)
+        result.append((cycle_day, get_phase(cycle_day, CYCLE_LENGTH, BLEED_DAYS)))
+    return result
+
+
+def vectorized(start, count):
+    return get_phase_timeline(
+        start,
+        start + timedelta(days=count - 1),
+        LAST_PERIOD_START,
+        CYCLE_LENGTH,
+        BLEED_DAYS,
+    )
+
+
+def timed(function, *args):
+    started = time.perf_counter()
+    function(*args)
+    return time.perf_counter() - started
+
+
+def main(sizes):
+    start = date(2000, 1, 1)
+    for size in sizes:
+        print(
+            f"{size:>9} dates: scalar {timed(scalar, start, size) * 1e3:8.1f} ms, "
+            f"vectorized {timed(vectorized, start, size) * 1e3:6.1f} ms"
+        )
+
+
+if __name__ == "__main__":
+    main([int(arg) for arg in sys.argv[1:]] or [10_000, 1_000_000])
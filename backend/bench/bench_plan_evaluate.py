@@ -0,0 +1,59 @@
+"""
+/plan/evaluate for N tasks spread over a year, called in-process
+(without HTTP) so the time is the phase lookups and the response models.
+
+    cd backend && python bench/bench_plan_evaluate.py [tasks]
+"""
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import date, datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("SHE_DATA_DIR", tempfile.mkdtemp(prefix="she-bench-"))
+os.environ.setdefault("OPENAI_API_KEY", "bench")
+
+from app import storage  # noqa: E402
+from app.main import evaluate_plan  # noqa: E402
+from app.models import PlanEvaluateRequest  # noqa: E402
+
+CATEGORIES = ["social", "work", "sport", "rest", "study"]
+
+
+def main(count):
+    user_id = storage.create_user("bench@example.org")["id"]
+    storage.save_profile(
+        user_id,
+        last_period_start=date(2026, 10, 1),
+        cycle_length=29,
+        menstruation_phase_duration=5,
+        symptoms=[],
+        medication="",
+        workout_intensity="low",
+    )
+    rng = random.Random(20)
+    first = datetime(2026, 11, 2, 8)
+    tasks = [
+        {
+            "title": f"t{i}",
+            "category": rng.choice(CATEGORIES),
+            "start_iso": (
+                first + timedelta(days=rng.randrange(365), minutes=30 * rng.randrange(20))
+            ).isoformat(),
+            "duration_hours": rng.choice([0.5, 1]),
+        }
+        for i in range(count)
+    ]
+    payload = PlanEvaluateRequest(user_id=user_id, tasks=tasks)
+
+    started = time.perf_counter()
+    response = evaluate_plan(payload)
+    elapsed = time.perf_counter() - started
+    moved = sum(1 for s in response.suggestions if s.suggested_start_iso)
+    print(f"{count} tasks: {elapsed:.3f} s, {moved} moved")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 10_000)
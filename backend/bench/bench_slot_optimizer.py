@@ -0,0 +1,113 @@
+"""
+/plan/optimize on N random tasks of 0.5-1 h over a 92-day horizon with 3
+busy intervals per day, called in-process at several time budgets. The
+output is checked for overlaps and working hours.
+
+    cd backend && python bench/bench_slot_optimizer.py [tasks] [capacity_hours]
+"""
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import date, datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("SHE_DATA_DIR", tempfile.mkdtemp(prefix="she-bench-"))
+os.environ.setdefault("OPENAI_API_KEY", "bench")
+
+from app import storage  # noqa: E402
+from app.main import optimize_plan  # noqa: E402
+from app.models import PlanOptimizeRequest  # noqa: E402
+
+CATEGORIES = ["social", "work", "sport", "rest", "study"]
+HORIZON_DAYS = 92
+DAY_START_HOUR, DAY_END_HOUR = 8, 20
+
+
+def _at(day, hours, minutes=0):
+    return datetime.combine(day, datetime.min.time()) + timedelta(hours=hours, minutes=minutes)
+
+
+def check(response, busy):
+    busy_times = [
+        (datetime.fromisoformat(b["start_iso"]), datetime.fromisoformat(b["end_iso"]))
+        for b in busy
+    ]
+    placed = sorted(
+        (datetime.fromisoformat(a.suggested_start_iso), datetime.fromisoformat(a.suggested_end_iso))
+        for a in response.assignments
+        if a.scheduled
+    )
+    for start, end in placed:
+        assert start.hour >= DAY_START_HOUR and end <= _at(start.date(), DAY_END_HOUR), (start, end)
+        assert not any(start < b_end and b_start < end for b_start, b_end in busy_times)
+    for (_, end), (next_start, _) in zip(placed, placed[1:]):
+        assert end <= next_start
+
+
+def main(count, capacity):
+    user_id = storage.create_user("bench@example.org")["id"]
+    storage.save_profile(
+        user_id,
+        last_period_start=date(2026, 10, 1),
+        cycle_length=29,
+        menstruation_phase_duration=5,
+        symptoms=[],
+        medication="",
+        workout_intensity="low",
+    )
+    rng = random.Random(3)
+    start = date(2026, 11, 2)
+    tasks = [
+        {
+            "title": f"t{i}",
+            "category": rng.choice(CATEGORIES),
+            "start_iso": _at(
+                start + timedelta(days=rng.randrange(HORIZON_DAYS)),
+                rng.randint(8, 18),
+                rng.choice([0, 30]),
+            ).isoformat(),
+            "duration_hours": rng.choice([0.5, 1]),
+        }
+        for i in range(count)
+    ]
+    busy = []
+    for day in range(HORIZON_DAYS):
+        for _ in range(3):
+            busy_start = _at(start + timedelta(days=day), rng.randint(8, 18))
+            busy.append(
+                {
+                    "start_iso": busy_start.isoformat(),
+                    "end_iso": (busy_start + timedelta(minutes=rng.choice([30, 60, 90]))).isoformat(),
+                }
+            )
+
+    print(f"{count} tasks, {capacity:g} h/day capacity")
+    for budget_ms in (0, 500, 2000):
+        payload = PlanOptimizeRequest(
+            user_id=user_id,
+            tasks=tasks,
+            busy=busy,
+            horizon_start=start,
+            horizon_days=HORIZON_DAYS,
+            day_start_hour=DAY_START_HOUR,
+            day_end_hour=DAY_END_HOUR,
+            daily_capacity_hours=capacity,
+            time_budget_ms=budget_ms,
+        )
+        started = time.perf_counter()
+        response = optimize_plan(payload)
+        elapsed = time.perf_counter() - started
+        check(response, busy)
+        print(
+            f"budget {budget_ms:>4} ms: {elapsed:.2f} s, {response.phase_fit} in a fitting "
+            f"phase, {response.unscheduled} unscheduled, {response.iterations} iterations"
+        )
+
+
+if __name__ == "__main__":
+    main(
+        int(sys.argv[1]) if len(sys.argv) > 1 else 1_000,
+        float(sys.argv[2]) if len(sys.argv) > 2 else 10.0,
+    )
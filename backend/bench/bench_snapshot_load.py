@@ -0,0 +1,64 @@
+"""
+Load time of a db.json against a binary db.snapshot holding the same
+synthetic users and profiles.
+
+    cd backend && python bench/bench_snapshot_load.py [users ...]
+"""
+import json
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.storage_snapshot import dump_binary, load_binary  # noqa: E402
+
+
+def synthetic(users):
+    data = {"users": {}, "profiles": {}, "tokens": {}}
+    for i in range(users):
+        user_id = f"{i:08d}-0000-4000-8000-000000000000"
+        data["users"][user_id] = {"id": user_id, "email": f"user{i}@example.org"}
+        data["profiles"][user_id] = {
+            "user_id": user_id,
+            "last_period_start": "2026-10-01",
+            "cycle_length": 26 + i % 8,
+            "menstruation_phase_duration": 5,
+            "symptoms": ["Cramps", "Fatigue"][: i % 3],
+            "medication": "",
+            "workout_intensity": "low",
+        }
+    return data
+
+
+def timed(load):
+    started = time.perf_counter()
+    load()
+    return time.perf_counter() - started
+
+
+def main(sizes):
+    with tempfile.TemporaryDirectory(prefix="she-bench-") as data_dir:
+        json_path = os.path.join(data_dir, "db.json")
+        binary_path = os.path.join(data_dir, "db.snapshot")
+        for size in sizes:
+            data = synthetic(size)
+            with open(json_path, "w", encoding="utf-8") as f:
+                json.dump(data, f, ensure_ascii=False, indent=2)
+            with open(binary_path, "wb") as f:
+                f.write(dump_binary(data))
+            del data
+
+            def load_json():
+                with open(json_path, "r", encoding="utf-8") as f:
+                    return json.load(f)
+
+            print(
+                f"{size:>9} users: json {timed(load_json):.3f} s, "
+                f"binary {timed(lambda: load_binary(binary_path)):.3f} s"
+            )
+
+
+if __name__ == "__main__":
+    main([int(arg) for arg in sys.argv[1:]] or [10_000, 100_000])
@@ -0,0 +1,85 @@
+"""
+Cost of one save_profile per storage mode, with a db.json of N users
+already on disk. Each mode runs in its own process, since the mode is
+read at import.
+
+    cd backend && python bench/bench_storage_writes.py [users] [modes ...]
+"""
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SAVES = 200
+
+RUN = """
+import time
+from datetime import date
+from app import storage
+
+user_ids = list(storage.USERS)[:{saves}]
+started = time.perf_counter()
+for i, user_id in enumerate(user_ids):
+    storage.save_profile(
+        user_id,
+        last_period_start=date(2026, 10, 1 + i % 28),
+        cycle_length=28,
+        menstruation_phase_duration=5,
+        symptoms=["Cramps"],
+        medication="",
+        workout_intensity="low",
+    )
+print((time.perf_counter() - started) / len(user_ids))
+"""
+
+
+def seed(data_dir, users):
+    data = {"users": {}, "profiles": {}, "tokens": {}}
+    for i in range(users):
+        user_id = f"id{i}"
+        data["users"][user_id] = {"id": user_id, "email": f"user{i}@example.org"}
+        data["profiles"][user_id] = {
+            "user_id": user_id,
+            "last_period_start": "2026-10-01",
+            "cycle_length": 28,
+            "menstruation_phase_duration": 5,
+            "symptoms": [],
+            "medication": "",
+            "workout_intensity": "low",
+        }
+    with open(os.path.join(data_dir, "db.json"), "w", encoding="utf-8") as f:
+        json.dump(data, f)
+
+
+def run(mode, users):
+    with tempfile.TemporaryDirectory(prefix="she-bench-") as data_dir:
+        seed(data_dir, users)
+        env = dict(
+            os.environ,
+            SHE_DATA_DIR=data_dir,
+            SHE_STORAGE_MODE=mode,
+            PYTHONPATH=BACKEND_DIR,
+        )
+        result = subprocess.run(
+            [sys.executable, "-c", RUN.format(saves=min(SAVES, users))],
+            env=env,
+            cwd=BACKEND_DIR,
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+        return float(result.stdout.split()[-1])
+
+
+def main(users, modes):
+    for mode in modes:
+        print(f"{mode:>8}: {run(mode, users) * 1e3:8.3f} ms per save, {users} users")
+
+
+if __name__ == "__main__":
+    main(
+        int(sys.argv[1]) if len(sys.argv) > 1 else 10_000,
+        sys.argv[2:] or ["json", "journal", "sqlite"],
+    )
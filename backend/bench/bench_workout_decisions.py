@@ -0,0 +1,77 @@
+"""
+Random (cycle_day, intensity) workout decisions on a 28-day template:
+parsing the template row on every call, running the rules on the
+compiled records, and the precomputed decision table. Then one 12-week
+block through decide_many.
+
+    cd backend && python bench/bench_workout_decisions.py [decisions] [template.csv]
+
+Without a template path a synthetic one is written to a temp dir.
+"""
+import csv
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.CycleDecisionEngine import CycleDayRecord, CycleDecisionEngine  # noqa: E402
+
+PHASES = ["Menstrual"] * 5 + ["Follicular"] * 8 + ["Ovulatory"] * 2 + ["Luteal"] * 13
+INTENSITIES = ("light", "moderate", "heavy")
+
+
+def synthetic_template(path):
+    rng = random.Random(0)
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(
+            ["Cycle_Day", "Cycle_Phase", "Energy_Level_1to5", "Rest_Need_1to5", "Expected_Symptoms"]
+        )
+        for day, phase in enumerate(PHASES, start=1):
+            symptoms = rng.choice(["", "fatigue", "strong_cramps, fatigue", "bloating"])
+            writer.writerow([day, phase, rng.randint(1, 5), rng.randint(1, 5), symptoms])
+    return path
+
+
+def main(decisions, template):
+    engine = CycleDecisionEngine(template)
+    rng = random.Random(16)
+    calls = [(rng.randint(1, 28), rng.choice(INTENSITIES)) for _ in range(decisions)]
+
+    compiled = engine.get_cycle_record
+
+    def parse_per_call(cycle_day):
+        return CycleDayRecord(engine.get_cycle_row(cycle_day))
+
+    for label, get_record in (("parse per call", parse_per_call), ("compiled", compiled)):
+        engine.get_cycle_record = get_record
+        started = time.perf_counter()
+        for cycle_day, intensity in calls:
+            engine._decide(cycle_day, intensity)
+        print(f"{label:>15}: {time.perf_counter() - started:.2f} s for {decisions} decisions")
+    engine.get_cycle_record = compiled
+
+    started = time.perf_counter()
+    for cycle_day, intensity in calls:
+        engine.decide_workout_intensity(cycle_day, intensity)
+    print(f"{'decision table':>15}: {time.perf_counter() - started:.2f} s for {decisions} decisions")
+
+    start = date(2026, 10, 1)
+    block = [start + timedelta(days=offset) for offset in range(84)]
+    runs = 1000
+    started = time.perf_counter()
+    for _ in range(runs):
+        engine.decide_many(start, block, "heavy")
+    print(f"{'decide_many':>15}: {(time.perf_counter() - started) / runs * 1e6:.0f} us per 84-day block")
+
+
+if __name__ == "__main__":
+    with tempfile.TemporaryDirectory(prefix="she-bench-") as tmp:
+        main(
+            int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000,
+            sys.argv[2] if len(sys.argv) > 2 else synthetic_template(os.path.join(tmp, "t.csv")),
+        )
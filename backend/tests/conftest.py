@@ -0,0 +1,7 @@
+import os
+import tempfile
+
+# keep app imports away from the real data dir and the OpenAI key check
+os.environ.setdefault("SHE_DATA_DIR", tempfile.mkdtemp(prefix="she-test-"))
+os.environ.setdefault("OPENAI_API_KEY", "test")
+os.environ.setdefault("SHE_PHASE_SCHEDULER", "0")
@@ -0,0 +1,35 @@
+import pytest
+from fastapi.testclient import TestClient
+
+from app import main
+
+ADMIN_ENDPOINTS = [
+    ("get", "/api/admin/cohort-summary"),
+    ("post", "/api/admin/planning-rules/reload"),
+    ("post", "/api/admin/event-keywords/reload"),
+]
+
+
+@pytest.fixture
+def client():
+    with TestClient(main.app) as client:
+        yield client
+
+
+@pytest.mark.parametrize("method,path", ADMIN_ENDPOINTS)
+def test_admin_endpoints_are_closed_without_a_configured_token(
+    client, monkeypatch, method, path
+):
+    monkeypatch.setattr(main, "ADMIN_TOKEN", "")
+
+    assert getattr(client, method)(path).status_code == 403
+    assert getattr(client, method)(path, headers={"X-Admin-Token": ""}).status_code == 403
+
+
+@pytest.mark.parametrize("method,path", ADMIN_ENDPOINTS)
+def test_admin_endpoints_need_the_configured_token(client, monkeypatch, method, path):
+    monkeypatch.setattr(main, "ADMIN_TOKEN", "secret")
+
+    assert getattr(client, method)(path).status_code == 403
+    assert getattr(client, method)(path, headers={"X-Admin-Token": "nope"}).status_code == 403
+    assert getattr(client, method)(path, headers={"X-Admin-Token": "secret"}).status_code == 200
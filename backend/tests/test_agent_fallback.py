@@ -0,0 +1,62 @@
+from datetime import date, datetime, timezone
+from zoneinfo import ZoneInfo
+
+from app import agent, storage
+
+
+def test_all_day_events_start_in_the_calendar_timezone():
+    berlin = {"start": {"date": "2026-10-20", "timeZone": "Europe/Berlin"}}
+    start, end = agent._event_times(berlin)
+    assert start == datetime(2026, 10, 20, 9, tzinfo=ZoneInfo("Europe/Berlin"))
+    assert end is None
+
+    unknown = {"start": {"date": "2026-10-20", "timeZone": "Not/AZone"}}
+    assert agent._event_times(unknown)[0] == datetime(
+        2026, 10, 20, 9, tzinfo=timezone.utc
+    )
+
+    timed = {
+        "start": {"dateTime": "2026-10-20T06:30:00Z"},
+        "end": {"dateTime": "2026-10-20T07:30:00Z"},
+    }
+    assert agent._event_times(timed)[0] < start < agent._event_times(timed)[1]
+
+
+def test_moved_all_day_event_avoids_busy_time_across_timezones(monkeypatch):
+    user_id = storage.create_user("agent@x.org")["id"]
+    storage.save_profile(
+        user_id,
+        last_period_start=date(2026, 10, 1),
+        cycle_length=28,
+        menstruation_phase_duration=5,
+        symptoms=[],
+        medication="",
+        workout_intensity="low",
+    )
+    # a party in the menstrual phase moves to the first follicular day,
+    # 2026-10-06, where 09:00 Berlin time (07:00 UTC) is taken by the exam
+    events = [
+        {
+            "id": "party",
+            "summary": "party",
+            "start": {"date": "2026-10-03", "timeZone": "Europe/Berlin"},
+            "end": {"date": "2026-10-04"},
+        },
+        {
+            "id": "exam",
+            "summary": "exam",
+            "start": {"dateTime": "2026-10-06T06:30:00Z"},
+            "end": {"dateTime": "2026-10-06T08:00:00Z"},
+        },
+    ]
+    monkeypatch.setattr(agent, "fetch_next_week_events", lambda user_id: events)
+
+    suggestions = agent._rule_based_suggestions(user_id)
+
+    [party] = [s for s in suggestions if s["event_id"] == "party"]
+
+    assert party["action"] == "move"
+    # right after the exam
+    assert datetime.fromisoformat(party["new_start"]) == datetime(
+        2026, 10, 6, 10, tzinfo=ZoneInfo("Europe/Berlin")
+    )
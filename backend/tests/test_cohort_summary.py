@@ -0,0 +1,68 @@
+import json
+import random
+from datetime import date, timedelta
+
+import numpy as np
+
+from app import phase_engine
+from app.phase_engine import (
+    PHASES,
+    get_cohort_phases,
+    get_cycle_day,
+    get_phase,
+    iter_cohort_summaries,
+)
+from app.storage import Profile
+
+
+def test_cohort_phases_match_the_scalar_model():
+    rng = random.Random(14)
+    today = date(2026, 10, 17)
+    users = [
+        (
+            today - timedelta(days=rng.randint(-60, 400)),
+            rng.randint(0, 45),
+            rng.randint(0, 10),
+        )
+        for _ in range(2000)
+    ]
+
+    cycle_days, codes = get_cohort_phases(
+        today,
+        np.array([start.toordinal() for start, _, _ in users]),
+        np.array([cycle_length for _, cycle_length, _ in users]),
+        np.array([bleed_days for _, _, bleed_days in users]),
+    )
+
+    for (start, cycle_length, bleed_days), cycle_day, code in zip(
+        users, cycle_days.tolist(), codes.tolist()
+    ):
+        cycle_length = cycle_length or 28
+        expected_day = get_cycle_day(today, start, cycle_length)
+        assert cycle_day == expected_day
+        assert PHASES[code] == get_phase(expected_day, cycle_length, bleed_days or 5)
+
+
+def test_stream_has_one_line_per_usable_profile(monkeypatch):
+    monkeypatch.setattr(
+        phase_engine,
+        "PROFILES",
+        {
+            "a": Profile("a", last_period_start="2026-10-01", cycle_length=28),
+            "b": Profile("b", last_period_start="2026-09-20", cycle_length=30),
+            "no-date": Profile("no-date"),
+        },
+    )
+
+    chunks = list(iter_cohort_summaries(date(2026, 10, 17), chunk_size=1))
+
+    assert len(chunks) == 2
+    lines = [json.loads(line) for line in b"".join(chunks).splitlines()]
+    assert [line["user_id"] for line in lines] == ["a", "b"]
+    assert lines[0]["cycle_day"] == 17
+    assert lines[0]["phase"] == get_phase(17, 28, 5)
+    assert lines[0]["today"] == "2026-10-17"
+    assert set(lines[0]["tips"]) == {"headline", "do", "avoid"}
+
+    first = next(iter_cohort_summaries(date(2026, 10, 17), include_tips=False))
+    assert "tips" not in json.loads(first.splitlines()[0])
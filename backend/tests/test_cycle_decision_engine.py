@@ -0,0 +1,170 @@
+import csv
+import os
+import subprocess
+import sys
+from datetime import date, timedelta
+
+import pytest
+
+from app.CycleDecisionEngine import CycleDecisionEngine
+from app.phase_engine import get_phase
+
+COLUMNS = [
+    "Cycle_Day",
+    "Cycle_Phase",
+    "Estrogen_pg_mL",
+    "Energy_Level_1to5",
+    "Rest_Need_1to5",
+    "Expected_Symptoms",
+]
+# phase of each day of a 28-day template
+TEMPLATE_PHASES = (
+    ["Menstrual"] * 5 + ["Follicular"] * 8 + ["Ovulatory"] * 2 + ["Luteal"] * 13
+)
+
+
+def _write_template(path, days=range(1, 29), **overrides):
+    """
+    A 28-day template with neutral scores; overrides maps a cycle day to
+    the cells that differ on that day.
+    """
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.DictWriter(f, fieldnames=COLUMNS)
+        writer.writeheader()
+        for day in days:
+            row = {
+                "Cycle_Day": day,
+                "Cycle_Phase": TEMPLATE_PHASES[day - 1],
+                "Estrogen_pg_mL": 50 + day,
+                "Energy_Level_1to5": 3,
+                "Rest_Need_1to5": 3,
+                "Expected_Symptoms": "",
+            }
+            row.update(overrides.get(f"day{day}", {}))
+            writer.writerow(row)
+    return str(path)
+
+
+def test_records_are_parsed_once(tmp_path):
+    engine = CycleDecisionEngine(
+        _write_template(
+            tmp_path / "t.csv",
+            day1={"Energy_Level_1to5": 2, "Expected_Symptoms": "strong_cramps, fatigue"},
+            day2={"Energy_Level_1to5": "", "Rest_Need_1to5": " "},
+        )
+    )
+
+    first = engine.get_cycle_record(1)
+    assert (first.energy, first.rest_need) == (2, 3)
+    assert first.symptoms == ("strong_cramps", "fatigue")
+    assert first.has_strong_pain
+    # blank scores fall back to 3
+    second = engine.get_cycle_record(2)
+    assert (second.energy, second.rest_need, second.has_strong_pain) == (3, 3, False)
+    # the raw row is still there, and days wrap around the cycle
+    assert engine.get_cycle_row(29)["Estrogen_pg_mL"] == "51"
+    assert engine.get_cycle_record(29) is first
+
+
+def test_decisions_read_the_records(tmp_path):
+    engine = CycleDecisionEngine(
+        _write_template(
+            tmp_path / "t.csv", day14={"Expected_Symptoms": "migraine"}
+        )
+    )
+
+    heavy_day = engine.decide_workout_intensity(12, "heavy")
+    assert heavy_day["recommended_intensity"] == "heavy"
+    assert heavy_day["ok_to_do_heavy"]
+
+    pain_day = engine.decide_workout_intensity(14, "heavy")
+    assert pain_day["recommended_intensity"] == "light"
+    assert pain_day["symptoms"] == ["migraine"]
+
+    assert engine.decide_workout_intensity(18, "heavy")["recommended_intensity"] == "moderate"
+
+
+def test_decision_table_matches_the_rules(tmp_path):
+    engine = CycleDecisionEngine(
+        _write_template(
+            tmp_path / "t.csv",
+            day3={"Energy_Level_1to5": 1},
+            day20={"Rest_Need_1to5": 5},
+        )
+    )
+
+    for cycle_day in range(1, 29):
+        for intensity in ("light", "moderate", "heavy"):
+            assert engine.decide_workout_intensity(cycle_day, intensity) == engine._decide(
+                cycle_day, intensity
+            )
+    # outside the table: the rules run on the normalized day
+    assert engine.decide_workout_intensity(30, "none") == engine._decide(2, "none")
+
+
+def test_decisions_are_copies(tmp_path):
+    engine = CycleDecisionEngine(_write_template(tmp_path / "t.csv"))
+
+    decision = engine.decide_workout_intensity(5, "light")
+    decision["reason"] = "changed"
+    decision["symptoms"].append("changed")
+
+    assert engine.decide_workout_intensity(5, "light") == engine._decide(5, "light")
+
+
+def test_decide_many_matches_single_decisions(tmp_path):
+    engine = CycleDecisionEngine(_write_template(tmp_path / "t.csv"))
+    start = date(2026, 10, 1)
+    dates = [start + timedelta(days=offset) for offset in range(-10, 74)]
+    intensities = ["light", "moderate", "heavy", "none"] * 21
+
+    assert engine.decide_many(start, dates, intensities) == [
+        engine.decide_workout_from_date(start, day, intensity)
+        for day, intensity in zip(dates, intensities)
+    ]
+    assert engine.decide_many(start, dates, "heavy") == [
+        engine.decide_workout_from_date(start, day, "heavy") for day in dates
+    ]
+    with pytest.raises(ValueError):
+        engine.decide_many(start, dates, ["light"])
+
+
+@pytest.mark.parametrize("cycle_length,bleed_days", [(35, 6), (28, 5), (24, 3)])
+def test_rescaled_phases_match_phase_engine(tmp_path, cycle_length, bleed_days):
+    engine = CycleDecisionEngine(_write_template(tmp_path / "t.csv"))
+
+    rescaled = engine.for_cycle(cycle_length, bleed_days)
+
+    phases = [rescaled.records[day].phase[:3] for day in range(1, cycle_length + 1)]
+    expected = [
+        get_phase(day, cycle_length, bleed_days)[:3].capitalize()
+        for day in range(1, cycle_length + 1)
+    ]
+    assert phases == expected
+
+
+def test_template_with_gaps_loads_but_is_not_rescaled(tmp_path):
+    days = [day for day in range(1, 29) if day != 20]
+    engine = CycleDecisionEngine(_write_template(tmp_path / "t.csv", days))
+
+    assert engine.decision_table["light"][20] is None
+    assert engine.decide_workout_intensity(21, "light") is not None
+    with pytest.raises(ValueError):
+        engine.for_cycle(35, 6)
+
+
+def test_import_does_not_load_storage():
+    backend_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    result = subprocess.run(
+        [
+            sys.executable,
+            "-c",
+            "import sys, app.CycleDecisionEngine; print('app.storage' in sys.modules)",
+        ],
+        cwd=backend_dir,
+        capture_output=True,
+        text=True,
+    )
+
+    assert result.returncode == 0, result.stderr
+    assert result.stdout.strip() == "False"
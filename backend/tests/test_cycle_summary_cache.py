@@ -0,0 +1,41 @@
+from collections import OrderedDict
+from datetime import date
+
+import pytest
+
+from app import config, cycle_summary_cache
+from app.cycle_summary_cache import etag_matches
+
+ETAG = '"abc123"'
+
+
+@pytest.mark.parametrize(
+    "header",
+    ['"abc123"', 'W/"abc123"', ' "x", W/"abc123" ', "*", " * "],
+)
+def test_etag_matches(header):
+    assert etag_matches(header, ETAG)
+    assert etag_matches(header, "W/" + ETAG)
+
+
+@pytest.mark.parametrize("header", [None, "", '"abc12"', 'W/"other"', '"abc123'])
+def test_etag_does_not_match(header):
+    assert not etag_matches(header, ETAG)
+
+
+def test_least_recently_used_users_are_dropped(monkeypatch):
+    monkeypatch.setattr(config, "CYCLE_SUMMARY_CACHE_SIZE", 2)
+    monkeypatch.setattr(cycle_summary_cache, "_entries", OrderedDict())
+    today = date(2026, 10, 17)
+
+    cycle_summary_cache.put("a", today, 1, b"a")
+    cycle_summary_cache.put("b", today, 1, b"b")
+    assert cycle_summary_cache.get("a", today, 1).body == b"a"
+    cycle_summary_cache.put("c", today, 1, b"c")
+
+    assert list(cycle_summary_cache._entries) == ["a", "c"]
+    assert cycle_summary_cache.get("b", today, 1) is None
+    # a stale key is a miss but does not count as a use
+    assert cycle_summary_cache.get("a", today, 2) is None
+    cycle_summary_cache.put("d", today, 1, b"d")
+    assert list(cycle_summary_cache._entries) == ["c", "d"]
@@ -0,0 +1,63 @@
+import json
+import logging
+import random
+import re
+
+from app.event_classifier import (
+    DEFAULT_KEYWORDS,
+    Classification,
+    EventClassifier,
+    _trie_pattern,
+)
+
+
+def test_trie_pattern_factors_common_prefixes():
+    assert _trie_pattern(["dinner", "drinks"]) == "d(?:inner|rinks)"
+    # "friend" is a prefix of "friends", so the greedy optional tail wins
+    pattern = re.compile(_trie_pattern(["friend", "friends"]))
+    assert pattern.findall("friends over") == ["friends"]
+
+
+def test_majority_category_and_confidence():
+    classifier = EventClassifier()
+
+    assert classifier.classify("Exam prep") == Classification("work", 1.0)
+    assert classifier.classify("lecture, then friends dinner") == Classification(
+        "social", 2 / 3
+    )
+    # one hit each: the category listed first wins
+    assert classifier.classify("project party") == Classification("work", 0.5)
+    assert classifier.classify("Dentist") == Classification("work", 0.0)
+    assert classifier.classify(None) == Classification("work", 0.0)
+
+
+def test_classify_many_matches_classify():
+    classifier = EventClassifier()
+    words = [w for ws in DEFAULT_KEYWORDS.values() for w in ws] + ["gym", "call", ""]
+    rng = random.Random(24)
+    titles = [
+        " ".join(rng.choice(words) for _ in range(rng.randint(0, 4))) for _ in range(300)
+    ] + [None, "", "weekly project sync", "weekly project sync"]
+
+    assert classifier.classify_many(titles) == [classifier.classify(t) for t in titles]
+
+
+def test_failed_reload_keeps_the_old_keywords(tmp_path, caplog):
+    path = tmp_path / "event_keywords.json"
+    path.write_text(
+        json.dumps({"default": "rest", "keywords": {"sport": ["Gym", "run"]}})
+    )
+    classifier = EventClassifier(str(path))
+    assert classifier.keywords() == {"sport": ["gym", "run"]}
+    assert classifier.classify("Morning RUN") == Classification("sport", 1.0)
+    assert classifier.classify("dinner") == Classification("rest", 0.0)
+
+    path.write_text(json.dumps({"default": "rest"}))
+    with caplog.at_level(logging.ERROR, logger="app.event_classifier"):
+        classifier.reload()
+    assert classifier.keywords() == {"sport": ["gym", "run"]}
+    assert caplog.records[-1].exc_info[0] is KeyError
+
+    path.unlink()
+    classifier.reload()
+    assert classifier.keywords() == DEFAULT_KEYWORDS
@@ -0,0 +1,84 @@
+import json
+import os
+import time
+
+from app.llm_cache import LLMCache
+
+
+def _files(directory):
+    return sorted(name for name in os.listdir(directory) if name.endswith(".json"))
+
+
+def test_disk_tier_is_capped_to_the_newest_entries(tmp_path):
+    cache = LLMCache(10, 60, str(tmp_path), max_disk_entries=3)
+    for i in range(5):
+        cache.put(f"k{i}", str(i))
+        # distinct, unexpired mtimes so "oldest" is well defined
+        written = time.time() - 50 + i
+        os.utime(tmp_path / f"k{i}.json", (written, written))
+
+    cache.put("k5", "5")
+
+    assert _files(tmp_path) == ["k3.json", "k4.json", "k5.json"]
+
+
+def test_directory_is_listed_only_past_the_limit(tmp_path, monkeypatch):
+    cache = LLMCache(100, 60, str(tmp_path), max_disk_entries=10)
+    scans = []
+    listed = cache._disk_files
+    monkeypatch.setattr(cache, "_disk_files", lambda: scans.append(1) or listed())
+
+    for i in range(10):
+        cache.put(f"k{i}", str(i))
+    assert scans == []
+
+    cache.put("k10", "10")
+    assert len(scans) == 1
+    # pruned to 90% of the limit, so the next write does not list again
+    assert len(_files(tmp_path)) == 9
+    cache.put("k11", "11")
+    assert len(scans) == 1
+
+
+def test_expired_files_are_pruned_at_startup_and_once_per_ttl(tmp_path):
+    stale = time.time() - 120
+    LLMCache(10, 60, str(tmp_path)).put("old", "1")
+    os.utime(tmp_path / "old.json", (stale, stale))
+
+    cache = LLMCache(10, 60, str(tmp_path))
+    assert _files(tmp_path) == []
+
+    cache.put("older", "1")
+    os.utime(tmp_path / "older.json", (stale, stale))
+    cache.put("new", "2")
+    assert _files(tmp_path) == ["new.json", "older.json"]
+
+    cache._next_prune = time.time()  # a ttl has passed
+    cache.put("newer", "3")
+    assert _files(tmp_path) == ["new.json", "newer.json"]
+
+
+def test_malformed_files_are_misses(tmp_path):
+    cache = LLMCache(10, 60, str(tmp_path))
+    later = time.time() + 60
+    for key, data in {
+        "no_expiry": {"value": "v"},
+        "no_value": {"expires_at": later},
+        "not_a_dict": ["v"],
+        "bad_expiry": {"expires_at": "soon", "value": "v"},
+        "not_a_string": {"expires_at": later, "value": 1},
+    }.items():
+        (tmp_path / f"{key}.json").write_text(json.dumps(data))
+        assert cache.get(key) is None
+
+    assert cache.stats()["misses"] == 5
+
+
+def test_clear_empties_memory_and_disk(tmp_path):
+    cache = LLMCache(10, 60, str(tmp_path))
+    cache.put("k", "v")
+
+    cache.clear()
+
+    assert _files(tmp_path) == []
+    assert cache.get("k") is None
@@ -0,0 +1,47 @@
+import pytest
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.phase_engine import (
+    _compute_phase,
+    get_phase,
+    get_phase_tips,
+    phase_cache_info,
+)
+
+
+def test_cached_phases_match_the_computed_ones():
+    for cycle_length in range(1, 130):
+        for bleed_days in range(-1, 15):
+            for cycle_day in range(-2, cycle_length + 3):
+                assert get_phase(cycle_day, cycle_length, bleed_days) == _compute_phase(
+                    cycle_day, cycle_length, bleed_days
+                )
+
+
+def test_tables_are_reused():
+    get_phase(3, 33, 4)
+    hits = phase_cache_info()["hits"]
+
+    get_phase(20, 33, 4)
+
+    info = phase_cache_info()
+    assert info["hits"] == hits + 1
+    assert info["size"] <= info["max_size"]
+
+
+def test_tips_are_shared_and_read_only():
+    tips = get_phase_tips("luteal")
+
+    assert get_phase_tips("luteal") is tips
+    assert isinstance(tips["do"], tuple)
+    with pytest.raises(TypeError):
+        tips["headline"] = "changed"
+    assert get_phase_tips("unknown")["headline"] == "Tune into how you feel today."
+
+
+def test_debug_endpoint():
+    response = TestClient(app).get("/api/debug/phase-cache")
+
+    assert response.status_code == 200
+    assert set(response.json()) == {"hits", "misses", "size", "max_size"}
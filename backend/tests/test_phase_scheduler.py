@@ -0,0 +1,38 @@
+import logging
+from datetime import date, datetime
+
+from app import storage
+from app.scheduler import PhaseScheduler
+
+
+def test_failing_handler_is_logged_and_the_others_still_run(caplog):
+    user_id = storage.create_user("scheduler@x.org")["id"]
+    storage.save_profile(
+        user_id,
+        last_period_start=date(2026, 10, 1),
+        cycle_length=28,
+        menstruation_phase_duration=5,
+        symptoms=[],
+        medication="",
+        workout_intensity="low",
+    )
+    now = [datetime(2026, 10, 2, 12).timestamp()]
+    scheduler = PhaseScheduler(clock=lambda: now[0])
+    received = []
+
+    def broken(transition):
+        raise RuntimeError("boom")
+
+    scheduler.add_handler(broken)
+    scheduler.add_handler(received.append)
+    transition = scheduler.schedule(user_id)
+    assert transition.day == date(2026, 10, 6)
+
+    now[0] = datetime(2026, 10, 6, 0, 1).timestamp()
+    with caplog.at_level(logging.ERROR, logger="app.scheduler"):
+        assert scheduler.run_due() == 1
+
+    assert received == [transition]
+    [record] = caplog.records
+    assert record.getMessage() == "Phase transition handler failed"
+    assert record.exc_info[0] is RuntimeError
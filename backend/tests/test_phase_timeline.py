@@ -0,0 +1,75 @@
+import random
+from datetime import date, timedelta
+
+import numpy as np
+from fastapi.testclient import TestClient
+
+from app import storage
+from app.main import app
+from app.phase_engine import (
+    PHASES,
+    get_cycle_day,
+    get_cycle_days,
+    get_phase,
+    get_phase_timeline,
+    get_phases,
+)
+
+
+def test_batched_helpers_match_the_scalar_ones():
+    rng = random.Random(10)
+    for _ in range(300):
+        cycle_length = rng.randint(1, 60)
+        bleed_days = rng.randint(-1, 20)
+        last_period_start = date(2026, 1, 1) + timedelta(days=rng.randint(-400, 400))
+        dates = [
+            date(2026, 1, 1) + timedelta(days=rng.randint(-800, 800)) for _ in range(20)
+        ]
+
+        cycle_days = get_cycle_days(dates, last_period_start, cycle_length)
+        codes = get_phases(cycle_days, cycle_length, bleed_days)
+
+        for day, cycle_day, code in zip(dates, cycle_days.tolist(), codes.tolist()):
+            expected_day = get_cycle_day(day, last_period_start, cycle_length)
+            assert cycle_day == expected_day
+            assert PHASES[code] == get_phase(expected_day, cycle_length, bleed_days)
+
+
+def test_timeline_covers_every_day():
+    dates, cycle_days, codes = get_phase_timeline(
+        date(2026, 10, 1), date(2026, 10, 31), date(2026, 10, 5), 28, 5
+    )
+
+    assert len(dates) == len(cycle_days) == len(codes) == 31
+    assert dates[0] == np.datetime64("2026-10-01")
+    assert cycle_days[:5].tolist() == [25, 26, 27, 28, 1]
+    assert PHASES[codes[4]] == "menstrual"
+
+
+def test_endpoint():
+    user_id = storage.create_user("timeline@x.org")["id"]
+    storage.save_profile(
+        user_id,
+        last_period_start=date(2026, 10, 5),
+        cycle_length=28,
+        menstruation_phase_duration=5,
+        symptoms=[],
+        medication="",
+        workout_intensity="low",
+    )
+    client = TestClient(app)
+    url = f"/api/user/{user_id}/phase-timeline"
+
+    response = client.get(url, params={"start": "2026-10-05", "end": "2026-11-01"})
+
+    assert response.status_code == 200
+    days = response.json()["days"]
+    assert len(days) == 28
+    assert days[0] == {"date": "2026-10-05", "cycle_day": 1, "phase": "menstrual"}
+    assert [day["phase"] for day in days] == [
+        get_phase(day["cycle_day"], 28, 5) for day in days
+    ]
+
+    assert client.get(url, params={"start": "2026-10-05", "end": "2026-10-01"}).status_code == 400
+    assert client.get(url, params={"start": "2026-01-01", "end": "2028-01-02"}).status_code == 400
+    assert client.get("/api/user/nobody/phase-timeline").status_code == 404
@@ -0,0 +1,80 @@
+from datetime import date, datetime, timedelta
+
+from app import storage
+from app.main import evaluate_plan
+from app.models import PlanEvaluateRequest
+
+
+def _user():
+    user = storage.create_user(f"eval-{datetime.now().timestamp()}@x.org")
+    storage.save_profile(
+        user["id"],
+        last_period_start=date(2026, 10, 1),
+        cycle_length=28,
+        menstruation_phase_duration=5,
+        symptoms=[],
+        medication="",
+        workout_intensity="low",
+    )
+    return user["id"]
+
+
+def test_moved_task_avoids_busy_time_in_its_own_offset():
+    user_id = _user()
+    # Oct 2 is menstrual, so the social task is moved to Oct 6
+    # (follicular), where X already sits at 10:00-12:00 +02:00
+    payload = PlanEvaluateRequest(
+        user_id=user_id,
+        tasks=[
+            {
+                "title": "X",
+                "category": "work",
+                "start_iso": "2026-10-06T10:00:00+02:00",
+                "duration_hours": 2,
+            },
+            {
+                "title": "Y",
+                "category": "social",
+                "start_iso": "2026-10-02T10:00:00+02:00",
+                "duration_hours": 1,
+            },
+        ],
+    )
+
+    suggestion = evaluate_plan(payload).suggestions[1]
+
+    moved = datetime.fromisoformat(suggestion.suggested_start_iso)
+    x_start = datetime.fromisoformat("2026-10-06T10:00:00+02:00")
+    x_end = x_start + timedelta(hours=2)
+    assert moved.utcoffset() == timedelta(hours=2)
+    assert not (moved < x_end and x_start < moved + timedelta(hours=1))
+
+
+def test_free_slot_stays_within_day_hours_of_the_request_offset():
+    user_id = _user()
+    # Oct 6 is busy from 07:00 to 21:30 local time, so it has no free hour
+    # within 07:00-22:00 local (in UTC it would still have 21:30-22:00
+    # plus the early morning)
+    payload = PlanEvaluateRequest(
+        user_id=user_id,
+        tasks=[
+            {
+                "title": "X",
+                "category": "work",
+                "start_iso": "2026-10-06T07:00:00-05:00",
+                "duration_hours": 14.5,
+            },
+            {
+                "title": "Y",
+                "category": "social",
+                "start_iso": "2026-10-05T12:00:00-05:00",
+                "duration_hours": 1,
+            },
+        ],
+    )
+
+    suggestion = evaluate_plan(payload).suggestions[1]
+
+    moved = datetime.fromisoformat(suggestion.suggested_start_iso)
+    assert moved.utcoffset() == timedelta(hours=-5)
+    assert moved.date() != date(2026, 10, 6)
@@ -0,0 +1,68 @@
+from datetime import date, datetime, timedelta
+
+from fastapi.testclient import TestClient
+
+from app import storage
+from app.main import SUGGESTION_WINDOW, app
+from app.phase_engine import get_profile_context
+from app.planning_rules import category_target_phases
+
+CATEGORIES = ["social", "work", "sport", "rest", "study", "gardening"]
+
+
+def test_suggestions_are_the_earliest_fitting_day_in_the_window():
+    user_id = storage.create_user("suggestions@x.org")["id"]
+    storage.save_profile(
+        user_id,
+        last_period_start=date(2026, 10, 1),
+        cycle_length=28,
+        menstruation_phase_duration=5,
+        symptoms=[],
+        medication="",
+        workout_intensity="low",
+    )
+    # one task every other day at its own hour, so no two tasks compete
+    # for a slot
+    tasks = [
+        {
+            "title": f"t{i}",
+            "category": CATEGORIES[i % len(CATEGORIES)],
+            "start_iso": datetime(2026, 10, 1 + i, 8 + i % 12).isoformat(),
+            "duration_hours": 0.5,
+        }
+        for i in range(0, 30, 2)
+    ]
+
+    response = TestClient(app).post(
+        "/api/plan/evaluate", json={"user_id": user_id, "tasks": tasks}
+    )
+
+    assert response.status_code == 200
+    context = get_profile_context(user_id)
+    first_offset, last_offset = SUGGESTION_WINDOW
+    moved_tasks = 0
+    for task, suggestion in zip(tasks, response.json()["suggestions"]):
+        start = datetime.fromisoformat(task["start_iso"])
+        targets = category_target_phases(task["category"])
+        phase = context.phase_for(start.date())
+        assert suggestion["phase_at_original"] == phase
+        assert suggestion["is_ideal"] == (phase in targets)
+        if suggestion["is_ideal"]:
+            continue
+
+        window = [
+            start.date() + timedelta(days=offset)
+            for offset in range(first_offset, last_offset + 1)
+        ]
+        expected = next(
+            (day for day in window if context.phase_for(day) in targets), None
+        )
+        if expected is None:
+            assert suggestion["suggested_start_iso"] is None
+            continue
+        moved = datetime.fromisoformat(suggestion["suggested_start_iso"])
+        assert moved == datetime.combine(expected, start.time())
+        assert suggestion["suggested_phase"] == context.phase_for(expected)
+        moved_tasks += 1
+
+    assert moved_tasks >= 3
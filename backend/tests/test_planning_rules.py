@@ -0,0 +1,82 @@
+import json
+import logging
+import random
+
+import numpy as np
+
+from app.phase_engine import PHASES
+from app.planning_rules import (
+    ALL_PHASES_MASK,
+    DEFAULT_RULES,
+    PHASE_BITS,
+    RuleRegistry,
+    compile_rules,
+    phase_mask,
+)
+
+
+def test_compile_rules_maps_categories_and_aliases_to_masks():
+    masks, default_mask = compile_rules(DEFAULT_RULES)
+
+    assert masks["social"] == PHASE_BITS["follicular"] | PHASE_BITS["ovulation"]
+    assert masks["dating"] == masks["social"]
+    assert masks["deep_work"] == masks["work"]
+    assert "default" not in masks
+    assert default_mask == ALL_PHASES_MASK
+    assert phase_mask(["luteal", "not-a-phase"]) == PHASE_BITS["luteal"]
+
+
+def test_lookups_ignore_case_and_fall_back_to_default(tmp_path):
+    path = tmp_path / "rules.json"
+    path.write_text(
+        json.dumps(
+            {
+                "Chores": {"phases": ["menstrual"], "aliases": ["Cleaning"]},
+                "default": {"phases": ["luteal"]},
+            }
+        )
+    )
+    rules = RuleRegistry(str(path))
+
+    assert rules.fits("chores", "menstrual")
+    assert rules.fits("CLEANING", "menstrual")
+    assert not rules.fits("cleaning", "luteal")
+    assert rules.fits("unknown", "luteal")
+    assert not rules.fits("unknown", "menstrual")
+    assert rules.categories() == {
+        "chores": ["menstrual"],
+        "cleaning": ["menstrual"],
+        "default": ["luteal"],
+    }
+
+
+def test_fit_many_matches_fits():
+    rules = RuleRegistry()
+    rng = random.Random(23)
+    names = [*DEFAULT_RULES, "dating", "Workout", "unknown"]
+    categories = [rng.choice(names) for _ in range(500)]
+    codes = [rng.randrange(len(PHASES)) for _ in range(500)]
+
+    fitted = rules.fit_many(categories, codes)
+
+    assert fitted.dtype == np.bool_
+    assert fitted.tolist() == [
+        rules.fits(category, PHASES[code]) for category, code in zip(categories, codes)
+    ]
+
+
+def test_failed_reload_keeps_the_old_rules(tmp_path, caplog):
+    path = tmp_path / "rules.json"
+    path.write_text(json.dumps({"social": {"phases": ["menstrual"]}}))
+    rules = RuleRegistry(str(path))
+    assert rules.categories()["social"] == ["menstrual"]
+
+    path.write_text("{not json")
+    with caplog.at_level(logging.ERROR, logger="app.planning_rules"):
+        rules.reload()
+    assert rules.categories()["social"] == ["menstrual"]
+    assert caplog.records[-1].getMessage() == f"Loading planning rules from {path} failed"
+
+    path.unlink()
+    rules.reload()
+    assert rules.categories()["social"] == ["follicular", "ovulation"]
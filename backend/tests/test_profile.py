@@ -0,0 +1,89 @@
+from datetime import date
+
+from app import storage
+from app.storage import Profile
+
+STORED = {
+    "user_id": "u",
+    "last_period_start": "2026-10-01",
+    "cycle_length": 28,
+    "menstruation_phase_duration": 5,
+    "symptoms": ["Cramps"],
+    "medication": "",
+    "workout_intensity": "low",
+    "weekly_quiz": {"stress": 3, "concentration": 4, "energy": 2, "workout": 1, "social": 5},
+}
+
+
+def test_round_trip_keeps_the_stored_shape():
+    profile = Profile.from_dict(STORED)
+
+    assert profile.last_period_start == date(2026, 10, 1)
+    assert profile.cycle_length == 28
+    assert profile.symptoms == ("Cramps",)
+    assert profile.to_dict() == STORED
+
+
+def test_round_trip_keeps_unknown_keys():
+    stored = dict(STORED, timezone="Europe/Berlin", goals={"sleep": 8})
+
+    profile = Profile.from_dict(stored)
+
+    assert profile.extra == {"timezone": "Europe/Berlin", "goals": {"sleep": 8}}
+    assert profile.to_dict() == stored
+
+
+def test_missing_fields_stay_missing():
+    assert Profile.from_dict({"user_id": "u"}).to_dict() == {"user_id": "u"}
+
+
+def test_unparseable_date_is_kept():
+    profile = Profile.from_dict(dict(STORED, last_period_start="not a date"))
+
+    assert profile.last_period_start == "not a date"
+    assert profile.to_dict()["last_period_start"] == "not a date"
+
+
+def test_save_profile_stores_parsed_values():
+    user_id = storage.create_user("profile@x.org")["id"]
+
+    profile = storage.save_profile(
+        user_id,
+        last_period_start=date(2026, 10, 5),
+        cycle_length="30",
+        menstruation_phase_duration=4,
+        symptoms=["Fatigue"],
+        medication="",
+        workout_intensity="high",
+    )
+
+    assert storage.PROFILES[user_id] is profile
+    assert profile.cycle_length == 30
+    assert storage._record_value("profiles", user_id) == {
+        "user_id": user_id,
+        "last_period_start": "2026-10-05",
+        "cycle_length": 30,
+        "menstruation_phase_duration": 4,
+        "symptoms": ["Fatigue"],
+        "medication": "",
+        "workout_intensity": "high",
+    }
+
+
+def test_save_profile_keeps_unknown_keys():
+    user_id = storage.create_user("extra@x.org")["id"]
+    storage.PROFILES[user_id] = Profile.from_dict(
+        dict(STORED, user_id=user_id, timezone="UTC")
+    )
+
+    storage.save_profile(
+        user_id,
+        last_period_start=date(2026, 10, 5),
+        cycle_length=30,
+        menstruation_phase_duration=4,
+        symptoms=[],
+        medication="",
+        workout_intensity="high",
+    )
+
+    assert storage._record_value("profiles", user_id)["timezone"] == "UTC"
@@ -0,0 +1,73 @@
+from datetime import date
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app import storage
+from app.main import app
+from app.phase_engine import ProfileError, get_profile_context
+from app.storage import Profile
+
+
+def _save(user_id, **changes):
+    profile = dict(
+        last_period_start=date(2026, 10, 1),
+        cycle_length=30,
+        menstruation_phase_duration=4,
+        symptoms=[],
+        medication="",
+        workout_intensity="low",
+    )
+    profile.update(changes)
+    storage.save_profile(user_id, **profile)
+
+
+def test_context_is_shared_until_the_profile_is_saved():
+    user_id = storage.create_user("context@x.org")["id"]
+    _save(user_id)
+
+    context = get_profile_context(user_id)
+    assert get_profile_context(user_id) is context
+    assert (context.cycle_length, context.bleed_days) == (30, 4)
+    assert context.phase_for(date(2026, 10, 2)) == "menstrual"
+
+    _save(user_id, cycle_length=26)
+
+    assert get_profile_context(user_id).cycle_length == 26
+
+
+def test_defaults_for_missing_cycle_values():
+    storage.PROFILES["defaults"] = Profile("defaults", last_period_start="2026-10-01")
+
+    context = get_profile_context("defaults")
+
+    assert (context.cycle_length, context.bleed_days) == (28, 5)
+
+
+@pytest.mark.parametrize(
+    "profile, status_code",
+    [
+        (None, 404),
+        (Profile("u"), 400),
+        (Profile("u", last_period_start="01.10.2026"), 400),
+    ],
+)
+def test_unusable_profiles(monkeypatch, profile, status_code):
+    if profile is not None:
+        monkeypatch.setitem(storage.PROFILES, "unusable", profile)
+
+    with pytest.raises(ProfileError) as error:
+        get_profile_context("unusable")
+
+    assert error.value.status_code == status_code
+
+
+def test_endpoints_answer_with_the_profile_error():
+    storage.PROFILES["incomplete"] = Profile("incomplete")
+    client = TestClient(app)
+
+    response = client.get("/api/user/incomplete/cycle-summary")
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Profile incomplete"
+
+    assert client.get("/api/user/nobody/cycle-summary").status_code == 404
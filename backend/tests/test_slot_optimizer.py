@@ -0,0 +1,55 @@
+import random
+from datetime import date, datetime, timedelta
+
+from app.phase_engine import ProfileContext
+from app.scheduler import PlanTask, _SlotSolver, optimize_slots
+
+HORIZON_START = date(2026, 11, 2)
+HORIZON_DAYS = 92
+
+
+def _problem(seed):
+    rng = random.Random(seed)
+    tasks = [
+        PlanTask(
+            title=f"t{i}",
+            category=rng.choice(["social", "work", "sport", "rest", "study"]),
+            start=datetime.combine(
+                HORIZON_START + timedelta(days=rng.randrange(HORIZON_DAYS)),
+                datetime.min.time(),
+            )
+            + timedelta(hours=rng.randint(8, 18)),
+            duration_hours=rng.choice([0.5, 1, 1.5, 2, 3, 4, 6]),
+        )
+        for i in range(1000)
+    ]
+    busy = []
+    for d in range(HORIZON_DAYS):
+        for _ in range(3):
+            start = datetime.combine(
+                HORIZON_START + timedelta(days=d), datetime.min.time()
+            ) + timedelta(hours=rng.randint(8, 18))
+            busy.append((start, start + timedelta(minutes=rng.choice([30, 60, 90]))))
+    return tasks, busy
+
+
+def _placed(assignments):
+    return sum(assignment.start is not None for assignment in assignments)
+
+
+def test_optimizer_never_places_fewer_tasks_than_greedy():
+    context = ProfileContext("u", 1, date(2026, 10, 1), 29, 5)
+    for seed, capacity in ((1, 6.0), (2, 12.0)):
+        tasks, busy = _problem(seed)
+        args = (
+            context, tasks, busy, HORIZON_START, HORIZON_DAYS, 8, 20, capacity, {}, 30
+        )
+
+        seed_solver = _SlotSolver(*args)
+        seed_solver.greedy()
+        greedy_placed = _placed(seed_solver.result(0).assignments)
+
+        plan = optimize_slots(*args, time_budget=0.3)
+
+        assert _placed(plan.assignments) >= greedy_placed
+        assert plan.score <= sum(seed_solver.cost) + 1e-6
@@ -0,0 +1,39 @@
+import logging
+
+from app import storage
+
+
+def test_lookup_ignores_case_and_whitespace():
+    user = storage.create_user("  Mixed.Case@X.org ")
+
+    assert user["email"] == "mixed.case@x.org"
+    assert storage.get_user_by_email("mixed.case@x.org") == user
+    assert storage.get_user_by_email("MIXED.CASE@X.ORG\n") == user
+    assert storage.get_user_by_email("other@x.org") is None
+
+
+def test_create_user_returns_the_existing_user():
+    first = storage.create_user("twice@x.org")
+
+    assert storage.create_user("Twice@X.org") == first
+
+
+def test_first_of_duplicate_emails_wins(monkeypatch, caplog):
+    monkeypatch.setattr(
+        storage,
+        "USERS",
+        {
+            "a": {"id": "a", "email": "dup@x.org"},
+            "b": {"id": "b", "email": "Dup@X.org"},
+            "c": {"id": "c", "email": "solo@x.org"},
+        },
+    )
+    monkeypatch.setattr(storage, "EMAIL_INDEX", {})
+
+    with caplog.at_level(logging.WARNING, logger="app.storage"):
+        storage._build_email_index()
+
+    assert storage.EMAIL_INDEX == {"dup@x.org": "a", "solo@x.org": "c"}
+    assert [r.getMessage() for r in caplog.records] == [
+        "Duplicate email 'dup@x.org' in db: keeping user a, ignoring user b"
+    ]
@@ -0,0 +1,51 @@
+import json
+import threading
+import time
+
+from app import storage
+
+
+def test_concurrent_writers_share_snapshot_writes(monkeypatch):
+    writes = []
+    write_db_snapshot = storage._write_db_snapshot
+
+    def slow_write():
+        writes.append(1)
+        time.sleep(0.01)
+        write_db_snapshot()
+
+    monkeypatch.setattr(storage, "_write_db_snapshot", slow_write)
+    emails = [f"group{i}@x.org" for i in range(40)]
+    threads = [
+        threading.Thread(target=storage.create_user, args=(email,)) for email in emails
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(writes) < len(emails)
+    with open(storage.DB_PATH, "r", encoding="utf-8") as f:
+        stored = {user["email"] for user in json.load(f)["users"].values()}
+    assert set(emails) <= stored
+
+
+def test_failed_write_is_retried_by_the_next_caller(monkeypatch):
+    write_db_snapshot = storage._write_db_snapshot
+    failures = [OSError("disk full")]
+
+    def flaky_write():
+        if failures:
+            raise failures.pop()
+        write_db_snapshot()
+
+    monkeypatch.setattr(storage, "_write_db_snapshot", flaky_write)
+    try:
+        storage.create_user("lost@x.org")
+    except OSError:
+        pass
+    storage.create_user("retry@x.org")
+
+    with open(storage.DB_PATH, "r", encoding="utf-8") as f:
+        stored = {user["email"] for user in json.load(f)["users"].values()}
+    assert {"lost@x.org", "retry@x.org"} <= stored
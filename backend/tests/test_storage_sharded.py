@@ -0,0 +1,59 @@
+import os
+import subprocess
+import sys
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _run(data_dir, code):
+    """
+    Run code against sharded storage in its own process, so every call is
+    a restart.
+    """
+    env = dict(
+        os.environ,
+        SHE_DATA_DIR=str(data_dir),
+        SHE_STORAGE_MODE="sharded",
+        SHE_WRITE_BEHIND="0",
+        PYTHONPATH=BACKEND_DIR,
+    )
+    script = "from app import storage\n" + code + "\nstorage.shutdown()\n"
+    result = subprocess.run(
+        [sys.executable, "-c", script],
+        env=env,
+        cwd=BACKEND_DIR,
+        capture_output=True,
+        text=True,
+    )
+    assert result.returncode == 0, result.stderr
+    return result.stdout
+
+
+def test_registration_appends_instead_of_rewriting_users(tmp_path):
+    _run(tmp_path, "storage.create_user('first@x.org')")
+    # restart: folds the first user into users.json
+    _run(tmp_path, "")
+    users_json = (tmp_path / "users.json").read_text()
+
+    _run(tmp_path, "storage.create_user('second@x.org')")
+    assert (tmp_path / "users.json").read_text() == users_json
+    assert "second@x.org" in (tmp_path / "users.journal").read_text()
+
+    out = _run(
+        tmp_path,
+        "print(storage.get_user_by_email('first@x.org') is not None,"
+        " storage.get_user_by_email('second@x.org') is not None)",
+    )
+    assert out.split() == ["True", "True"]
+    # the restart folded the journal into users.json
+    assert not (tmp_path / "users.journal").exists()
+    assert "second@x.org" in (tmp_path / "users.json").read_text()
+
+
+def test_torn_users_journal_tail_is_dropped(tmp_path):
+    _run(tmp_path, "storage.create_user('kept@x.org')")
+    with open(tmp_path / "users.journal", "a", encoding="utf-8") as f:
+        f.write('{"t":"users","k":"torn","v":{"em')
+
+    out = _run(tmp_path, "print(len(storage.USERS), storage.get_user_by_email('kept@x.org') is not None)")
+    assert out.split()[-2:] == ["1", "True"]
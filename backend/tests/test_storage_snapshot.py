@@ -0,0 +1,72 @@
+import json
+import logging
+import os
+import struct
+import sys
+
+from app import storage
+from app.storage_snapshot import MAGIC, dump_binary, load_binary
+
+DATA = {
+    "users": {"u": {"id": "u", "email": "snap@x.org"}},
+    "profiles": {"u": {"user_id": "u", "cycle_length": 28, "symptoms": ["Cramps"]}},
+    "tokens": {},
+}
+
+
+def test_round_trip(tmp_path):
+    path = tmp_path / "db.snapshot"
+    path.write_bytes(dump_binary(DATA))
+
+    assert load_binary(str(path)) == DATA
+
+
+def test_other_python_version_is_ignored(tmp_path):
+    path = tmp_path / "db.snapshot"
+    blob = bytearray(dump_binary(DATA))
+    struct.pack_into("<B", blob, len(MAGIC) + 1, sys.version_info.minor + 1)
+    path.write_bytes(bytes(blob))
+
+    assert load_binary(str(path)) is None
+
+
+def test_truncated_or_missing_file_is_ignored(tmp_path):
+    path = tmp_path / "db.snapshot"
+    path.write_bytes(dump_binary(DATA)[:-5])
+
+    assert load_binary(str(path)) is None
+    assert load_binary(str(tmp_path / "missing")) is None
+
+
+def _paths(monkeypatch, tmp_path):
+    db_path = tmp_path / "db.json"
+    snapshot_path = tmp_path / "db.snapshot"
+    monkeypatch.setattr(storage, "DB_PATH", str(db_path))
+    monkeypatch.setattr(storage, "SNAPSHOT_PATH", str(snapshot_path))
+    return db_path, snapshot_path
+
+
+def test_newer_file_wins(monkeypatch, tmp_path):
+    db_path, snapshot_path = _paths(monkeypatch, tmp_path)
+    from_json = {"users": {"j": {"id": "j", "email": "json@x.org"}}}
+    db_path.write_text(json.dumps(from_json))
+    snapshot_path.write_bytes(dump_binary(DATA))
+
+    os.utime(db_path, (1000, 1000))
+    assert storage._read_db_file() == DATA
+
+    os.utime(snapshot_path, (500, 500))
+    assert storage._read_db_file() == from_json
+
+
+def test_unreadable_snapshot_falls_back_to_json(monkeypatch, tmp_path, caplog):
+    db_path, snapshot_path = _paths(monkeypatch, tmp_path)
+    db_path.write_text(json.dumps(DATA))
+    os.utime(db_path, (1000, 1000))
+    snapshot_path.write_bytes(b"garbage, not a snapshot")
+
+    with caplog.at_level(logging.WARNING, logger="app.storage"):
+        assert storage._read_db_file() == DATA
+    assert caplog.records[-1].getMessage() == (
+        "Ignoring unreadable db.snapshot, falling back to db.json"
+    )
@@ -0,0 +1,125 @@
+import os
+import sqlite3
+import subprocess
+import sys
+
+from app.quiz_history import QuizHistory
+from app.storage_sqlite import SqliteStore
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+ANSWERS = dict(stress=3, concentration=4, energy=2, workout=1, social=5)
+
+
+def test_check_ins_with_the_same_timestamp_are_all_kept(tmp_path):
+    store = SqliteStore(str(tmp_path / "db.sqlite3"))
+    history = QuizHistory()
+    history.append(1000.0, **ANSWERS)
+    store.put_many([("quiz_history", "u", history.to_dict())])
+    # same second, and a clock that went backwards (clamped to 1000.0)
+    history.append(1000.0, **ANSWERS)
+    history.append(999.0, **ANSWERS)
+    store.put_many([("quiz_history", "u", history.to_dict())])
+    store.close()
+
+    loaded = SqliteStore(str(tmp_path / "db.sqlite3")).load_all()
+
+    assert loaded["quiz_history"]["u"]["timestamp"] == [1000.0, 1000.0, 1000.0]
+
+
+def test_history_keyed_by_timestamp_is_migrated(tmp_path):
+    path = str(tmp_path / "db.sqlite3")
+    conn = sqlite3.connect(path)
+    conn.executescript(
+        """
+        CREATE TABLE quiz_history (
+            user_id TEXT NOT NULL,
+            timestamp REAL NOT NULL,
+            stress INTEGER NOT NULL,
+            concentration INTEGER NOT NULL,
+            energy INTEGER NOT NULL,
+            workout INTEGER NOT NULL,
+            social INTEGER NOT NULL,
+            PRIMARY KEY (user_id, timestamp)
+        );
+        INSERT INTO quiz_history VALUES ('u', 2.0, 1, 1, 1, 1, 1);
+        INSERT INTO quiz_history VALUES ('u', 1.0, 2, 2, 2, 2, 2);
+        """
+    )
+    conn.close()
+
+    store = SqliteStore(path)
+    history = QuizHistory.from_dict(store.load_all()["quiz_history"]["u"])
+    history.append(2.0, **ANSWERS)
+    store.put_many([("quiz_history", "u", history.to_dict())])
+
+    loaded = store.load_all()["quiz_history"]["u"]
+    assert loaded["timestamp"] == [1.0, 2.0, 2.0]
+    assert loaded["stress"] == [2, 1, 3]
+
+
+def _run(data_dir, code, **env):
+    """
+    Run code against storage in its own process, so every call is a
+    restart.
+    """
+    env = dict(
+        os.environ,
+        SHE_DATA_DIR=str(data_dir),
+        SHE_WRITE_BEHIND="0",
+        PYTHONPATH=BACKEND_DIR,
+        **env,
+    )
+    script = "from app import storage\n" + code + "\nstorage.shutdown()\n"
+    result = subprocess.run(
+        [sys.executable, "-c", script],
+        env=env,
+        cwd=BACKEND_DIR,
+        capture_output=True,
+        text=True,
+    )
+    assert result.returncode == 0, result.stderr
+    return result.stdout
+
+
+def test_binary_snapshot_is_migrated(tmp_path):
+    _run(
+        tmp_path,
+        "storage.create_user('snap@x.org')",
+        SHE_STORAGE_MODE="json",
+        SHE_SNAPSHOT_FORMAT="binary",
+    )
+    assert not (tmp_path / "db.json").exists()
+
+    out = _run(
+        tmp_path,
+        "print(storage.get_user_by_email('snap@x.org') is not None)",
+        SHE_STORAGE_MODE="sqlite",
+    )
+    assert out.split()[-1] == "True"
+
+
+def test_profile_saved_without_weekly_quiz_drops_it(tmp_path):
+    _run(
+        tmp_path,
+        """
+from datetime import date
+user = storage.create_user('quiz@x.org')
+profile = dict(
+    last_period_start=date(2026, 10, 1), cycle_length=28,
+    menstruation_phase_duration=5, symptoms=[], medication='',
+    workout_intensity='low',
+)
+storage.save_profile(user['id'], **profile)
+storage.save_weekly_quiz(user['id'], stress=3, concentration=4, energy=2, workout=1, social=5)
+storage.save_profile(user['id'], **profile)
+""",
+        SHE_STORAGE_MODE="sqlite",
+    )
+
+    out = _run(
+        tmp_path,
+        "user = storage.get_user_by_email('quiz@x.org')\n"
+        "print(storage.PROFILES[user['id']].weekly_quiz)",
+        SHE_STORAGE_MODE="sqlite",
+    )
+    assert out.split()[-1] == "None"
@@ -0,0 +1,89 @@
+import os
+import subprocess
+import sys
+
+import pytest
+
+from app import config, storage
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+@pytest.fixture
+def written(monkeypatch):
+    """
+    Write-behind on, with _write_records recording its batches instead of
+    writing them.
+    """
+    batches = []
+    monkeypatch.setattr(config, "WRITE_BEHIND", True)
+    monkeypatch.setattr(storage, "_write_records", lambda keys: batches.append(keys))
+    return batches
+
+
+def test_changes_are_queued_until_flush(written):
+    user = storage.create_user("queued@x.org")
+    assert written == []
+    assert storage.write_behind_stats()["queue_depth"] == 1
+
+    storage.flush()
+
+    assert written == [[("users", user["id"])]]
+    assert storage.write_behind_stats()["queue_depth"] == 0
+
+
+def test_a_record_changed_twice_is_written_once(written):
+    user_id = storage.create_user("twice-queued@x.org")["id"]
+    for _ in range(2):
+        storage.save_weekly_quiz(
+            user_id, stress=1, concentration=2, energy=3, workout=4, social=5
+        )
+
+    storage.flush()
+
+    [batch] = written
+    assert ("profiles", user_id) in batch
+    assert len(batch) == len(set(batch))
+
+
+def test_failed_flush_keeps_the_queue(monkeypatch):
+    monkeypatch.setattr(config, "WRITE_BEHIND", True)
+
+    def fail(keys):
+        raise OSError("disk full")
+
+    monkeypatch.setattr(storage, "_write_records", fail)
+    storage.create_user("kept-queued@x.org")
+
+    with pytest.raises(OSError):
+        storage.flush()
+    assert storage.write_behind_stats()["queue_depth"] == 1
+
+    monkeypatch.setattr(storage, "_write_records", lambda keys: None)
+    storage.flush()
+    assert storage.write_behind_stats()["queue_depth"] == 0
+
+
+def test_shutdown_flushes_the_queue(tmp_path):
+    env = dict(
+        os.environ,
+        SHE_DATA_DIR=str(tmp_path),
+        SHE_STORAGE_MODE="journal",
+        SHE_WRITE_BEHIND="1",
+        SHE_FLUSH_INTERVAL="3600",
+        PYTHONPATH=BACKEND_DIR,
+    )
+    for code in (
+        "storage.create_user('flushed@x.org')\nstorage.shutdown()",
+        "print(storage.get_user_by_email('flushed@x.org') is not None)",
+    ):
+        result = subprocess.run(
+            [sys.executable, "-c", "from app import storage\n" + code],
+            env=env,
+            cwd=BACKEND_DIR,
+            capture_output=True,
+            text=True,
+        )
+        assert result.returncode == 0, result.stderr
+
+    assert result.stdout.split()[-1] == "True"
@@ -0,0 +1,86 @@
+import logging
+import os
+from datetime import date
+
+from fastapi.testclient import TestClient
+
+from app import main, storage
+from app.workout_engine import WorkoutEngine
+
+HEADER = "Cycle_Day,Cycle_Phase,Energy_Level_1to5,Rest_Need_1to5,Expected_Symptoms\n"
+PHASES = ["Menstrual"] * 5 + ["Follicular"] * 8 + ["Ovulatory"] * 2 + ["Luteal"] * 13
+
+
+def _write_template(path, energy=3, mtime=None):
+    rows = [f"{day},{phase},{energy},3," for day, phase in enumerate(PHASES, start=1)]
+    path.write_text(HEADER + "\n".join(rows) + "\n")
+    if mtime is not None:
+        os.utime(path, (mtime, mtime))
+
+
+def test_reload_swaps_the_engine_only_when_the_file_changes(tmp_path):
+    path = tmp_path / "cycle_template.csv"
+    workout_engine = WorkoutEngine(str(path), reload_interval=0)
+
+    workout_engine.start()
+    assert workout_engine.current() is None
+
+    _write_template(path, mtime=1000)
+    assert workout_engine.reload_if_changed()
+    first = workout_engine.current()
+    assert first.get_cycle_record(1).energy == 3
+    assert not workout_engine.reload_if_changed()
+
+    _write_template(path, energy=4, mtime=2000)
+    assert workout_engine.reload_if_changed()
+    assert workout_engine.current().get_cycle_record(1).energy == 4
+    assert workout_engine.stats()["reloads"] == 2
+
+
+def test_broken_template_keeps_the_previous_engine(tmp_path, caplog):
+    path = tmp_path / "cycle_template.csv"
+    _write_template(path, mtime=1000)
+    workout_engine = WorkoutEngine(str(path), reload_interval=0)
+    workout_engine.start()
+    loaded = workout_engine.current()
+
+    path.write_text(HEADER)
+    os.utime(path, (2000, 2000))
+
+    with caplog.at_level(logging.ERROR, logger="app.workout_engine"):
+        assert not workout_engine.reload_if_changed()
+    assert workout_engine.current() is loaded
+    assert workout_engine.stats()["last_error"]
+    assert caplog.records[-1].getMessage() == f"Loading workout template {path} failed"
+
+
+def test_workout_plan_endpoint(tmp_path, monkeypatch):
+    user_id = storage.create_user("workout@x.org")["id"]
+    storage.save_profile(
+        user_id,
+        last_period_start=date(2026, 10, 1),
+        cycle_length=28,
+        menstruation_phase_duration=5,
+        symptoms=[],
+        medication="",
+        workout_intensity="moderate",
+    )
+    path = tmp_path / "cycle_template.csv"
+    workout_engine = WorkoutEngine(str(path), reload_interval=0)
+    monkeypatch.setattr(main, "workout_engine", workout_engine)
+    client = TestClient(main.app)
+    url = f"/api/user/{user_id}/workout-plan"
+    params = {"start": "2026-10-01", "end": "2026-10-14", "intensity": "heavy"}
+
+    assert client.get(url, params=params).status_code == 503
+
+    _write_template(path)
+    workout_engine.start()
+    response = client.get(url, params=params)
+
+    assert response.status_code == 200
+    days = response.json()["days"]
+    assert [day["cycle_day"] for day in days] == list(range(1, 15))
+    assert days[0]["cycle_phase"] == "Menstrual"
+    assert days[11]["recommended_intensity"] == "heavy"
+    assert client.get(url, params={"start": "2026-10-01", "end": "2027-10-10"}).status_code == 400